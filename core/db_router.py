@@ -0,0 +1,112 @@
+import hashlib
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+# Set by ReplicaRoutingMiddleware for requests whose reads may go to a replica.
+replica_reads_allowed = ContextVar('replica_reads_allowed', default=False)
+
+# Seconds since the last replayed transaction, 0 when the replica has replayed everything it received.
+# pg_last_xact_replay_timestamp() alone would report an idle but up to date replica as lagging.
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_replica_lag = {}
+
+
+def get_replicas():
+    return getattr(settings, 'REPLICA_DATABASES', [])
+
+
+def replica_lag(alias):
+    """
+    Replication lag of a replica in seconds, measured at most every REPLICA_LAG_CHECK_SECONDS per process.
+    A replica that can not be reached counts as infinitely behind.
+    """
+    checked_at, lag = _replica_lag.get(alias, (None, None))
+    now = time.monotonic()
+    if checked_at is None or now - checked_at > getattr(settings, 'REPLICA_LAG_CHECK_SECONDS', 1):
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(REPLICA_LAG_SQL)
+                lag = float(cursor.fetchone()[0])
+        except DatabaseError:
+            logger.warning('Replica %s is unavailable, reading from the primary', alias, exc_info=True)
+            lag = float('inf')
+        _replica_lag[alias] = (now, lag)
+    return lag
+
+
+def pick_replica():
+    """
+    A random replica whose lag is within REPLICA_MAX_LAG_SECONDS, or None.
+    """
+    max_lag = getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 5)
+    replicas = [alias for alias in get_replicas() if replica_lag(alias) <= max_lag]
+    return random.choice(replicas) if replicas else None
+
+
+def primary_pin_key(request):
+    """
+    Cache key that pins a client to the primary, derived from its Authorization header or session cookie.
+    None for anonymous clients.
+    """
+    credentials = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credentials:
+        return None
+    return 'db-primary-pin:' + hashlib.sha256(credentials.encode()).hexdigest()
+
+
+@contextmanager
+def read_from_primary():
+    """
+    Send the reads of the block to the primary.
+
+    Used wherever the rows read are stored in the shared cache: entries are filled on a miss, which is
+    mostly right after a write dropped them, exactly when a replica is most likely not to have it yet.
+    Caching what a lagging replica returned would serve the old data for the whole cache timeout.
+    """
+    token = replica_reads_allowed.set(False)
+    try:
+        yield
+    finally:
+        replica_reads_allowed.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Send reads to a replica (settings.REPLICA_DATABASES) and everything else to the primary (`default`).
+
+    Reads only go to a replica inside requests that ReplicaRoutingMiddleware marked as safe, never
+    inside a transaction on the primary, so management commands, writes and read-modify-write code
+    always see their own data, and never while a cache entry is filled, see read_from_primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not replica_reads_allowed.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return pick_replica() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas get their schema through replication
+        return db not in get_replicas()
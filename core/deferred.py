@@ -0,0 +1,93 @@
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models
+from django.db.models.query import EmptyQuerySet
+from rest_framework import serializers
+
+# Columns that can hold enough data to be worth skipping when they are not shown.
+LARGE_FIELDS = (
+    models.TextField,
+    models.BinaryField,
+    models.JSONField,
+    SearchVectorField,
+)
+
+
+def large_fields(model):
+    return [
+        field.name for field in model._meta.concrete_fields
+        if isinstance(field, LARGE_FIELDS) and not field.primary_key
+    ]
+
+
+def serializer_field_names(serializer):
+    """
+    The model fields the serializer reads or writes, or None if it reads the whole instance (source='*').
+    SerializerMethodFields are left out, views name the fields they read in `loaded_fields`.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    names = set()
+    for field in serializer.fields.values():
+        if isinstance(field, serializers.SerializerMethodField):
+            continue
+        if field.source == '*':
+            return None
+        names.add(field.source.split('.')[0])
+    return names
+
+
+class DeferUnusedFieldsMixin:
+    """
+    Skip the large columns (text, JSON, binary and search vectors) the view's serializer does not use.
+
+    They are deferred in filter_queryset, which list and detail views, get_object() and
+    core.conditional.ConditionalGetMixin all go through, so e.g. a classroom's search_vector is never
+    read to render it. Saving an instance with deferred fields only writes the loaded ones.
+    Fields read by SerializerMethodFields are kept with `loaded_fields`. A deferred field that is
+    accessed anyway is fetched with one extra query, so a missing entry costs a query, not correctness.
+    Lists serialized from values() (core.serializers.ValuesListSerializer) only read their columns anyway.
+    """
+
+    loaded_fields = ()
+    defer_unused_fields = True
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not self.defer_unused_fields or isinstance(queryset, EmptyQuerySet):
+            return queryset
+        deferred = self.get_deferred_fields(queryset.model)
+        return queryset.defer(*deferred) if deferred else queryset
+
+    def get_deferred_fields(self, model):
+        used = serializer_field_names(self.get_serializer())
+        if used is None:
+            return []
+        used.update(self.loaded_fields)
+        return [name for name in large_fields(model) if name not in used]
+
+
+class DeferUnusedFieldsChangeList(ChangeList):
+    def get_queryset(self, request, *args, **kwargs):
+        queryset = super().get_queryset(request, *args, **kwargs)
+        if not self.model_admin.defer_unused_fields:
+            return queryset
+        deferred = [name for name in large_fields(self.model) if name not in self.list_display]
+        # the relations named in list_select_related are only shown through list_display methods
+        if isinstance(self.list_select_related, (list, tuple)):
+            for relation in self.list_select_related:
+                related_model = self.model._meta.get_field(relation).related_model
+                deferred += [f"{relation}__{name}" for name in large_fields(related_model)]
+        return queryset.defer(*deferred) if deferred else queryset
+
+
+class DeferUnusedFieldsAdminMixin:
+    """
+    Skip the large columns that are not in list_display on the admin's change list, and all of those
+    of the relations in list_select_related. The change form still loads every field.
+    """
+
+    defer_unused_fields = True
+
+    def get_changelist(self, request, **kwargs):
+        return DeferUnusedFieldsChangeList
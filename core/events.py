@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """
+    The process wide broker, an instance of settings.EVENT_BROKER.
+    """
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(getattr(settings, 'EVENT_BROKER', 'core.events.InProcessBroker'))()
+    return _broker
+
+
+class Subscription:
+    """
+    The messages of a set of channels, for one consumer running on an asyncio event loop.
+
+    Messages are buffered in a bounded queue. A consumer that falls `maxsize` messages behind is
+    closed instead of buffering without limit, it is expected to reconnect and catch up.
+    """
+
+    def __init__(self, broker, channels, maxsize):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.closed = False
+
+    def put(self, message):
+        """
+        Queue a message, must run on the subscription's loop.
+        """
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.broker.unsubscribe(self)
+        # wake up the consumer, get() returns None from now on
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def get(self, timeout=None):
+        """
+        The next message, None once the subscription is closed.
+        Raises asyncio.TimeoutError if no message arrives within timeout seconds.
+        """
+        if self.closed and self.queue.empty():
+            return None
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class Broker:
+    """
+    Publish/subscribe of messages on named channels.
+
+    publish() may be called from any thread, typically from a transaction.on_commit hook of a sync view,
+    subscribe() is called from the consumer's event loop and returns a Subscription.
+    """
+
+    # whether messages reach the subscriptions of other processes too
+    shared = False
+
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+    def subscribe(self, channels, maxsize=100):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InProcessBroker(Broker):
+    """
+    Deliver messages to the subscriptions of this process, without any external service.
+
+    Publishing looks up the channel's subscriptions and hands the message to each event loop once,
+    so a message fans out to thousands of subscriptions with a single cross-thread call per loop.
+    Messages are passed as is, encode them once before publishing.
+
+    Only consumers in the publishing process receive the messages, use PostgresBroker to deploy
+    several processes, or to publish from a management command.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def publish(self, channel, message):
+        self.deliver(channel, message)
+
+    def deliver(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        by_loop = defaultdict(list)
+        for subscription in subscriptions:
+            by_loop[subscription.loop].append(subscription)
+        for loop, loop_subscriptions in by_loop.items():
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(self._put, loop_subscriptions, message)
+
+    @staticmethod
+    def _put(subscriptions, message):
+        for subscription in subscriptions:
+            subscription.put(message)
+
+    def subscribe(self, channels, maxsize=100):
+        subscription = Subscription(self, channels, maxsize)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscriptions = self._subscriptions.get(channel)
+                if subscriptions is None:
+                    continue
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[channel]
+
+
+class PostgresBroker(InProcessBroker):
+    """
+    Deliver messages to the subscriptions of every process using the same database, with LISTEN/NOTIFY.
+
+    publish() sends the message with pg_notify on the publisher's connection. Processes with subscriptions
+    LISTEN on a connection of their own, in a thread that hands every notification to deliver().
+    Notifications are limited to 8000 bytes, keep messages well below that.
+
+    Messages published while the listener (re)connects are lost, clients sync when they (re)subscribe.
+    """
+
+    shared = True
+    notify_channel = 'events'
+    using = DEFAULT_DB_ALIAS
+    # the listener checks its connection when nothing arrived for this long
+    idle_seconds = 60
+    reconnect_seconds = 1
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def publish(self, channel, message):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.notify_channel, f"{channel}\n{message.decode()}"])
+
+    def subscribe(self, channels, maxsize=100):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self.listen, name='PostgresBroker', daemon=True)
+                self._listener.start()
+        return super().subscribe(channels, maxsize)
+
+    def listen(self):
+        while True:
+            # a connection of the thread's own, not shared with the requests
+            connection = connections.create_connection(self.using)
+            try:
+                connection.ensure_connection()
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.notify_channel}")
+                    while True:
+                        if not select.select([connection.connection], [], [], self.idle_seconds)[0]:
+                            # raises if the connection was dropped
+                            cursor.execute("SELECT 1")
+                        connection.connection.poll()
+                        notifies = connection.connection.notifies
+                        while notifies:
+                            channel, _, message = notifies.pop(0).payload.partition('\n')
+                            self.deliver(channel, message.encode())
+            except Exception:
+                logger.warning("Event listener lost its database connection, reconnecting", exc_info=True)
+                time.sleep(self.reconnect_seconds)
+            finally:
+                connection.close()
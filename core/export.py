@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework.views import APIView
+
+from core.renderers import CSVRenderer, NDJSONRenderer, ORJSONRenderer
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class ExportAPIView(APIView):
+    """
+    Base view for streaming CSV / NDJSON exports.
+
+    Subclasses set `export_header` and implement `get_export_rows()`, which should return a lazy
+    iterator of tuples (e.g. `values_list(...).iterator(chunk_size=EXPORT_CHUNK_SIZE)`),
+    so memory stays flat however many rows are exported.
+    CSV is returned by default, NDJSON with `?format=ndjson` or `Accept: application/x-ndjson`.
+    """
+
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+    export_header = ()
+    export_filename = 'export'
+
+    def get_export_rows(self):
+        raise NotImplementedError
+
+    def get_export_filename(self):
+        return self.export_filename
+
+    def handle_exception(self, exc):
+        # errors are returned as the usual JSON response_payload, not as csv
+        self.request.accepted_renderer = ORJSONRenderer()
+        self.request.accepted_media_type = ORJSONRenderer.media_type
+        return super().handle_exception(exc)
+
+    def get(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        rows = self.get_export_rows()
+        if renderer.format == 'ndjson':
+            content = stream_ndjson(self.export_header, rows)
+        else:
+            content = stream_csv(self.export_header, rows)
+        response = StreamingHttpResponse(content, content_type=f'{renderer.media_type}; charset={renderer.charset}')
+        response['Content-Disposition'] = f'attachment; filename="{self.get_export_filename()}.{renderer.format}"'
+        return response
+
+
+def stream_csv(header, rows, chunk_size=EXPORT_CHUNK_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    # send the header right away, then the rows in chunks
+    yield _flush(buffer)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % chunk_size == 0:
+            yield _flush(buffer)
+    yield _flush(buffer)
+
+
+def stream_ndjson(header, rows, chunk_size=EXPORT_CHUNK_SIZE):
+    lines = []
+    for count, row in enumerate(rows, start=1):
+        lines.append(json.dumps(dict(zip(header, row))) + '\n')
+        # send the first row right away, like the csv header, then the rows in chunks
+        if count == 1 or len(lines) == chunk_size:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def _flush(buffer):
+    value = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return value
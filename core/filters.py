@@ -0,0 +1,83 @@
+import operator
+import re
+from functools import reduce
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast, Greatest
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+SEARCH_CONFIG = 'english'
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    PostgreSQL full text and trigram search, ranked by relevance.
+
+    Views opt in with `full_text_search = True` and declare what to search:
+        search_vector_field: a stored, GIN indexed SearchVectorField (e.g. 'search_vector')
+        trigram_search_fields: text columns with a gin_trgm_ops index, matched by similarity (e.g. names)
+        search_exact_fields: integer columns matched exactly when a term is numeric (e.g. 'student__id')
+
+    Matching rows are annotated with `search_rank`, which SearchRankOrderingFilter orders by.
+    Views without `full_text_search = True` keep the plain icontains SearchFilter behaviour on `search_fields`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if not getattr(view, 'full_text_search', False):
+            return super().filter_queryset(request, queryset, view)
+
+        # only keep word characters, so the terms are safe to use in a raw tsquery
+        search_terms = re.findall(r'\w+', ' '.join(self.get_search_terms(request)))
+        if not search_terms:
+            return queryset
+
+        vector_field = getattr(view, 'search_vector_field', None)
+        trigram_fields = getattr(view, 'trigram_search_fields', [])
+        exact_fields = getattr(view, 'search_exact_fields', [])
+
+        conditions = []
+        # ts_rank and similarity return real, they are cast to double precision so that the rank a cursor
+        # stores (a Python float) compares equal to the row it was read from when the next page is fetched
+        ranks = []
+        if vector_field:
+            # every term must match, the last one as a prefix so partial words work while typing
+            query = SearchQuery(
+                ' & '.join(search_terms) + ':*',
+                search_type='raw',
+                config=SEARCH_CONFIG,
+            )
+            conditions.append(Q(**{vector_field: query}))
+            ranks.append(Cast(SearchRank(F(vector_field), query), FloatField()))
+
+        search_text = ' '.join(search_terms)
+        for field in trigram_fields:
+            conditions.append(Q(**{f'{field}__trigram_similar': search_text}))
+            ranks.append(Cast(TrigramSimilarity(field, search_text), FloatField()))
+
+        for field in exact_fields:
+            conditions.extend(Q(**{field: int(term)}) for term in search_terms if term.isdigit())
+
+        if not conditions:
+            return queryset.none()
+
+        if len(ranks) > 1:
+            rank = Greatest(*ranks, output_field=FloatField())
+        elif ranks:
+            rank = ranks[0]
+        else:
+            rank = Value(1.0, output_field=FloatField())
+
+        return queryset.annotate(search_rank=rank).filter(reduce(operator.or_, conditions))
+
+
+class SearchRankOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter that orders by relevance (`-search_rank`) when a full text search was applied
+    and the client did not ask for a specific ordering.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        if not request.query_params.get(self.ordering_param) and 'search_rank' in queryset.query.annotations:
+            return ('-search_rank',)
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.utils.crypto import get_random_string
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from trex.classroom.models import Classroom
+from trex.classroom.views import ClassroomDetailView
+from trex.user.authentication import StatelessJWTAuthentication
+from trex.user.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark requests/sec of ClassroomDetailView with the database backed JWTAuthentication "
+        "and with StatelessJWTAuthentication."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000,
+                            help="Number of requests per authentication class (default: 2000).")
+
+    def handle(self, *args, **options):
+        teacher = User.objects.create(username=f"benchmark-{get_random_string(8)}", role="teacher")
+        try:
+            classroom = Classroom.objects.create_with_code(teacher=teacher, classroom_name="Benchmark")
+            token = teacher.tokens()["access"]
+            for authentication_class in (JWTAuthentication, StatelessJWTAuthentication):
+                self.run(authentication_class, token, classroom, options["requests"])
+        finally:
+            teacher.delete()
+
+    def run(self, authentication_class, token, classroom, requests):
+        view = ClassroomDetailView.as_view(authentication_classes=[authentication_class])
+        factory = RequestFactory()
+        statements = 0
+
+        def count_statements(execute, sql, params, many, context):
+            nonlocal statements
+            statements += 1
+            return execute(sql, params, many, context)
+
+        # warm up, fills the token version cache
+        view(factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}"), classroom_id=classroom.classroom_id)
+
+        with connection.execute_wrapper(count_statements):
+            start = time.perf_counter()
+            for _ in range(requests):
+                request = factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+                response = view(request, classroom_id=classroom.classroom_id)
+                response.render()
+            elapsed = time.perf_counter() - start
+
+        assert response.status_code == 200, response.data
+        self.stdout.write(self.style.SUCCESS(authentication_class.__name__))
+        self.stdout.write(f"  requests/sec:          {requests / elapsed:.1f}")
+        self.stdout.write(f"  queries per request:   {statements / requests:.2f}")
@@ -0,0 +1,99 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils.crypto import get_random_string
+
+from trex.classroom.models import Classroom, generate_classroom_code
+from trex.user.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark classroom creation throughput with a large number of existing classrooms. "
+        "Compares the unique index allocator (Classroom.objects.create_with_code) "
+        "with the previous exists() check loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--existing", type=int, default=1_000_000,
+                            help="Number of classrooms that should exist before measuring (default: 1,000,000).")
+        parser.add_argument("--count", type=int, default=2000,
+                            help="Number of classrooms to create per strategy (default: 2000).")
+        parser.add_argument("--batch-size", type=int, default=10_000,
+                            help="Batch size used to seed the existing classrooms.")
+        parser.add_argument("--keep", action="store_true",
+                            help="Keep the seeded classrooms so the next run can reuse them.")
+
+    def handle(self, *args, **options):
+        teacher = User.objects.create(
+            username=f"benchmark-{get_random_string(8)}",
+            role="teacher",
+        )
+        try:
+            self.seed(teacher, options["existing"], options["batch_size"])
+            self.run("unique index allocator", self.create_with_code, teacher, options["count"])
+            self.run("exists() check loop", self.create_with_exists_check, teacher, options["count"])
+        finally:
+            if not options["keep"]:
+                # raw delete, the ORM would load every seeded classroom to cascade
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"DELETE FROM {Classroom._meta.db_table} WHERE teacher_id = %s",
+                        [teacher.pk],
+                    )
+                teacher.delete()
+
+    def seed(self, teacher, existing, batch_size):
+        missing = existing - Classroom.objects.count()
+        if missing <= 0:
+            return
+        self.stdout.write(f"Seeding {missing} classrooms...")
+        while missing > 0:
+            size = min(batch_size, missing)
+            Classroom.objects.bulk_create(
+                [
+                    Classroom(classroom_name="Benchmark classroom", classroom_code=generate_classroom_code(), teacher=teacher)
+                    for _ in range(size)
+                ],
+                ignore_conflicts=True,
+            )
+            missing = existing - Classroom.objects.count()
+
+    def run(self, name, create, teacher, count):
+        statements = []
+
+        def count_statements(execute, sql, params, many, context):
+            statements[-1] += 1
+            return execute(sql, params, many, context)
+
+        timings = []
+        with connection.execute_wrapper(count_statements):
+            start = time.perf_counter()
+            for i in range(count):
+                statements.append(0)
+                t0 = time.perf_counter()
+                create(teacher=teacher, classroom_name=f"Benchmark {i}")
+                timings.append(time.perf_counter() - t0)
+            elapsed = time.perf_counter() - start
+
+        timings.sort()
+        self.stdout.write(self.style.SUCCESS(name))
+        self.stdout.write(f"  existing classrooms:   {Classroom.objects.count() - count}")
+        self.stdout.write(f"  classrooms/sec:        {count / elapsed:.1f}")
+        self.stdout.write(f"  latency p50/p99 (ms):  {statistics.median(timings) * 1000:.2f} / "
+                          f"{timings[int(len(timings) * 0.99) - 1] * 1000:.2f}")
+        self.stdout.write(f"  queries per create:    {sum(statements) / count:.2f} (max {max(statements)})")
+
+    @staticmethod
+    def create_with_code(**kwargs):
+        return Classroom.objects.create_with_code(**kwargs)
+
+    @staticmethod
+    def create_with_exists_check(**kwargs):
+        while True:
+            classroom_code = generate_classroom_code()
+            if not Classroom.objects.filter(classroom_code=classroom_code).exists():
+                break
+        return Classroom.objects.create(classroom_code=classroom_code, **kwargs)
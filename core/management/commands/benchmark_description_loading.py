@@ -0,0 +1,145 @@
+import logging
+import random
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from rest_framework.test import APIClient
+
+from core.deferred import DeferUnusedFieldsAdminMixin, DeferUnusedFieldsMixin
+from trex.assignment.models import Assignment
+from trex.classroom.cache import invalidate_classroom_cache
+from trex.classroom.models import Classroom
+from trex.user.models import User
+
+WORDS = (
+    "assignment chapter reading essay submit draft review lecture notes week exercise problem set solution "
+    "rubric grade points late policy group project presentation source cite format deadline outline"
+).split()
+
+# bytes of the rows a statement returns, in the text format psycopg2 receives them in
+RESULT_BYTES_SQL = "SELECT COALESCE(SUM(OCTET_LENGTH(result::text)), 0) FROM ({sql}) AS result"
+
+
+def description(size, rng):
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the bytes read from the database per request of the assignment list, detail and update "
+        "endpoints and the admin change list, with the large columns the responses do not use deferred "
+        "and with every column loaded (see core.deferred), and how much the descriptions take at rest. "
+        "Creates a classroom with large assignment descriptions for a seeded teacher and deletes it afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--assignments", type=int, default=100,
+                            help="Assignments in the benchmark classroom (default: 100).")
+        parser.add_argument("--description-kb", type=int, default=16,
+                            help="Size of each assignment description in KiB (default: 16).")
+
+    def handle(self, *args, **options):
+        logging.getLogger("core.metrics").setLevel(logging.ERROR)
+
+        teacher = User.objects.filter(role="teacher").order_by("id").first()
+        admin = User.objects.filter(is_superuser=True).order_by("id").first()
+        if teacher is None or admin is None:
+            raise CommandError("No seeded data found, run `manage.py seed_data` first.")
+
+        rng = random.Random(0)
+        classroom = Classroom.objects.create_with_code(
+            teacher=teacher,
+            classroom_name="Description benchmark",
+            description="Created by benchmark_description_loading",
+        )
+        try:
+            Assignment.objects.bulk_create([
+                Assignment(
+                    classroom=classroom,
+                    assignment_name=f"Benchmark assignment {number}",
+                    description=description(options["description_kb"] * 1024, rng),
+                    status="published",
+                )
+                for number in range(options["assignments"])
+            ])
+            self.report(classroom, teacher, admin, options["assignments"])
+        finally:
+            classroom.delete()
+
+    def report(self, classroom, teacher, admin, assignments):
+        api = APIClient()
+        api.credentials(HTTP_AUTHORIZATION=f"Bearer {teacher.tokens()['access']}")
+        browser = Client()
+        browser.force_login(admin)
+        assignment = classroom.assignments.order_by("assignment_id").first()
+        base = f"/api/classrooms/{classroom.classroom_id}/assignments/"
+        requests = (
+            ("assignment:list", lambda: api.get(f"{base}?page_size={assignments}")),
+            ("assignment:detail", lambda: api.get(f"{base}{assignment.assignment_id}/")),
+            ("assignment:update", lambda: api.patch(f"{base}{assignment.assignment_id}/update/",
+                                                    {"score": 50}, format="json")),
+            ("admin changelist", lambda: browser.get("/admin/assignment/assignment/?o=-1")),
+        )
+
+        self.stdout.write(f"{'request':<20} {'deferred':>12} {'all columns':>12}")
+        for name, request in requests:
+            results = []
+            for defer in (True, False):
+                DeferUnusedFieldsMixin.defer_unused_fields = defer
+                DeferUnusedFieldsAdminMixin.defer_unused_fields = defer
+                # both modes build their response, none is served from the cache
+                invalidate_classroom_cache(classroom.classroom_id)
+                try:
+                    results.append(self.measure(request))
+                finally:
+                    DeferUnusedFieldsMixin.defer_unused_fields = True
+                    DeferUnusedFieldsAdminMixin.defer_unused_fields = True
+            self.stdout.write(f"{name:<20} {results[0] / 1024:>8.1f} KiB {results[1] / 1024:>8.1f} KiB")
+
+        with connections["default"].cursor() as cursor:
+            cursor.execute(
+                "SELECT SUM(OCTET_LENGTH(description)), SUM(PG_COLUMN_SIZE(description)), "
+                "STRING_AGG(DISTINCT PG_COLUMN_COMPRESSION(description), ', ') "
+                "FROM assignment_assignment WHERE classroom_id = %s",
+                [classroom.classroom_id],
+            )
+            length, stored, methods = cursor.fetchone()
+        self.stdout.write(
+            f"\nDescriptions at rest: {length / 1024:.1f} KiB of text stored in {stored / 1024:.1f} KiB "
+            f"({stored / length:.0%}), compressed with {methods or 'nothing'}"
+        )
+
+    @staticmethod
+    def measure(request):
+        """
+        Make the request and return the bytes of the rows its SELECT statements returned.
+        """
+        statements = []
+
+        def capture(execute, sql, params, many, context):
+            if not many and sql.lstrip().upper().startswith("SELECT"):
+                statements.append((context["connection"].alias, sql, params))
+            return execute(sql, params, many, context)
+
+        with ExitStack() as stack:
+            # GET requests read from the replicas, see core.db_router
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(capture))
+            response = request()
+        if response.status_code != 200:
+            raise CommandError(f"{response.status_code} response: {response.content[:200]!r}")
+
+        total = 0
+        for alias, sql, params in statements:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(RESULT_BYTES_SQL.format(sql=sql), params)
+                total += cursor.fetchone()[0]
+        return total
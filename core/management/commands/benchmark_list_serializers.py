@@ -0,0 +1,107 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils.crypto import get_random_string
+from rest_framework import serializers
+
+from core.renderers import ORJSONRenderer
+from trex.assignment.models import Assignment
+from trex.assignment.serializers import TeacherAssignmentListSerializer
+from trex.classroom.models import Classroom, generate_classroom_code
+from trex.classroom.serializers import StudentClassroomListSerializer
+from trex.enrollment.models import Enrollment
+from trex.enrollment.serializers import EnrollmentDetailSerializer
+from trex.user.models import User
+from trex.user.serializers import UserListSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the list serializers on large lists: the regular ModelSerializer path over model "
+        "instances (with select_related) against ValuesListSerializer over values() rows. "
+        "Checks that both render to the same bytes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000,
+                            help="Number of rows per list (default: 10,000).")
+        parser.add_argument("--repeat", type=int, default=5,
+                            help="Runs per serializer, the fastest one is reported (default: 5).")
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        prefix = f"benchmark-{get_random_string(8)}"
+        teacher = User.objects.create(username=prefix, role="teacher", first_name="Bench", last_name="Teacher")
+        try:
+            self.stdout.write(f"Seeding {rows} students, enrollments, assignments and classrooms...")
+            classroom = Classroom.objects.create_with_code(teacher=teacher, classroom_name="Benchmark")
+            students = User.objects.bulk_create(
+                User(username=f"{prefix}-{i}", email=f"{prefix}-{i}@example.com", role="student",
+                     first_name=f"Student{i}", last_name="Benchmark")
+                for i in range(rows)
+            )
+            Enrollment.objects.bulk_create(Enrollment(classroom=classroom, student=student) for student in students)
+            Assignment.objects.bulk_create(
+                Assignment(classroom=classroom, assignment_name=f"Assignment {i}", status="published")
+                for i in range(rows)
+            )
+            Classroom.objects.bulk_create(
+                Classroom(teacher=teacher, classroom_name=f"Classroom {i}", classroom_code=generate_classroom_code())
+                for i in range(rows - 1)
+            )
+
+            cases = [
+                ("EnrollmentDetailSerializer", EnrollmentDetailSerializer,
+                 Enrollment.objects.filter(classroom=classroom).order_by("enrollment_id"), ("student", "classroom")),
+                ("TeacherAssignmentListSerializer", TeacherAssignmentListSerializer,
+                 Assignment.objects.filter(classroom=classroom), ()),
+                ("StudentClassroomListSerializer", StudentClassroomListSerializer,
+                 Classroom.objects.filter(teacher=teacher).order_by("classroom_id"), ("teacher",)),
+                ("UserListSerializer", UserListSerializer,
+                 User.objects.filter(username__startswith=f"{prefix}-").order_by("id"), ()),
+            ]
+            for label, serializer_class, queryset, select_related in cases:
+                self.run(label, serializer_class, queryset, select_related, options["repeat"])
+        finally:
+            # the cascade removes the classrooms, enrollments and assignments
+            User.objects.filter(username__startswith=prefix).delete()
+
+    def run(self, label, serializer_class, queryset, select_related, repeat):
+        regular, regular_time, regular_queries = self.measure(
+            lambda: serializers.ListSerializer(queryset.select_related(*select_related), child=serializer_class()),
+            repeat,
+        )
+        values, values_time, values_queries = self.measure(
+            lambda: serializer_class(queryset, many=True),
+            repeat,
+        )
+        if regular != values:
+            raise CommandError(f"{label}: ValuesListSerializer output differs from the regular serializer")
+
+        rows = len(queryset)
+        self.stdout.write(self.style.SUCCESS(f"{label} ({rows} rows, {len(values)} bytes)"))
+        self.stdout.write(f"  ModelSerializer:       {regular_time * 1000:8.1f} ms  ({regular_queries} queries)")
+        self.stdout.write(f"  ValuesListSerializer:  {values_time * 1000:8.1f} ms  ({values_queries} queries)")
+        self.stdout.write(f"  speedup:               {regular_time / values_time:8.1f}x")
+
+    @staticmethod
+    def measure(make_serializer, repeat):
+        """
+        Fetch, serialize and render `repeat` times, return the output, the fastest time and the query count.
+        """
+        statements = 0
+
+        def count_statements(execute, sql, params, many, context):
+            nonlocal statements
+            statements += 1
+            return execute(sql, params, many, context)
+
+        renderer = ORJSONRenderer()
+        timings = []
+        with connection.execute_wrapper(count_statements):
+            for _ in range(repeat):
+                start = time.perf_counter()
+                content = renderer.render(make_serializer().data)
+                timings.append(time.perf_counter() - start)
+        return content, min(timings), statements // repeat
@@ -0,0 +1,125 @@
+import logging
+import statistics
+import threading
+import time
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from rest_framework.test import APIClient
+
+from trex.assignment.views import AssignmentListView
+from trex.classroom.cache import invalidate_classroom_cache
+from trex.classroom.models import Classroom
+from trex.classroom.views import ClassroomDetailView
+from trex.user.models import User
+
+VIEWS = {
+    "classroom:detail": (ClassroomDetailView, "/api/classrooms/{classroom_id}/"),
+    "assignment:list": (AssignmentListView, "/api/classrooms/{classroom_id}/assignments/"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the single-flight response cache: at each concurrency level, that many students of one "
+        "classroom request the same endpoint at once right after its cached responses were invalidated. "
+        "Reports the queries run per burst with single-flight on and off, with single-flight they stay flat "
+        "as concurrency rises. Uses the data generated by seed_data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 25, 50],
+                            help="Concurrency levels, one thread per concurrent request (default: 1 10 25 50).")
+        parser.add_argument("--bursts", type=int, default=3,
+                            help="Bursts per level and mode, the median is reported (default: 3).")
+
+    def handle(self, *args, **options):
+        # the per request log lines and over budget warnings of QueryMetricsMiddleware would drown the report
+        logging.getLogger("core.metrics").setLevel(logging.ERROR)
+
+        max_concurrency = max(options["concurrency"])
+        classroom, clients = self.get_clients(max_concurrency)
+        if classroom is None:
+            raise CommandError(
+                f"No classroom with assignments and {max_concurrency} students found, "
+                "run `manage.py seed_data` first or lower --concurrency."
+            )
+
+        for url_name, (view_class, route) in VIEWS.items():
+            enabled = view_class.response_cache_single_flight
+            url = route.format(classroom_id=classroom.classroom_id)
+            self.stdout.write(f"{url_name} ({url})")
+            for concurrency in options["concurrency"]:
+                line = f"  {concurrency:>4} concurrent"
+                for single_flight in (False, True):
+                    view_class.response_cache_single_flight = single_flight
+                    bursts = [
+                        self.burst(clients[:concurrency], url, classroom.classroom_id)
+                        for _ in range(options["bursts"])
+                    ]
+                    queries = statistics.median(queries for queries, _ in bursts)
+                    duration = statistics.median(duration for _, duration in bursts)
+                    mode = "single-flight" if single_flight else "uncoalesced"
+                    line += f"  {mode}: {queries:6.0f} queries {duration:8.1f} ms"
+                self.stdout.write(line)
+            view_class.response_cache_single_flight = enabled
+
+    @staticmethod
+    def get_clients(count):
+        """
+        A classroom with assignments and at least `count` students, and a client authenticated as each
+        of `count` of them. The classroom is None if there is no such classroom.
+        """
+        classroom = (
+            Classroom.objects.filter(assignments__isnull=False, student_count__gte=count)
+            .order_by("-student_count", "classroom_id")
+            .first()
+        )
+        if classroom is None:
+            return None, []
+        clients = []
+        for student in User.objects.filter(enrollments__classroom=classroom).order_by("id")[:count]:
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {student.tokens()['access']}")
+            # warm up the per-student caches (authentication, membership), only the shared response is measured
+            client.get(f"/api/classrooms/{classroom.classroom_id}/")
+            clients.append(client)
+        return classroom, clients
+
+    @staticmethod
+    def burst(clients, url, classroom_id):
+        """
+        Send one request per client at the same time, return the queries run and the duration in milliseconds.
+        """
+        invalidate_classroom_cache(classroom_id)
+        barrier = threading.Barrier(len(clients))
+        queries = []
+        statuses = []
+        lock = threading.Lock()
+
+        def count_query(execute, sql, params, many, context):
+            with lock:
+                queries.append(sql)
+            return execute(sql, params, many, context)
+
+        def request(client):
+            # every thread has its own database connections
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(count_query))
+                barrier.wait()
+                response = client.get(url)
+            connections.close_all()
+            statuses.append(response.status_code)
+
+        threads = [threading.Thread(target=request, args=(client,)) for client in clients]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = (time.perf_counter() - start) * 1000
+        if set(statuses) != {200}:
+            raise CommandError(f"{url} returned {sorted(set(statuses))}")
+        return len(queries), duration
@@ -0,0 +1,138 @@
+import json
+import logging
+from contextlib import ExitStack
+
+from django.core.management.base import CommandError
+from django.db import connections, transaction
+
+from core.management.commands import run_benchmarks
+from core.utils import api_routes
+
+# statements that can be explained, anything else (savepoints, SET, ...) is skipped
+EXPLAINED_STATEMENTS = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")
+
+
+def filtered_sequential_scans(plan):
+    """
+    Yield (table, filter) for every sequential scan with a filter in an EXPLAIN (FORMAT JSON) plan.
+
+    Those read the whole table to find the rows matching a condition, which an index would look up.
+    Scans without a filter need every row anyway, e.g. the build side of a hash join or an unpaginated list.
+    """
+    if plan.get("Node Type") == "Seq Scan" and "Filter" in plan:
+        yield plan["Relation Name"], plan["Filter"]
+    for child in plan.get("Plans", ()):
+        yield from filtered_sequential_scans(child)
+
+
+class Command(run_benchmarks.Command):
+    help = (
+        "Request every API route under each role against data generated by seed_data, EXPLAIN every statement "
+        "the requests run, and fail if any of them filters a table with more than --max-rows rows "
+        "with a sequential scan instead of an index. "
+        "Requests other than GET run in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-rows", type=int, default=1000,
+                            help="Tables with more rows than this must be filtered through an index (default: 1000).")
+        parser.add_argument("--route", action="append", dest="routes",
+                            help="Only check this URL name (e.g. classroom:list), can be repeated.")
+
+    def handle(self, *args, **options):
+        logging.getLogger("core.metrics").setLevel(logging.WARNING)
+        logging.getLogger("django.request").setLevel(logging.ERROR)
+
+        failures, checked = self.check_routes(options["max_rows"], options["routes"])
+        for failure in failures:
+            self.stdout.write(self.style.ERROR(failure))
+        if failures:
+            raise CommandError(f"{len(failures)} filtered sequential scans of large tables in {checked} statements.")
+        self.stdout.write(self.style.SUCCESS(f"No filtered sequential scans of large tables in {checked} statements."))
+
+    def check_routes(self, max_rows, routes=None):
+        """
+        Return a description of every filtered sequential scan of a table with more than max_rows rows
+        in the requests to the routes (all of them by default), and the number of statements explained.
+        """
+        # the planner needs up to date statistics to prefer an index, which freshly seeded tables lack
+        with connections["default"].cursor() as cursor:
+            cursor.execute("ANALYZE")
+        self.table_rows = {}
+
+        context = self.get_context()
+        clients = {role: self.get_client(context.get(role)) for role in run_benchmarks.ROLES}
+        kwargs = {
+            "classroom_id": context["classroom"].classroom_id,
+            "assignment_id": context["assignment"].assignment_id,
+            "id": context["student"].id,
+        }
+
+        failures = []
+        checked = 0
+        for url_name, route, view_class in api_routes():
+            if url_name in run_benchmarks.SKIPPED_ROUTES or (routes and url_name not in routes):
+                continue
+            url = route.format(**kwargs)
+            body = run_benchmarks.request_bodies(context).get(url_name)
+            for method in run_benchmarks.METHODS:
+                if not hasattr(view_class, method):
+                    continue
+                for role in run_benchmarks.ROLES:
+                    for alias, sql, plan in self.explain_request(clients[role], method, url, body):
+                        checked += 1
+                        for table, condition in filtered_sequential_scans(plan):
+                            rows = self.get_table_rows(alias, table)
+                            if rows > max_rows:
+                                failures.append(
+                                    f"{url_name} {method.upper()} {role}: sequential scan of {table} ({rows} rows) "
+                                    f"filtered on {condition}\n    {sql}"
+                                )
+
+        return failures, checked
+
+    def explain_request(self, client, method, url, body):
+        """
+        Make the request and return (database alias, SQL, plan) for every statement it ran.
+        The statements of write requests are explained before their transaction is rolled back.
+        """
+        statements = []
+
+        def capture(execute, sql, params, many, context):
+            if not many and sql.lstrip().upper().startswith(EXPLAINED_STATEMENTS):
+                statements.append((context["connection"].alias, sql, params))
+            return execute(sql, params, many, context)
+
+        with transaction.atomic():
+            with ExitStack() as stack:
+                # GET requests read from the replicas, see core.db_router
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(capture))
+                if method == "get":
+                    self.request(client, method, url, body)
+                else:
+                    response = getattr(client, method)(url, body, format="json")
+                    if response.streaming:
+                        b"".join(response.streaming_content)
+            plans = [(alias, sql, self.explain(alias, sql, params)) for alias, sql, params in statements]
+            transaction.set_rollback(True)
+        return plans
+
+    @staticmethod
+    def explain(alias, sql, params):
+        with connections[alias].cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]["Plan"]
+
+    def get_table_rows(self, alias, table):
+        """
+        The planner's estimate of the table's row count.
+        """
+        if table not in self.table_rows:
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+                self.table_rows[table] = cursor.fetchone()[0]
+        return self.table_rows[table]
@@ -0,0 +1,118 @@
+import datetime
+import decimal
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.renderers import ORJSONRenderer
+from core.utils import api_routes
+from trex.assignment.models import Assignment
+from trex.user.models import User
+
+# methods sent with an empty body, which fails validation and leaves the data alone
+EMPTY_BODY_METHODS = ("post", "put")
+
+
+class Command(BaseCommand):
+    help = (
+        "Call every API endpoint as anonymous, teacher, student and admin, render each response "
+        "with DRF's JSONRenderer and with ORJSONRenderer and report any difference in the bytes. "
+        "Everything runs in a transaction that is rolled back, so seed some data first."
+    )
+
+    def handle(self, *args, **options):
+        failures = self.check_values()
+        with transaction.atomic():
+            failures += self.check_endpoints()
+            transaction.set_rollback(True)
+        if failures:
+            raise CommandError(f"{failures} response(s) rendered differently")
+        self.stdout.write(self.style.SUCCESS("ORJSONRenderer output matches JSONRenderer"))
+
+    def check_values(self):
+        """
+        Values the serializers do not produce today, but views may put in a response_payload.
+        """
+        user = User(avatar="avatars/avatar.png")
+        data = {
+            "aware_datetime": timezone.now(),
+            "naive_datetime": datetime.datetime(2024, 1, 2, 3, 4, 5, 678),
+            "offset_datetime": datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone(datetime.timedelta(hours=5, minutes=30))),
+            "date": datetime.date(2024, 1, 2),
+            "time": datetime.time(3, 4, 5),
+            "timedelta": datetime.timedelta(days=1, seconds=5),
+            "decimal": decimal.Decimal("12.50"),
+            "lazy": gettext_lazy("This field is required."),
+            "uuid": uuid.uuid4(),
+            "unicode": "café \u2028 \u2029 \U0001f600",
+            "int_keys": {1: "one", 2: "two"},
+            "avatar": user.avatar,
+            "empty_avatar": User().avatar,
+            "nested": [(1, 2.5, None, True), {"big": 2**70}],
+            "nan": [None, float("nan")],
+            "infinity": {"nested": [float("-inf")]},
+        }
+        return sum(self.compare(f"value {key}", {key: value}) for key, value in data.items())
+
+    def check_endpoints(self):
+        assignment = Assignment.objects.select_related("classroom__teacher").first()
+        if assignment is None:
+            raise CommandError("No assignment found, seed some classrooms, enrollments and assignments first.")
+        classroom = assignment.classroom
+        enrollment = classroom.enrollments.select_related("student").first()
+        kwargs = {
+            "classroom_id": classroom.classroom_id,
+            "assignment_id": assignment.assignment_id,
+            "id": classroom.teacher_id,
+        }
+        users = {
+            "anonymous": None,
+            "teacher": classroom.teacher,
+            "student": enrollment.student if enrollment else None,
+            "admin": User.objects.filter(is_superuser=True).first(),
+        }
+
+        failures = 0
+        for _, route, view_class in api_routes():
+            if ORJSONRenderer not in getattr(view_class, "renderer_classes", ()):
+                continue
+            url = route.format(**kwargs)
+            for name, user in users.items():
+                if name != "anonymous" and user is None:
+                    continue
+                client = APIClient()
+                client.force_authenticate(user)
+                methods = [method for method in ("get", *EMPTY_BODY_METHODS) if hasattr(view_class, method)]
+                for method in methods:
+                    if method == "get":
+                        response = client.get(url)
+                    else:
+                        response = getattr(client, method)(url, {}, format="json")
+                    if getattr(response, "data", None) is None:
+                        continue
+                    failures += self.compare(f"{method.upper()} {url} as {name}", response.data, response.content)
+        return failures
+
+    def compare(self, label, data, content=None):
+        expected = self.render(JSONRenderer(), data)
+        actual = content if content is not None else self.render(ORJSONRenderer(), data)
+        if expected == actual:
+            self.stdout.write(f"  ok    {label}")
+            return 0
+        self.stdout.write(self.style.ERROR(f"  diff  {label}"))
+        self.stdout.write(f"        JSONRenderer:   {expected[:500]!r}")
+        self.stdout.write(f"        ORJSONRenderer: {actual[:500]!r}")
+        return 1
+
+    @staticmethod
+    def render(renderer, data):
+        # values the stock renderer cannot encode must fail the same way
+        try:
+            return renderer.render(data)
+        except Exception as exc:
+            return f"{type(exc).__name__}: {exc}"
@@ -0,0 +1,273 @@
+import datetime
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.management.commands.seed_data import SEED_PASSWORD
+from core.utils import api_routes
+from trex.assignment.models import Assignment
+from trex.classroom.models import Classroom
+from trex.enrollment.models import Enrollment
+from trex.user.models import User
+
+ROLES = ("anonymous", "teacher", "student", "admin")
+METHODS = ("get", "post", "put", "patch", "delete")
+# the API documentation, not part of the API itself, and the endless event stream
+SKIPPED_ROUTES = ("schema", "swagger-ui", "redoc", "sync:events")
+
+
+def request_bodies(context):
+    """
+    Request bodies of the routes that need one, by URL name.
+    """
+    due_date = (timezone.localdate() + datetime.timedelta(days=14)).isoformat()
+    classroom = {
+        "classroom_name": "Benchmark classroom",
+        "description": "Created by run_benchmarks",
+    }
+    assignment = {
+        "assignment_name": "Benchmark assignment",
+        "description": "Created by run_benchmarks",
+        "due_date": due_date,
+        "score": 50,
+        "status": "draft",
+    }
+    return {
+        "classroom:create": classroom,
+        "classroom:update": classroom,
+        "classroom:enroll": {"classroom_code": context["other_classroom"].classroom_code},
+        "enrollment:import": {"students": context["import_students"]},
+        "assignment:create": assignment,
+        "assignment:update": assignment,
+        "assignment:bulk": [assignment] * 30 + [
+            {"assignment_id": assignment_id, "status": "published"} for assignment_id in context["assignment_ids"]
+        ],
+        "user:create": {
+            "username": "benchmark-new-user",
+            "email": "benchmark-new-user@example.com",
+            "password": SEED_PASSWORD,
+            "password2": SEED_PASSWORD,
+            "role": "student",
+            "first_name": "Benchmark",
+            "last_name": "User",
+        },
+        "user:update": {"first_name": "Benchmark", "last_name": "User", "gender": "other"},
+        "user:login": {"username": context["student"].username, "password": SEED_PASSWORD},
+        "user:refresh": {"refresh": context["refresh"]},
+        "user:logout": {"refresh": context["refresh"]},
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every API route under each role (anonymous, teacher, student, admin) against data "
+        "generated by seed_data. Reports p50/p95/p99 latency, queries per request and peak allocations, "
+        "and writes the results as JSON so runs can be compared across commits. "
+        "Requests other than GET run in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=30,
+                            help="Measured requests per route, method and role (default: 30).")
+        parser.add_argument("--allocation-requests", type=int, default=3,
+                            help="Requests per route, method and role traced with tracemalloc (default: 3).")
+        parser.add_argument("--route", action="append", dest="routes",
+                            help="Only benchmark this URL name (e.g. classroom:list), can be repeated.")
+        parser.add_argument("--output", default="benchmark.json",
+                            help="Where to write the JSON results (default: benchmark.json).")
+        parser.add_argument("--compare", help="Earlier JSON results to print the p50 and query count changes against.")
+
+    def handle(self, *args, **options):
+        # the per request log lines of QueryMetricsMiddleware and the 4xx warnings would drown the report
+        logging.getLogger("core.metrics").setLevel(logging.WARNING)
+        logging.getLogger("django.request").setLevel(logging.ERROR)
+
+        context = self.get_context()
+        clients = {role: self.get_client(context.get(role)) for role in ROLES}
+        kwargs = {
+            "classroom_id": context["classroom"].classroom_id,
+            "assignment_id": context["assignment"].assignment_id,
+            "id": context["student"].id,
+        }
+
+        results = []
+        for url_name, route, view_class in api_routes():
+            if url_name in SKIPPED_ROUTES or (options["routes"] and url_name not in options["routes"]):
+                continue
+            url = route.format(**kwargs)
+            body = request_bodies(context).get(url_name)
+            for method in METHODS:
+                if not hasattr(view_class, method):
+                    continue
+                for role in ROLES:
+                    result = self.run(clients[role], method, url, body, options["requests"],
+                                      options["allocation_requests"])
+                    result.update(route=url_name, method=method.upper(), role=role)
+                    results.append(result)
+                    self.stdout.write(
+                        f"{url_name:<20} {method.upper():<6} {role:<9} {result['status']:>3}  "
+                        f"p50 {result['p50_ms']:7.2f}  p95 {result['p95_ms']:7.2f}  p99 {result['p99_ms']:7.2f} ms  "
+                        f"{result['queries']:5.1f} queries  {result['peak_allocated_kb']:8.1f} KiB"
+                    )
+
+        report = {
+            "commit": self.get_commit(),
+            "created": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": settings.DATABASES["default"]["ENGINE"],
+            "data": {
+                "users": User.objects.count(),
+                "classrooms": Classroom.objects.count(),
+                "enrollments": Enrollment.objects.count(),
+                "assignments": Assignment.objects.count(),
+                "benchmark_classroom_students": context["classroom"].student_count,
+            },
+            "requests": options["requests"],
+            "results": results,
+        }
+        with open(options["output"], "w") as file:
+            json.dump(report, file, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} results to {options['output']}"))
+
+        if options["compare"]:
+            self.compare(options["compare"], results)
+
+    def get_context(self):
+        classroom = (
+            Classroom.objects.filter(assignments__isnull=False, enrollments__isnull=False)
+            .select_related("teacher")
+            .order_by("-student_count", "classroom_id")
+            .first()
+        )
+        admin = User.objects.filter(is_superuser=True).order_by("id").first()
+        if classroom is None or admin is None:
+            raise CommandError("No seeded data found, run `manage.py seed_data` first.")
+        student = classroom.enrollments.select_related("student").order_by("enrollment_id").first().student
+        other_classroom = Classroom.objects.exclude(enrollments__student=student).order_by("classroom_id").first()
+        import_students = list(
+            User.objects.filter(role="student").exclude(enrollments__classroom=classroom)
+            .order_by("id").values_list("username", flat=True)[:20]
+        )
+        return {
+            "classroom": classroom,
+            "other_classroom": other_classroom or classroom,
+            "assignment": classroom.assignments.order_by("assignment_id").first(),
+            "assignment_ids": list(
+                classroom.assignments.order_by("assignment_id").values_list("assignment_id", flat=True)[:30]
+            ),
+            "teacher": classroom.teacher,
+            "student": student,
+            "admin": admin,
+            "refresh": student.tokens()["refresh"],
+            "import_students": import_students,
+        }
+
+    @staticmethod
+    def get_client(user):
+        client = APIClient()
+        if user is not None:
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {user.tokens()['access']}")
+        return client
+
+    @staticmethod
+    def get_commit():
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def run(self, client, method, url, body, requests, allocation_requests):
+        statements = 0
+
+        def count_statements(execute, sql, params, many, context):
+            nonlocal statements
+            statements += 1
+            return execute(sql, params, many, context)
+
+        # warm up, fills the caches a running server would have
+        status = self.request(client, method, url, body)
+
+        timings = []
+        with ExitStack() as stack:
+            # GET requests read from the replicas, see core.db_router
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_statements))
+            for _ in range(requests):
+                start = time.perf_counter()
+                status = self.request(client, method, url, body)
+                timings.append((time.perf_counter() - start) * 1000)
+
+        peaks = []
+        tracemalloc.start()
+        try:
+            for _ in range(allocation_requests):
+                tracemalloc.reset_peak()
+                baseline, _ = tracemalloc.get_traced_memory()
+                self.request(client, method, url, body)
+                _, peak = tracemalloc.get_traced_memory()
+                peaks.append((peak - baseline) / 1024)
+        finally:
+            tracemalloc.stop()
+
+        quantiles = statistics.quantiles(timings, n=100, method="inclusive") if len(timings) > 1 else timings * 99
+        return {
+            "status": status,
+            "p50_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(quantiles[94], 3),
+            "p99_ms": round(quantiles[98], 3),
+            "queries": round(statements / requests, 2),
+            "peak_allocated_kb": round(max(peaks, default=0), 1),
+        }
+
+    @staticmethod
+    def request(client, method, url, body):
+        if method == "get":
+            response = client.get(url)
+            # streaming exports only do their work while being consumed
+            if response.streaming:
+                b"".join(response.streaming_content)
+            return response.status_code
+
+        with transaction.atomic():
+            response = getattr(client, method)(url, body, format="json")
+            if response.streaming:
+                b"".join(response.streaming_content)
+            transaction.set_rollback(True)
+        return response.status_code
+
+    def compare(self, path, results):
+        with open(path) as file:
+            previous = {
+                (result["route"], result["method"], result["role"]): result
+                for result in json.load(file)["results"]
+            }
+        self.stdout.write(f"\nChanges against {path}:")
+        for result in results:
+            before = previous.get((result["route"], result["method"], result["role"]))
+            if before is None:
+                continue
+            change = (result["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100 if before["p50_ms"] else 0
+            line = (
+                f"{result['route']:<20} {result['method']:<6} {result['role']:<9} "
+                f"p50 {before['p50_ms']:7.2f} -> {result['p50_ms']:7.2f} ms ({change:+5.1f}%)  "
+                f"queries {before['queries']:5.1f} -> {result['queries']:5.1f}"
+            )
+            if result["queries"] > before["queries"] or change > 20:
+                line = self.style.WARNING(line)
+            self.stdout.write(line)
@@ -0,0 +1,165 @@
+import datetime
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from trex.assignment.models import Assignment
+from trex.classroom.models import Classroom, generate_classroom_code
+from trex.enrollment.models import Enrollment
+from trex.user.models import User
+
+SEED_PASSWORD = "seed-password"
+
+FIRST_NAMES = (
+    "Aarav", "Aditi", "Alex", "Amara", "Ananya", "Arjun", "Ben", "Chen", "Chloe", "Daniel", "Diya", "Elena",
+    "Emma", "Farah", "Gabriel", "Hana", "Ishaan", "Isla", "Jonas", "Kabir", "Kavya", "Leo", "Lucia", "Maya",
+    "Mei", "Mohammed", "Nia", "Noah", "Olivia", "Omar", "Priya", "Rahul", "Riya", "Sara", "Sofia", "Tariq",
+    "Thomas", "Vihaan", "Yara", "Zoe",
+)
+LAST_NAMES = (
+    "Ahmed", "Bose", "Brown", "Chopra", "Costa", "Das", "Fischer", "Garcia", "Gupta", "Ivanova", "Iyer",
+    "Jones", "Kapoor", "Khan", "Kim", "Kumar", "Lee", "Lopez", "Martin", "Mehta", "Mishra", "Nair", "Nguyen",
+    "Patel", "Rao", "Reddy", "Rossi", "Sato", "Shah", "Sharma", "Silva", "Singh", "Smith", "Wang", "Yadav",
+)
+SUBJECTS = (
+    "Algebra", "Biology", "Calculus", "Chemistry", "Computer Science", "Data Structures", "Databases",
+    "Economics", "English Literature", "Geography", "History", "Linear Algebra", "Machine Learning",
+    "Operating Systems", "Physics", "Statistics",
+)
+ASSIGNMENT_KINDS = ("Homework", "Lab report", "Problem set", "Quiz", "Reading", "Project milestone", "Essay")
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk generate teachers, students, classrooms, enrollments and assignments for benchmarks. "
+        f"Usernames start with --prefix, every seeded user has the password '{SEED_PASSWORD}'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--teachers", type=int, default=50)
+        parser.add_argument("--students", type=int, default=2000)
+        parser.add_argument("--classrooms-per-teacher", type=int, default=4)
+        parser.add_argument("--enrollments-per-classroom", type=int, default=30)
+        parser.add_argument("--assignments-per-classroom", type=int, default=20)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--prefix", default="seed", help="Username prefix of the seeded users (default: seed).")
+        parser.add_argument("--random-seed", type=int, default=0, help="Seed of the random generator (default: 0).")
+        parser.add_argument("--clear", action="store_true",
+                            help="Delete the users seeded with the same prefix, and their data, first.")
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        self.batch_size = options["batch_size"]
+        self.random = random.Random(options["random_seed"])
+        if options["enrollments_per_classroom"] > options["students"]:
+            raise CommandError("--enrollments-per-classroom can not be larger than --students")
+
+        seeded = User.objects.filter(username__startswith=f"{prefix}-")
+        if options["clear"]:
+            # the cascade removes their classrooms, enrollments and assignments
+            deleted, _ = seeded.delete()
+            self.stdout.write(f"Deleted {deleted} rows seeded with prefix '{prefix}'")
+        elif seeded.exists():
+            raise CommandError(f"Users with prefix '{prefix}' exist already, use --clear or another --prefix")
+
+        start = time.perf_counter()
+        with transaction.atomic():
+            password = make_password(SEED_PASSWORD)
+            admin = User.objects.create(
+                username=f"{prefix}-admin", email=f"{prefix}-admin@example.com", password=password,
+                role="teacher", is_staff=True, is_superuser=True, first_name="Admin", last_name="User",
+            )
+            teachers = self.create_users(prefix, "teacher", options["teachers"], password)
+            students = self.create_users(prefix, "student", options["students"], password)
+            classrooms = self.create_classrooms(
+                teachers,
+                options["classrooms_per_teacher"],
+                options["enrollments_per_classroom"],
+            )
+            enrollments = self.create_enrollments(classrooms, students, options["enrollments_per_classroom"])
+            assignments = self.create_assignments(classrooms, options["assignments_per_classroom"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded 1 admin ({admin.username}), {len(teachers)} teachers, {len(students)} students, "
+            f"{len(classrooms)} classrooms, {enrollments} enrollments and {assignments} assignments "
+            f"in {time.perf_counter() - start:.1f}s"
+        ))
+
+    def create_users(self, prefix, role, count, password):
+        users = []
+        for i in range(count):
+            first_name = self.random.choice(FIRST_NAMES)
+            last_name = self.random.choice(LAST_NAMES)
+            users.append(User(
+                username=f"{prefix}-{role}-{i}",
+                email=f"{first_name}.{last_name}.{i}@{prefix}.example.com".lower(),
+                password=password,
+                role=role,
+                first_name=first_name,
+                last_name=last_name,
+                gender=self.random.choice(("male", "female", "other", "not-specified")),
+            ))
+        return User.objects.bulk_create(users, batch_size=self.batch_size)
+
+    def create_classrooms(self, teachers, per_teacher, enrollments_per_classroom):
+        codes = set()
+        classrooms = []
+        for teacher in teachers:
+            for _ in range(per_teacher):
+                code = generate_classroom_code()
+                while code in codes:
+                    code = generate_classroom_code()
+                codes.add(code)
+                subject = self.random.choice(SUBJECTS)
+                classrooms.append(Classroom(
+                    teacher=teacher,
+                    classroom_name=f"{subject} {self.random.randint(101, 499)}",
+                    description=f"{subject} with {teacher.get_full_name()}, lectures, labs and weekly assignments.",
+                    classroom_code=code,
+                    # the enrollments are bulk created below, which does not maintain the counter
+                    student_count=enrollments_per_classroom,
+                ))
+        # codes already taken by existing classrooms are replaced, see Classroom.classroom_code
+        taken = set(Classroom.objects.filter(classroom_code__in=codes).values_list("classroom_code", flat=True))
+        for classroom in classrooms:
+            while classroom.classroom_code in taken:
+                classroom.classroom_code = generate_classroom_code()
+            taken.add(classroom.classroom_code)
+        return Classroom.objects.bulk_create(classrooms, batch_size=self.batch_size)
+
+    def create_enrollments(self, classrooms, students, per_classroom):
+        count = 0
+        batch = []
+        for classroom in classrooms:
+            for student in self.random.sample(students, per_classroom):
+                batch.append(Enrollment(classroom=classroom, student=student))
+            if len(batch) >= self.batch_size:
+                count += len(Enrollment.objects.bulk_create(batch))
+                batch = []
+        count += len(Enrollment.objects.bulk_create(batch))
+        return count
+
+    def create_assignments(self, classrooms, per_classroom):
+        today = timezone.localdate()
+        count = 0
+        batch = []
+        for classroom in classrooms:
+            for i in range(per_classroom):
+                kind = self.random.choice(ASSIGNMENT_KINDS)
+                batch.append(Assignment(
+                    classroom=classroom,
+                    assignment_name=f"{kind} {i + 1}",
+                    description=f"{kind} {i + 1} for {classroom.classroom_name}. Submit before the due date.",
+                    due_date=today + datetime.timedelta(days=self.random.randint(-30, 60)),
+                    score=self.random.choice((10, 20, 25, 50, 100)),
+                    status=self.random.choice(("draft", "published", "published", "published")),
+                ))
+            if len(batch) >= self.batch_size:
+                count += len(Assignment.objects.bulk_create(batch))
+                batch = []
+        count += len(Assignment.objects.bulk_create(batch))
+        return count
@@ -0,0 +1,250 @@
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from core.db_router import primary_pin_key, replica_reads_allowed
+
+logger = logging.getLogger('core.metrics')
+
+# The RequestMetrics of the request being handled, set by QueryMetricsMiddleware.
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class RequestMetrics:
+    """
+    Query count and timings of one request, in milliseconds.
+
+    db:        time spent executing SQL, on every database connection
+    view:      time spent in the view outside the database, serialization included
+    serialize: time spent building serializer data outside the database, see core.serializers.TimedSerializerMixin
+    render:    time spent rendering the response (DRF renderers)
+    total:     time spent in the middleware chain below QueryMetricsMiddleware, and streaming the response
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.view = 0.0
+        self.serialize = 0.0
+        self.render = 0.0
+        self.total = 0.0
+        self._view_start = None
+        self._view_db = 0.0
+        self._render_start = None
+        self._serializing = 0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += (time.perf_counter() - start) * 1000
+            self.queries += 1
+
+    @contextmanager
+    def serializing(self):
+        """
+        Count the block's time outside the database as serialization, once for nested serializers.
+        """
+        self._serializing += 1
+        start, db = time.perf_counter(), self.db
+        try:
+            yield
+        finally:
+            self._serializing -= 1
+            if not self._serializing:
+                self.serialize += (time.perf_counter() - start) * 1000 - (self.db - db)
+
+    def view_started(self):
+        self._view_start = time.perf_counter()
+        self._view_db = self.db
+
+    def view_finished(self):
+        if self._view_start is None or self._render_start is not None:
+            return
+        self._render_start = time.perf_counter()
+        self.view = (self._render_start - self._view_start) * 1000 - (self.db - self._view_db)
+
+    def render_finished(self, response):
+        if self._render_start is not None:
+            self.render = (time.perf_counter() - self._render_start) * 1000
+        return response
+
+    def server_timing(self):
+        return (
+            f'db;dur={self.db:.1f};desc="{self.queries} queries", '
+            f'view;dur={self.view:.1f}, '
+            f'serialize;dur={self.serialize:.1f}, '
+            f'render;dur={self.render:.1f}, '
+            f'total;dur={self.total:.1f}'
+        )
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db, 2),
+            'view_ms': round(self.view, 2),
+            'serialize_ms': round(self.serialize, 2),
+            'render_ms': round(self.render, 2),
+            'total_ms': round(self.total, 2),
+        }
+
+
+class QueryMetricsMiddleware:
+    """
+    Record the query count, DB time, view time, serialization time and render time of every request.
+
+    The metrics are sent back in a `Server-Timing` header and logged to the `core.metrics` logger,
+    one line per request keyed by the resolved URL name (e.g. `classroom:list`), with the values
+    in `extra={'metrics': ...}` for structured log handlers.
+
+    Budgets per URL name are read from settings.QUERY_BUDGETS, e.g.
+        QUERY_BUDGETS = {'classroom:list': {'queries': 3, 'db_ms': 50}}
+    A request over budget logs a warning, or raises QueryBudgetExceeded when settings.QUERY_BUDGETS_STRICT
+    is True, which fails the request in tests.
+    The queries of a StreamingHttpResponse (exports, roster imports) run while it is sent, they are counted
+    as the content is consumed and the request is logged and checked once the stream is done. Its
+    Server-Timing header only has what happened before streaming started.
+
+    Should be first in MIDDLEWARE, so the other middleware's queries are counted too.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        request.metrics = metrics
+        start = time.perf_counter()
+        with self.measure(metrics):
+            response = self.get_response(request)
+        metrics.view_finished()
+        metrics.total = (time.perf_counter() - start) * 1000
+        response['Server-Timing'] = metrics.server_timing()
+
+        if response.streaming and not response.is_async:
+            # asynchronous streams (server-sent events) do not query the database
+            response.streaming_content = self.measure_stream(
+                request, response, response.streaming_content, metrics, start,
+            )
+        else:
+            self.report(request, response, metrics)
+        return response
+
+    @staticmethod
+    @contextmanager
+    def measure(metrics):
+        token = current_metrics.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics.execute_wrapper))
+                yield
+        finally:
+            current_metrics.reset(token)
+
+    def measure_stream(self, request, response, streaming_content, metrics, start):
+        iterator = iter(streaming_content)
+        while True:
+            with self.measure(metrics):
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    break
+            yield chunk
+        metrics.total = (time.perf_counter() - start) * 1000
+        self.report(request, response, metrics)
+
+    def report(self, request, response, metrics):
+        url_name = request.resolver_match.view_name if request.resolver_match else None
+        logger.info(
+            '%s %s %s %s queries=%d db_ms=%.1f view_ms=%.1f serialize_ms=%.1f render_ms=%.1f total_ms=%.1f',
+            url_name, request.method, request.path, response.status_code, metrics.queries,
+            metrics.db, metrics.view, metrics.serialize, metrics.render, metrics.total,
+            extra={'url_name': url_name, 'metrics': metrics.as_dict()},
+        )
+        if url_name:
+            self.check_budget(url_name, metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics.view_started()
+
+    def process_template_response(self, request, response):
+        # the view is done, the response is rendered right after the template response middleware
+        request.metrics.view_finished()
+        response.add_post_render_callback(request.metrics.render_finished)
+        return response
+
+    @staticmethod
+    def check_budget(url_name, metrics):
+        budget = getattr(settings, 'QUERY_BUDGETS', {}).get(url_name)
+        if not budget:
+            return
+        exceeded = []
+        if 'queries' in budget and metrics.queries > budget['queries']:
+            exceeded.append(f"{metrics.queries} queries (budget {budget['queries']})")
+        if 'db_ms' in budget and metrics.db > budget['db_ms']:
+            exceeded.append(f"{metrics.db:.1f} ms in the database (budget {budget['db_ms']} ms)")
+        if not exceeded:
+            return
+        message = f"{url_name} is over budget: {', '.join(exceeded)}"
+        if getattr(settings, 'QUERY_BUDGETS_STRICT', False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message, extra={'url_name': url_name, 'metrics': metrics.as_dict()})
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Let the reads of GET/HEAD/OPTIONS requests go to a replica, see core.db_router.ReplicaRouter.
+
+    After a client sends any other request, its reads stick to the primary for settings.REPLICA_STICKY_SECONDS,
+    so it never reads data older than its own writes from a lagging replica. Clients are told apart by their
+    Authorization header or session cookie, see core.db_router.primary_pin_key.
+    """
+
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pin_key = primary_pin_key(request)
+        if request.method not in self.safe_methods:
+            response = self.get_response(request)
+            if pin_key:
+                cache.set(pin_key, True, getattr(settings, 'REPLICA_STICKY_SECONDS', 10))
+            return response
+
+        use_replica = not (pin_key and cache.get(pin_key))
+        token = replica_reads_allowed.set(use_replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            replica_reads_allowed.reset(token)
+        if use_replica and response.streaming and not response.is_async:
+            # streamed exports run their queries while the response is sent, after this middleware returns,
+            # asynchronous streams (server-sent events) do not query the database
+            response.streaming_content = self.stream_from_replica(response.streaming_content)
+        return response
+
+    @staticmethod
+    def stream_from_replica(streaming_content):
+        iterator = iter(streaming_content)
+        while True:
+            token = replica_reads_allowed.set(True)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                replica_reads_allowed.reset(token)
+            yield chunk
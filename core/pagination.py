@@ -0,0 +1,66 @@
+from rest_framework import pagination
+from rest_framework.response import Response
+
+
+class CursorPagination(pagination.CursorPagination):
+    """
+    Keyset pagination with opaque cursors.
+
+    Each page is fetched with `WHERE <ordering field> > <last seen value> LIMIT n`,
+    so any page costs an index seek instead of an OFFSET scan.
+    The ordering comes from the view's OrderingFilter (`?ordering=`) or the view's `ordering` attribute.
+
+    Views build the usual response_payload and pass it to get_paginated_response,
+    which adds the `next` and `previous` cursor links to it.
+    """
+
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        # Rows with the same value in the cursor field (e.g. equal search ranks) are told apart by
+        # their position within that value, so they need a stable order across page queries.
+        pk_name = queryset.model._meta.pk.name
+        if pk_name not in (field.lstrip('-') for field in ordering):
+            ordering = (*ordering, pk_name)
+        return ordering
+
+    def _get_position_from_instance(self, instance, ordering):
+        field_name = ordering[0].lstrip('-')
+        # rows from values() querysets, see core.serializers.ValuesListSerializer
+        if isinstance(instance, dict):
+            return str(instance[field_name])
+        # Follow `__` lookups so related orderings such as student__first_name work too.
+        attr = instance
+        for name in field_name.split('__'):
+            attr = getattr(attr, name)
+        return str(attr)
+
+    def get_paginated_response(self, payload):
+        payload['next'] = self.get_next_link()
+        payload['previous'] = self.get_previous_link()
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'success': {
+                    'type': 'boolean',
+                },
+                'message': {
+                    'type': 'string',
+                },
+                'data': schema,
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                },
+                'previous': {
+                    'type': 'string',
+                    'nullable': True,
+                },
+            },
+        }
@@ -0,0 +1,53 @@
+import codecs
+
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from core.renderers import ORJSONRenderer
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser that parses with orjson.
+    orjson only reads UTF-8, bodies in another charset go through the stock parser.
+    Like the stock parser in strict mode, NaN and Infinity are rejected.
+    """
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline-delimited JSON (`application/x-ndjson`) into a lazy iterator of the values of its lines,
+    for uploads too large to hold at once. The body is read a line at a time as the iterator is consumed,
+    e.g. while a streamed response is sent. Blank lines are skipped, a malformed line raises ParseError
+    when it is reached.
+    """
+
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return self.values(stream)
+
+    @staticmethod
+    def values(stream):
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield orjson.loads(line)
+            except orjson.JSONDecodeError as exc:
+                raise ParseError('NDJSON parse error on line %d - %s' % (line_number, str(exc)))
@@ -0,0 +1,106 @@
+import math
+
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+def has_non_finite_float(data):
+    """
+    Whether a NaN or an infinity is nested anywhere in the dicts, lists and tuples of data.
+    """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that serializes with orjson, producing the same bytes as the stock renderer.
+
+    orjson handles str, int, float, bool, None, dict and list (including subclasses such as ReturnDict
+    and ErrorDetail) natively. Everything else, e.g. datetimes, dates, Decimals, lazy strings or
+    ImageFieldFile values, goes through DRF's JSONEncoder.default, so it renders exactly as before.
+    Indented output (`Accept: application/json; indent=4`, the browsable API) and anything orjson
+    cannot encode, such as integers wider than 64 bits, fall back to the stock renderer.
+    NaN and infinities raise ValueError like the stock renderer in strict mode (STRICT_JSON), orjson alone
+    would render them as null.
+    The one known difference is the exponent notation of very small or large floats (`1e16`, not `1e+16`),
+    which parses to the same value; no API field renders floats today.
+    See core.tests and `manage.py check_renderer_compat`.
+    """
+
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if not self.compact or self.ensure_ascii or self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # orjson renders non-finite floats as null, only responses with a null can have one
+        if self.strict and b'null' in ret and has_non_finite_float(data):
+            raise ValueError("Out of range float values are not JSON compliant")
+
+        # same as the stock renderer, escape \u2028 and \u2029 so the output is a strict javascript subset
+        if b'\xe2\x80' in ret:
+            ret = ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+        return ret
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Lets content negotiation accept `text/csv` (or `?format=csv`) for export views.
+    Export views stream their own body, so there is nothing to render here.
+    """
+
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Lets content negotiation accept `application/x-ndjson` (or `?format=ndjson`) for export views.
+    Export views stream their own body, so there is nothing to render here.
+    """
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets content negotiation accept `text/event-stream` for server-sent event views.
+    The views stream their own events, only the responses that end the stream right away
+    (errors, failed authentication) are rendered here, as a single `error` event.
+    """
+
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return b'event: error\ndata: ' + orjson.dumps(data, default=str) + b'\n\n'
@@ -0,0 +1,132 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import QuerySet
+from django.db.models.manager import BaseManager
+from rest_framework import serializers
+
+from core.middleware import current_metrics
+
+# Model methods that list serializers use as a source, with the columns they are computed from
+# and a function that computes them exactly like the model method does.
+VALUES_METHODS = {
+    'get_full_name': (
+        ('first_name', 'last_name'),
+        lambda first_name, last_name: ('%s %s' % (first_name, last_name)).strip(),
+    ),
+}
+
+# Fields whose to_representation returns the database value unchanged, their columns are copied as is.
+PASSTHROUGH_FIELDS = (
+    serializers.ReadOnlyField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+class TimedSerializerMixin:
+    """
+    Count the time spent building `.data` in the request's metrics, see core.middleware.RequestMetrics.
+    """
+
+    @property
+    def data(self):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return super().data
+        with metrics.serializing():
+            return super().data
+
+
+class ModelSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    Base class of the API's model serializers, which times their `.data`.
+    Lists are timed when they use ValuesListSerializer, DRF's default ListSerializer is not.
+    """
+
+
+class ValuesListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """
+    ListSerializer for read only list endpoints that skips model instances.
+
+    Rows are fetched with `values()` on just the columns the child serializer declares, and each
+    dict is built directly from them: primary keys are copied, other columns go through the
+    field's own to_representation and `relation.get_full_name` sources are computed from the
+    related first_name and last_name columns. The output is the same as the child serializer's.
+
+    Enable it with `list_serializer_class = ValuesListSerializer` in the serializer's Meta.
+    Querysets passed to the serializer are converted automatically; paginated views convert the
+    queryset before paginating with `get_values_queryset()`, so the page is a list of dicts.
+    Model instances are still serialized the regular way.
+    """
+
+    def get_values_queryset(self, queryset):
+        """
+        Return `queryset.values()` with the declared columns plus the ordering columns,
+        which cursor pagination reads from each row.
+        """
+        columns = [column for _, sources, _ in self.compiled_fields for column in sources]
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        columns += [field.lstrip('-') for field in ordering if isinstance(field, str)]
+        return queryset.values(*dict.fromkeys(columns))
+
+    @property
+    def compiled_fields(self):
+        """
+        (field name, columns, function or None) for every readable field of the child serializer.
+        """
+        if not hasattr(self, '_compiled_fields'):
+            model = self.child.Meta.model
+            self._compiled_fields = [
+                self.compile_field(model, field)
+                for field in self.child._readable_fields
+            ]
+        return self._compiled_fields
+
+    def compile_field(self, model, field):
+        *relations, attribute = field.source.split('.')
+        for relation in relations:
+            model_field = model._meta.get_field(relation)
+            if not model_field.many_to_one or model_field.null:
+                raise ImproperlyConfigured(
+                    f"{type(self.child).__name__}.{field.field_name}: ValuesListSerializer only follows "
+                    f"non nullable foreign keys, not '{field.source}'."
+                )
+            model = model_field.related_model
+        prefix = ''.join(f'{relation}__' for relation in relations)
+
+        if attribute in VALUES_METHODS:
+            columns, function = VALUES_METHODS[attribute]
+            return field.field_name, tuple(prefix + column for column in columns), function
+
+        if isinstance(field, serializers.SerializerMethodField) or field.source == '*' or callable(
+            getattr(model, attribute, None)
+        ):
+            raise ImproperlyConfigured(
+                f"{type(self.child).__name__}.{field.field_name}: ValuesListSerializer can not read "
+                f"'{field.source}' from a column."
+            )
+        if isinstance(field, PASSTHROUGH_FIELDS):
+            return field.field_name, (prefix + attribute,), None
+        return field.field_name, (prefix + attribute,), field.to_representation
+
+    def to_representation(self, data):
+        if isinstance(data, BaseManager):
+            data = data.all()
+        if isinstance(data, QuerySet):
+            data = self.get_values_queryset(data)
+
+        compiled_fields = self.compiled_fields
+        ret = []
+        for item in data:
+            if not isinstance(item, dict):
+                ret.append(self.child.to_representation(item))
+                continue
+            row = {}
+            for field_name, columns, function in compiled_fields:
+                if function is None:
+                    row[field_name] = item[columns[0]]
+                elif len(columns) > 1:
+                    row[field_name] = function(*(item[column] for column in columns))
+                else:
+                    value = item[columns[0]]
+                    row[field_name] = None if value is None else function(value)
+            ret.append(row)
+        return ret
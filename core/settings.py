@@ -45,13 +45,17 @@ INSTALLED_APPS = [
     "rest_framework",  # new
     "corsheaders",  # new
     "rest_framework_simplejwt.token_blacklist",  # new
+    "core",  # new, for project wide management commands
     "trex.user",
     "trex.classroom",
     "trex.enrollment",
     "trex.assignment",
+    "trex.sync",
 ]
 
 MIDDLEWARE = [
+    "core.middleware.QueryMetricsMiddleware",
+    "core.middleware.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",  # new
@@ -131,7 +135,16 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'trex.user.authentication.StatelessJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'EXCEPTION_HANDLER': 'core.exceptions.custom_exception_handler',
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
@@ -152,10 +165,101 @@ DATABASES = {
         "PASSWORD": "post",
         "HOST": "localhost",
         "PORT": "5432",
+    },
+    # Read replica, point HOST at the standby. Locally it is a second connection to the same database,
+    # which is enough to exercise the routing.
+    "replica": {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": "classroom",
+        "USER": "postgres",
+        "PASSWORD": "post",
+        "HOST": "localhost",
+        "PORT": "5432",
+        "TEST": {
+            "MIRROR": "default",
+        },
+    },
+}
+
+# Reads of GET requests go to a replica, see core.db_router.ReplicaRouter and core.middleware.ReplicaRoutingMiddleware.
+DATABASE_ROUTERS = ["core.db_router.ReplicaRouter"]
+REPLICA_DATABASES = ["replica"]
+# Replicas further behind than this are skipped, their lag is checked at most every REPLICA_LAG_CHECK_SECONDS.
+REPLICA_MAX_LAG_SECONDS = 5
+REPLICA_LAG_CHECK_SECONDS = 1
+# After a write request the client reads from the primary for this long.
+REPLICA_STICKY_SECONDS = 10
+
+# Delta sync, see trex.sync.changes
+# Changes are kept this long (manage.py prune_sync_changes), older cursors get a full resync.
+SYNC_RETENTION_DAYS = 30
+# Clients with more changes than this get a full resync instead.
+SYNC_MAX_CHANGES = 5000
+
+# Server-sent events, see trex.sync.events
+# The broker fans events out to the connected clients. The PostgreSQL broker reaches the clients of every
+# process, including changes made by the publish_scheduled_assignments worker. core.events.InProcessBroker
+# needs no listener connection, but only reaches clients connected to the process that made the change,
+# so it only works when a single process serves the API and no worker runs.
+EVENT_BROKER = 'core.events.PostgresBroker'
+# A comment is sent on idle streams this often, so proxies do not close them.
+EVENTS_KEEPALIVE_SECONDS = 15
+# Streams are closed after this long, clients reconnect (and delta sync) on their own.
+# Django 4.2 does not notice clients that disconnect, their subscriptions are only dropped at this point.
+EVENTS_MAX_CONNECTION_SECONDS = 60
+# Clients further behind than this many events are disconnected.
+EVENTS_QUEUE_SIZE = 100
+
+# Cache
+# Membership lookups for permission checks are cached here, see trex.user.membership, and so are the token
+# versions that revoke JWTs, see trex.user.models.User.get_token_version.
+# A shared backend (e.g. redis or memcached) is required when running more than one process, the
+# publish_scheduled_assignments worker included: with the local memory cache, a revocation or an invalidation
+# only reaches the process that made it. The worker refuses to start with it.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
     }
 }
 
 
+# Request metrics
+# Query count and DB time budgets per URL name, see core.middleware.QueryMetricsMiddleware.
+# Requests over budget log a warning, or raise QueryBudgetExceeded when QUERY_BUDGETS_STRICT is True (tests).
+
+QUERY_BUDGETS = {
+    "classroom:list": {"queries": 3, "db_ms": 100},
+    "classroom:detail": {"queries": 3, "db_ms": 50},
+    "classroom:create": {"queries": 5, "db_ms": 50},
+    "classroom:enroll": {"queries": 3, "db_ms": 50},
+    "enrollment:list": {"queries": 3, "db_ms": 100},
+    "assignment:list": {"queries": 3, "db_ms": 100},
+    "assignment:detail": {"queries": 3, "db_ms": 50},
+    "upcoming-assignments": {"queries": 2, "db_ms": 50},
+    "user:list": {"queries": 2, "db_ms": 200},
+    "user:detail": {"queries": 2, "db_ms": 50},
+}
+QUERY_BUDGETS_STRICT = False
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {
+            "class": "logging.StreamHandler",
+        },
+    },
+    "loggers": {
+        "core.metrics": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -212,4 +316,6 @@ SIMPLE_JWT = {
     "SIGNING_KEY": SECRET_KEY,
     "AUTH_HEADER_TYPES": ("Bearer", "JWT"),
     "AUTH_HEADER_NAME": "HTTP_AUTHORIZATION",
+    # refuses the refresh tokens of users whose tokens were revoked, see trex.user.models.User.token_version
+    "TOKEN_REFRESH_SERIALIZER": "trex.user.serializers.TokenRefreshSerializer",
 }
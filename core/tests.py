@@ -0,0 +1,521 @@
+import logging
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.generics import GenericAPIView
+from rest_framework.test import APIClient
+
+from core import db_router
+from core.deferred import DeferUnusedFieldsMixin
+from core.export import stream_csv, stream_ndjson
+from core.management.commands import benchmark_single_flight, check_query_plans, check_renderer_compat
+from core.middleware import QueryBudgetExceeded
+from core.renderers import ORJSONRenderer
+from trex.assignment.models import Assignment
+from trex.classroom.models import Classroom
+from trex.enrollment.models import Enrollment
+from trex.user.models import User
+
+# A few of everything seed_data generates, enough for every route to find the rows it needs.
+SEED_OPTIONS = {
+    "teachers": 2,
+    "students": 10,
+    "classrooms_per_teacher": 2,
+    "enrollments_per_classroom": 4,
+    "assignments_per_classroom": 3,
+}
+
+
+def seed(**options):
+    call_command("seed_data", **{**SEED_OPTIONS, **options}, stdout=StringIO())
+
+
+class ORJSONRendererTests(TestCase):
+    # GET requests read from the replica, which mirrors default in tests
+    databases = {"default", "replica"}
+
+    def check(self, method, *args):
+        output = StringIO()
+        command = check_renderer_compat.Command(stdout=output)
+        failures = getattr(command, method)(*args)
+        self.assertEqual(failures, 0, output.getvalue())
+
+    def test_values_render_like_json_renderer(self):
+        self.check("check_values")
+
+    def test_responses_render_like_json_renderer(self):
+        seed()
+        self.check("check_endpoints")
+
+    def test_non_finite_floats_raise(self):
+        for value in (float("nan"), float("inf"), float("-inf")):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                ORJSONRenderer().render({"data": [{"score": None}, {"score": value}]})
+
+
+class QueryMetricsMiddlewareTests(TestCase):
+    databases = {"default", "replica"}
+
+    @classmethod
+    def setUpTestData(cls):
+        seed()
+        cls.classroom = Classroom.objects.select_related("teacher").order_by("classroom_id").first()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.classroom.teacher)
+
+    def test_metrics_in_server_timing(self):
+        response = self.client.get("/api/classrooms/")
+        self.assertEqual(response.status_code, 200)
+        for metric in ("db", "view", "serialize", "render", "total"):
+            self.assertIn(f"{metric};dur=", response["Server-Timing"])
+
+    @override_settings(QUERY_BUDGETS={"classroom:list": {"queries": 0}}, QUERY_BUDGETS_STRICT=False)
+    def test_over_budget_logs_a_warning(self):
+        with self.assertLogs("core.metrics", "WARNING") as logs:
+            response = self.client.get("/api/classrooms/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("classroom:list is over budget", logs.output[0])
+
+    @override_settings(QUERY_BUDGETS={"classroom:list": {"queries": 0}}, QUERY_BUDGETS_STRICT=True)
+    def test_strict_budget_fails_the_request(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, "classroom:list is over budget"):
+            self.client.get("/api/classrooms/")
+
+    @override_settings(QUERY_BUDGETS={"classroom:list": {"queries": 100}}, QUERY_BUDGETS_STRICT=True)
+    def test_strict_budget_passes_within_budget(self):
+        self.assertEqual(self.client.get("/api/classrooms/").status_code, 200)
+
+    def test_streamed_queries_are_counted(self):
+        url = f"/api/classrooms/{self.classroom.classroom_id}/assignments/export/"
+        with self.assertLogs("core.metrics", "INFO") as logs:
+            response = self.client.get(url)
+            queries_before_streaming = response.wsgi_request.metrics.queries
+            self.assertEqual(logs.output, [], "logged before the stream was consumed")
+            b"".join(response.streaming_content)
+        self.assertEqual(len(logs.records), 1)
+        self.assertGreater(logs.records[0].metrics["queries"], queries_before_streaming)
+
+    @override_settings(QUERY_BUDGETS={"assignment:export": {"queries": 0}}, QUERY_BUDGETS_STRICT=True)
+    def test_strict_budget_fails_streamed_responses(self):
+        response = self.client.get(f"/api/classrooms/{self.classroom.classroom_id}/assignments/export/")
+        with self.assertRaisesMessage(QueryBudgetExceeded, "assignment:export is over budget"):
+            b"".join(response.streaming_content)
+
+
+class ExportStreamTests(SimpleTestCase):
+    header = ("id", "name")
+
+    def setUp(self):
+        self.consumed = 0
+
+    def rows(self, count):
+        for row_id in range(count):
+            self.consumed += 1
+            yield row_id, f"row {row_id}"
+
+    def test_ndjson_sends_the_first_row_right_away(self):
+        stream = stream_ndjson(self.header, self.rows(5), chunk_size=2)
+        self.assertEqual(next(stream), '{"id": 0, "name": "row 0"}\n')
+        self.assertEqual(self.consumed, 1)
+        self.assertEqual(list(stream), [
+            '{"id": 1, "name": "row 1"}\n{"id": 2, "name": "row 2"}\n',
+            '{"id": 3, "name": "row 3"}\n{"id": 4, "name": "row 4"}\n',
+        ])
+        self.assertEqual(list(stream_ndjson(self.header, self.rows(0))), [])
+
+    def test_csv_sends_the_header_right_away(self):
+        stream = stream_csv(self.header, self.rows(3), chunk_size=2)
+        self.assertEqual(next(stream), "id,name\r\n")
+        self.assertEqual(self.consumed, 0)
+        self.assertEqual(list(stream), ["0,row 0\r\n1,row 1\r\n", "2,row 2\r\n"])
+
+
+class DeferUnusedFieldsTests(TestCase):
+    databases = {"default", "replica"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username="teacher", password="password", role="teacher")
+        cls.student = User.objects.create_user(username="student", password="password", role="student")
+        cls.classroom = Classroom.objects.create_with_code(
+            teacher=cls.teacher, classroom_name="Algebra", description="Linear equations " * 100,
+        )
+        Enrollment.objects.enroll(cls.student, cls.classroom.classroom_code)
+        cls.assignment = Assignment.objects.create(
+            classroom=cls.classroom, assignment_name="Homework", description="Exercises " * 100, status="published",
+        )
+        cls.classroom_url = f"/api/classrooms/{cls.classroom.classroom_id}/"
+        cls.assignment_url = f"{cls.classroom_url}assignments/{cls.assignment.assignment_id}/"
+
+    def setUp(self):
+        # cached responses outlive the rolled back changes of the previous test
+        cache.clear()
+
+    def request(self, user, method, url, data=None):
+        """
+        Send the request and return the response with the SELECTs of the given url's model table.
+        """
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connections["default"]) as default, \
+                CaptureQueriesContext(connections["replica"]) as replica:
+            response = getattr(client, method)(url, data, format="json")
+        self.assertEqual(response.status_code, 200)
+        table = '"assignment_assignment"' if "/assignments/" in url else '"classroom_classroom"'
+        selects = [
+            query["sql"] for query in [*default, *replica]
+            if query["sql"].startswith("SELECT") and f"FROM {table}" in query["sql"]
+        ]
+        return response, selects
+
+    def assert_deferred(self, user, method, url, data=None):
+        response, selects = self.request(user, method, url, data)
+        self.assertTrue(selects)
+        for sql in selects:
+            self.assertNotIn("search_vector", sql)
+        # nothing the serializer reads was deferred, which would cost a query per field
+        self.assertEqual(len([sql for sql in selects if "description" in sql]), 1)
+
+        # the response is the same when every column is loaded
+        cache.clear()
+        with mock.patch.object(DeferUnusedFieldsMixin, "defer_unused_fields", False):
+            full_response, full_selects = self.request(user, method, url, data)
+        self.assertTrue(any("search_vector" in sql for sql in full_selects))
+        self.assertEqual(response.json(), full_response.json())
+
+    def test_detail_views(self):
+        for user in (self.teacher, self.student):
+            for url in (self.classroom_url, self.assignment_url):
+                with self.subTest(user=user.username, url=url):
+                    self.assert_deferred(user, "get", url)
+
+    def test_update_views(self):
+        self.assert_deferred(self.teacher, "patch", f"{self.classroom_url}update/", {"classroom_name": "Geometry"})
+        self.assert_deferred(self.teacher, "patch", f"{self.assignment_url}update/", {"score": 50})
+
+    def test_update_keeps_the_search_vector_current(self):
+        # the deferred search_vector is not written back over the one the trigger sets
+        self.request(self.teacher, "patch", f"{self.classroom_url}update/", {"classroom_name": "Geometry"})
+        self.assertEqual(list(Classroom.objects.filter(search_vector="geometry")), [self.classroom])
+
+    def test_get_deferred_fields(self):
+        class ClassroomNameSerializer(serializers.ModelSerializer):
+            class Meta:
+                model = Classroom
+                fields = ("classroom_id", "classroom_name")
+
+        class View(DeferUnusedFieldsMixin, GenericAPIView):
+            serializer_class = ClassroomNameSerializer
+
+        view = View(request=None, format_kwarg=None)
+        self.assertEqual(view.get_deferred_fields(Classroom), ["description", "search_vector"])
+        # e.g. read by a SerializerMethodField
+        view.loaded_fields = ("description",)
+        self.assertEqual(view.get_deferred_fields(Classroom), ["search_vector"])
+
+
+class ConditionalGetTests(TestCase):
+    databases = {"default", "replica"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username="teacher", password="password", role="teacher")
+        cls.classroom = Classroom.objects.create_with_code(teacher=cls.teacher, classroom_name="Algebra")
+        cls.ada, cls.bob = (
+            User.objects.create_user(username=name, password="password", role="student") for name in ("ada", "bob")
+        )
+        for student in (cls.ada, cls.bob):
+            Enrollment.objects.create(classroom=cls.classroom, student=student)
+        cls.list_url = "/api/classrooms/"
+        cls.detail_url = f"/api/classrooms/{cls.classroom.classroom_id}/"
+
+    def setUp(self):
+        # cached responses outlive the rolled back changes of the previous test
+        cache.clear()
+
+    def get(self, url, user=None, **headers):
+        client = APIClient()
+        client.force_authenticate(user or self.teacher)
+        return client.get(url, headers=headers)
+
+    def assert_not_modified(self, url, user=None, **headers):
+        response = self.get(url, user, **headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_matching_etag(self):
+        for url in (self.list_url, self.detail_url):
+            with self.subTest(url):
+                response = self.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assert_not_modified(url, if_none_match=response["ETag"])
+                self.assertEqual(self.get(url, if_none_match='"stale"').status_code, 200)
+
+    def test_matching_if_modified_since(self):
+        for url in (self.list_url, self.detail_url):
+            with self.subTest(url):
+                response = self.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assert_not_modified(url, if_modified_since=response["Last-Modified"])
+
+    def test_cached_detail_answers_without_queries(self):
+        etag = self.get(self.detail_url)["ETag"]
+        with CaptureQueriesContext(connections["default"]) as default, \
+                CaptureQueriesContext(connections["replica"]) as replica:
+            self.assert_not_modified(self.detail_url, if_none_match=etag)
+        self.assertEqual(len(default) + len(replica), 0)
+
+    def test_update_changes_the_etag(self):
+        etags = [self.get(url)["ETag"] for url in (self.list_url, self.detail_url)]
+        client = APIClient()
+        client.force_authenticate(self.teacher)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.patch(f"{self.detail_url}update/", {"classroom_name": "Geometry"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        for url, etag in zip((self.list_url, self.detail_url), etags):
+            with self.subTest(url):
+                response = self.get(url, if_none_match=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["data"]["classroom_name"], "Geometry")
+
+    def test_cascade_delete_changes_the_etag(self):
+        etag = self.get(self.detail_url)["ETag"]
+        # the enrollment goes with the student, the classroom row itself is not saved
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.bob.pk).delete()
+
+        response = self.get(self.detail_url, if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["data"]["student_ids"], [self.ada.pk])
+
+    def test_etags_differ_per_user(self):
+        # both students are served the same cached response
+        ada = self.get(self.detail_url, self.ada)
+        bob = self.get(self.detail_url, self.bob)
+        self.assertNotEqual(ada["ETag"], bob["ETag"])
+        self.assertEqual(self.get(self.detail_url, self.bob, if_none_match=ada["ETag"]).status_code, 200)
+        self.assert_not_modified(self.detail_url, self.bob, if_none_match=bob["ETag"])
+
+
+class ClassroomListTestCase(TestCase):
+    databases = {"default", "replica"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(
+            username="teacher", password="password", role="teacher", first_name="Ada", last_name="Lovelace",
+        )
+        other_teacher = User.objects.create_user(
+            username="other", password="password", role="teacher", first_name="Grace", last_name="Hopper",
+        )
+        cls.admin = User.objects.create_superuser(username="admin", password="password")
+        classrooms = [
+            ("Biology", ""),
+            ("Algebra", ""),
+            ("Biology", ""),
+            ("Geometry", "Algebra review before the exam"),
+            ("Algebra", ""),
+            ("Biology", ""),
+            ("History", ""),
+            ("Algebra", ""),
+        ]
+        cls.classrooms = [
+            Classroom.objects.create_with_code(teacher=cls.teacher, classroom_name=name, description=description)
+            for name, description in classrooms
+        ]
+        cls.other_classroom = Classroom.objects.create_with_code(teacher=other_teacher, classroom_name="Algebra")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def pages(self, url, params):
+        """
+        Follow the next links from the first page, and then the previous links back from the last one.
+        Returns the classroom ids of each page in both directions.
+        """
+        forward, backward = [], []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            payload = response.json()
+            forward.append([classroom["classroom_id"] for classroom in payload.get("data", [])])
+            if not payload["next"]:
+                break
+            response = self.client.get(payload["next"])
+        while payload["previous"]:
+            response = self.client.get(payload["previous"])
+            self.assertEqual(response.status_code, 200)
+            payload = response.json()
+            backward.insert(0, [classroom["classroom_id"] for classroom in payload["data"]])
+        return forward, backward
+
+    def assert_pages(self, params, expected_ids, page_size):
+        forward, backward = self.pages("/api/classrooms/", {**params, "page_size": page_size})
+        self.assertEqual([classroom_id for page in forward for classroom_id in page], expected_ids)
+        self.assertTrue(all(len(page) == page_size for page in forward[:-1]))
+        self.assertEqual(backward, forward[:-1])
+
+
+class CursorPaginationTests(ClassroomListTestCase):
+    def test_pages_across_ties(self):
+        expected = sorted(self.classrooms, key=lambda classroom: (classroom.classroom_name, classroom.classroom_id))
+        expected_ids = [classroom.classroom_id for classroom in expected]
+        for page_size in (1, 2, 3):
+            with self.subTest(page_size=page_size):
+                self.assert_pages({"ordering": "classroom_name"}, expected_ids, page_size)
+        self.assert_pages({"ordering": "-classroom_name"}, [
+            classroom.classroom_id
+            for classroom in sorted(expected, key=lambda classroom: classroom.classroom_name, reverse=True)
+        ], 2)
+
+
+class FullTextSearchFilterTests(ClassroomListTestCase):
+    def test_search_ranks_name_matches_first(self):
+        response = self.client.get("/api/classrooms/", {"search": "algebra"})
+        algebra = [classroom.classroom_id for classroom in self.classrooms if classroom.classroom_name == "Algebra"]
+        self.assertEqual(
+            [classroom["classroom_id"] for classroom in response.json()["data"]],
+            # the name is weighted above the description, equal ranks are in id order
+            [*algebra, self.classrooms[3].classroom_id],
+        )
+
+    def test_search_matches_prefixes(self):
+        response = self.client.get("/api/classrooms/", {"search": "geom"})
+        self.assertEqual([classroom["classroom_id"] for classroom in response.json()["data"]], [
+            self.classrooms[3].classroom_id,
+        ])
+
+    def test_search_rank_cursors(self):
+        algebra = [classroom.classroom_id for classroom in self.classrooms if classroom.classroom_name == "Algebra"]
+        for page_size in (1, 2):
+            with self.subTest(page_size=page_size):
+                self.assert_pages({"search": "algebra"}, [*algebra, self.classrooms[3].classroom_id], page_size)
+
+    def test_teacher_names_are_matched_by_similarity(self):
+        # teacher names are not part of the search vector
+        self.client.force_authenticate(self.admin)
+        for search in ("Hopper", "hopp"):
+            with self.subTest(search=search):
+                response = self.client.get("/api/classrooms/", {"search": search})
+                self.assertEqual([classroom["classroom_id"] for classroom in response.json()["data"]], [
+                    self.other_classroom.classroom_id,
+                ])
+
+    def test_search_without_matches(self):
+        response = self.client.get("/api/classrooms/", {"search": "chemistry"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["message"], "No classrooms found")
+
+
+class QueryPlanTests(TestCase):
+    databases = {"default", "replica"}
+
+    def test_no_filtered_sequential_scans(self):
+        seed()
+        # The planner rightly scans tables this small, make it use an index wherever there is one
+        # so that any filtered sequential scan left is a missing index.
+        for alias in self.databases:
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        # every route is requested under every role, the request logs would drown the report
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        failures, checked = check_query_plans.Command(stdout=StringIO()).check_routes(max_rows=0)
+        self.assertGreater(checked, 0)
+        self.assertFalse(failures, "\n".join(failures))
+
+
+class SingleFlightTests(TransactionTestCase):
+    # the concurrent requests run in threads with connections of their own, which only see committed data
+    databases = {"default", "replica"}
+
+    def test_concurrent_misses_fill_the_cache_once(self):
+        seed(enrollments_per_classroom=10)
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        classroom, clients = benchmark_single_flight.Command.get_clients(10)
+        for url_name, (view_class, route) in benchmark_single_flight.VIEWS.items():
+            url = route.format(classroom_id=classroom.classroom_id)
+            with self.subTest(url_name):
+                alone, _ = benchmark_single_flight.Command.burst(clients[:1], url, classroom.classroom_id)
+                together, _ = benchmark_single_flight.Command.burst(clients, url, classroom.classroom_id)
+                self.assertEqual(together, alone)
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    # outside of a test transaction, reads inside one always go to the primary
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        db_router._replica_lag.clear()
+        self.addCleanup(db_router._replica_lag.clear)
+        self.teacher = User.objects.create_user(username="teacher", password="password", role="teacher")
+        Classroom.objects.create_with_code(teacher=self.teacher, classroom_name="Algebra")
+        # the pin is keyed by the Authorization header, force_authenticate sends none
+        self.client = APIClient()
+        self.authenticate(self.teacher)
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {user.tokens()['access']}")
+        # the user's token version is read from the primary until it is cached
+        self.assertEqual(self.client.get("/api/classrooms/").status_code, 200)
+
+    def read_aliases(self):
+        """
+        Send a GET request and return the aliases that its queries ran on.
+        """
+        with CaptureQueriesContext(connections["default"]) as default, \
+                CaptureQueriesContext(connections["replica"]) as replica:
+            response = self.client.get("/api/classrooms/")
+        self.assertEqual(response.status_code, 200)
+        return {alias for alias, queries in (("default", default), ("replica", replica)) if queries}
+
+    def write(self):
+        response = self.client.post("/api/classrooms/create/", {"classroom_name": "Geometry"}, format="json")
+        self.assertEqual(response.status_code, 201)
+
+    def test_get_reads_from_the_replica(self):
+        self.assertEqual(self.read_aliases(), {"replica"})
+
+    def test_get_after_a_write_reads_from_the_primary(self):
+        self.write()
+        self.assertEqual(self.read_aliases(), {"default"})
+
+        # other clients keep reading from the replica
+        other = User.objects.create_user(username="other", password="password", role="teacher")
+        Classroom.objects.create_with_code(teacher=other, classroom_name="Biology")
+        self.authenticate(other)
+        self.assertEqual(self.read_aliases(), {"replica"})
+
+    @override_settings(REPLICA_STICKY_SECONDS=0.2)
+    def test_reads_return_to_the_replica_after_the_sticky_window(self):
+        self.write()
+        self.assertEqual(self.read_aliases(), {"default"})
+        time.sleep(0.3)
+        self.assertEqual(self.read_aliases(), {"replica"})
+
+    @override_settings(REPLICA_MAX_LAG_SECONDS=5)
+    def test_lagging_replica_is_skipped(self):
+        db_router._replica_lag["replica"] = (time.monotonic(), 30.0)
+        self.assertEqual(self.read_aliases(), {"default"})
+
+    def test_unavailable_replica_is_skipped(self):
+        db_router._replica_lag.clear()
+        with mock.patch.object(connections["replica"], "cursor", side_effect=OperationalError("down")), \
+                self.assertLogs("core.db_router", "WARNING"):
+            self.assertIsNone(db_router.pick_replica())
+        self.assertEqual(db_router._replica_lag["replica"][1], float("inf"))
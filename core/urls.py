@@ -20,6 +20,8 @@ from django.conf.urls.static import static
 from django.conf import settings
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
 
+from trex.assignment.views import UpcomingAssignmentListView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     # path("api/user", include("trex.user.urls")),
@@ -31,6 +33,8 @@ urlpatterns = [
     path("api/users/", include("trex.user.urls")),
     path("api/classrooms/<int:classroom_id>/enrollments/", include("trex.enrollment.urls")),
     path("api/classrooms/<int:classroom_id>/assignments/", include("trex.assignment.urls")),
+    path("api/sync/", include("trex.sync.urls")),
+    path("api/assignments/upcoming/", UpcomingAssignmentListView.as_view(), name="upcoming-assignments"),
 ]
 
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -1,3 +1,8 @@
+import re
+
+from django.urls import URLPattern, URLResolver, get_resolver
+
+
 def response_payload(success: bool, data=None, message=None):
     response = {
         "success": success,
@@ -10,3 +15,22 @@ def response_payload(success: bool, data=None, message=None):
         response['errors'] = data
 
     return response
+
+
+def api_routes(patterns=None, prefix=''):
+    """
+    Yield (url name, url with {kwarg} placeholders, view class) for every class based view under api/.
+    Used by the management commands that exercise every endpoint.
+    """
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            namespace = f'{pattern.namespace}:' if pattern.namespace else ''
+            for name, url, view_class in api_routes(pattern.url_patterns, route):
+                yield namespace + name, url, view_class
+        elif isinstance(pattern, URLPattern) and route.startswith('api/'):
+            view_class = getattr(pattern.callback, 'cls', None)
+            if view_class is not None:
+                yield pattern.name, '/' + re.sub(r'<(?:\w+:)?(\w+)>', r'{\1}', route), view_class
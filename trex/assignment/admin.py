@@ -2,13 +2,15 @@ from datetime import date
 from django import forms
 
 from django.contrib import admin
+
+from core.deferred import DeferUnusedFieldsAdminMixin
 from .models import Assignment
 
 # Register your models here.
 
 
 @admin.register(Assignment)
-class AssignmentAdmin(admin.ModelAdmin):
+class AssignmentAdmin(DeferUnusedFieldsAdminMixin, admin.ModelAdmin):
     list_display = (
         "assignment_id",
         "assignment_name",
@@ -17,6 +19,8 @@ class AssignmentAdmin(admin.ModelAdmin):
         "created_on",
         "due_date",
     )
+    # get_classroom
+    list_select_related = ("classroom",)
 
     def get_classroom(self, obj):
         return obj.classroom.classroom_name
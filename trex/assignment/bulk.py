@@ -0,0 +1,110 @@
+from django.db import transaction
+from django.utils import timezone
+
+from trex.classroom.cache import invalidate_classroom_cache
+from trex.sync.events import assignment_changed
+from .models import Assignment
+from .serializers import AssignmentSerializer
+
+ASSIGNMENT_BULK_MAX_ITEMS = 200
+
+
+class AssignmentBulkWrite:
+    """
+    Create and update many assignments of a classroom at once.
+
+    Items without an assignment_id are created, items with one partially update that assignment,
+    e.g. `{"assignment_id": 3, "status": "published"}` publishes it. Every item is validated like
+    a single create or update through AssignmentSerializer, and nothing is written unless all of them are valid.
+    The assignments to update are read (and locked) in one query, then written with one bulk_create
+    and one bulk_update in a single transaction.
+
+    bulk_create and bulk_update send no signals, so the classroom's cached responses are invalidated
+    and the assignment events published here instead.
+    """
+
+    def __init__(self, classroom_id, items):
+        self.classroom_id = int(classroom_id)
+        self.items = items
+        self.instances = {}
+        self.serializers = []
+        self.errors = []
+
+    def is_valid(self):
+        update_ids = {
+            item['assignment_id'] for item in self.items
+            if isinstance(item, dict) and isinstance(item.get('assignment_id'), int)
+        }
+        if update_ids:
+            # locked in a consistent order, so concurrent bulk writes can not deadlock
+            self.instances = Assignment.objects.select_for_update().filter(
+                classroom_id=self.classroom_id, assignment_id__in=update_ids,
+            ).order_by('assignment_id').in_bulk()
+
+        seen_ids = set()
+        for item in self.items:
+            serializer, errors = None, {}
+            if not isinstance(item, dict):
+                errors = {'non_field_errors': ["Expected an object."]}
+            elif 'assignment_id' in item:
+                assignment_id = item['assignment_id']
+                instance = self.instances.get(assignment_id) if isinstance(assignment_id, int) else None
+                if instance is None:
+                    errors = {'assignment_id': ["Assignment not found."]}
+                elif assignment_id in seen_ids:
+                    errors = {'assignment_id': ["Assignment is updated more than once."]}
+                else:
+                    seen_ids.add(assignment_id)
+                    serializer = AssignmentSerializer(instance, data=item, partial=True)
+            else:
+                serializer = AssignmentSerializer(data=item)
+            if serializer is not None and not serializer.is_valid():
+                errors = serializer.errors
+            self.serializers.append(serializer)
+            self.errors.append(errors)
+        return not any(self.errors)
+
+    def save(self):
+        """
+        Write the items, must run in the transaction is_valid() ran in.
+        Returns the assignments in the order of the items.
+        """
+        now = timezone.now()
+        created, updated, update_fields = [], [], {'updated_at'}
+        assignments = []
+        for serializer in self.serializers:
+            if serializer.instance is None:
+                assignment = Assignment(classroom_id=self.classroom_id, **serializer.validated_data)
+                created.append(assignment)
+            else:
+                assignment = serializer.instance
+                for field, value in serializer.validated_data.items():
+                    setattr(assignment, field, value)
+                # bulk_update skips auto_now
+                assignment.updated_at = now
+                update_fields.update(serializer.validated_data)
+                updated.append(assignment)
+            assignments.append(assignment)
+
+        if created:
+            Assignment.objects.bulk_create(created)
+        if updated:
+            Assignment.objects.bulk_update(updated, sorted(update_fields))
+
+        invalidate_classroom_cache(self.classroom_id)
+        for assignment in created:
+            assignment_changed(assignment, was_published=None)
+        for assignment in updated:
+            assignment_changed(assignment, was_published=assignment._loaded_status == 'published')
+            assignment._loaded_status = assignment.status
+        return assignments
+
+    def run(self):
+        """
+        Validate and write the items in one transaction.
+        Returns (assignments, None) on success, or (None, errors) with one dict of errors per item.
+        """
+        with transaction.atomic():
+            if not self.is_valid():
+                return None, self.errors
+            return self.save(), None
@@ -0,0 +1,55 @@
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+
+from core.events import get_broker
+from trex.assignment.scheduler import PublishScheduler, publish_due_assignments
+
+
+class Command(BaseCommand):
+    help = (
+        "Publish draft assignments when their publish_at comes due. Runs until stopped, sleeping until "
+        "the next publish_at in between, see trex.assignment.scheduler. "
+        "With --once, publishes the drafts that are due and exits, e.g. to run from cron. "
+        "The worker invalidates the cached responses and sends the events of the web processes, "
+        "so it refuses to run with a local memory cache or a broker that only reaches its own process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Publish the due drafts and exit.",
+        )
+        parser.add_argument(
+            "--max-sleep",
+            type=float,
+            default=300,
+            help="Look for due drafts at least this often, in seconds (default: 300).",
+        )
+
+    def handle(self, *args, **options):
+        self.check_shared_services()
+        if options["once"]:
+            published = publish_due_assignments()
+            self.stdout.write(self.style.SUCCESS(f"Published {published} assignment(s)"))
+            return
+
+        scheduler = PublishScheduler(max_sleep=options["max_sleep"])
+        try:
+            scheduler.run(lambda published: self.stdout.write(f"Published {published} assignment(s)"))
+        except KeyboardInterrupt:
+            pass
+
+    @staticmethod
+    def check_shared_services():
+        if isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache):
+            raise CommandError(
+                "The default cache is a local memory cache, the web processes would keep serving the cached "
+                "responses of the classrooms published here. Configure a shared cache in CACHES."
+            )
+        if not get_broker().shared:
+            raise CommandError(
+                "The event broker only reaches this process, clients would not hear of the assignments "
+                "published here. Set EVENT_BROKER to a shared broker, e.g. core.events.PostgresBroker."
+            )
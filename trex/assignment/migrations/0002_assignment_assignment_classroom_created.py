@@ -0,0 +1,18 @@
+# Generated by Django 4.2.6 on 2026-10-18 16:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assignment", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="assignment",
+            index=models.Index(
+                fields=["classroom", "created_on"], name="assignment_classroom_created"
+            ),
+        ),
+    ]
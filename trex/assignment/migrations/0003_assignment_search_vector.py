@@ -0,0 +1,54 @@
+# Generated by Django 4.2.6 on 2026-10-18 16:41
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+ASSIGNMENT_SEARCH_VECTOR_SQL = """
+CREATE FUNCTION assignment_assignment_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.assignment_name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER assignment_assignment_search_vector_trigger
+BEFORE INSERT OR UPDATE OF assignment_name, description ON assignment_assignment
+FOR EACH ROW EXECUTE FUNCTION assignment_assignment_search_vector_update();
+
+UPDATE assignment_assignment SET search_vector =
+    setweight(to_tsvector('english', coalesce(assignment_name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'B');
+"""
+
+ASSIGNMENT_SEARCH_VECTOR_REVERSE_SQL = """
+DROP TRIGGER IF EXISTS assignment_assignment_search_vector_trigger ON assignment_assignment;
+DROP FUNCTION IF EXISTS assignment_assignment_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assignment", "0002_assignment_assignment_classroom_created"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="assignment",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="assignment",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="assignment_search_vector"
+            ),
+        ),
+        migrations.RunSQL(
+            ASSIGNMENT_SEARCH_VECTOR_SQL, ASSIGNMENT_SEARCH_VECTOR_REVERSE_SQL
+        ),
+    ]
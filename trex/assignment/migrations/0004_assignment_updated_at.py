@@ -0,0 +1,26 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:20
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assignment", "0003_assignment_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="assignment",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        # existing assignments were last known to change when they were created
+        migrations.RunSQL(
+            "UPDATE assignment_assignment SET updated_at = created_on",
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assignment", "0004_assignment_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="assignment",
+            index=models.Index(
+                fields=["classroom", "status", "due_date"],
+                name="assignment_classroom_due",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assignment", "0005_assignment_classroom_due"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="assignment",
+            index=models.Index(
+                condition=models.Q(("status", "published")),
+                fields=["classroom", "created_on"],
+                name="assignment_published_created",
+            ),
+        ),
+    ]
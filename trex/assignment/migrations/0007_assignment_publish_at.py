@@ -0,0 +1,49 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:28
+
+from django.db import migrations, models
+
+# Wakes up the publish scheduler when a draft is scheduled, see trex.assignment.scheduler.
+# Notifications with the same payload are delivered once per transaction, so bulk writes notify once.
+ASSIGNMENT_PUBLISH_AT_NOTIFY_SQL = """
+CREATE FUNCTION assignment_assignment_publish_at_notify() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('assignment_publish_at', '');
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER assignment_assignment_publish_at_trigger
+AFTER INSERT OR UPDATE OF publish_at, status ON assignment_assignment
+FOR EACH ROW WHEN (NEW.status = 'draft' AND NEW.publish_at IS NOT NULL)
+EXECUTE FUNCTION assignment_assignment_publish_at_notify();
+"""
+
+ASSIGNMENT_PUBLISH_AT_NOTIFY_REVERSE_SQL = """
+DROP TRIGGER IF EXISTS assignment_assignment_publish_at_trigger ON assignment_assignment;
+DROP FUNCTION IF EXISTS assignment_assignment_publish_at_notify();
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assignment", "0006_assignment_published_created"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="assignment",
+            name="publish_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="assignment",
+            index=models.Index(
+                condition=models.Q(("publish_at__isnull", False), ("status", "draft")),
+                fields=["publish_at"],
+                name="assignment_publish_at",
+            ),
+        ),
+        migrations.RunSQL(
+            ASSIGNMENT_PUBLISH_AT_NOTIFY_SQL, ASSIGNMENT_PUBLISH_AT_NOTIFY_REVERSE_SQL
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:36
+
+from django.db import migrations
+
+# Postgres compresses and moves values out of the row (TOAST) only once a row is over ~2 kB.
+# Lowering the threshold compresses most pasted descriptions at rest and keeps them out of the heap rows,
+# so reads that skip the description (lists, scheduler, sync) touch fewer pages.
+# lz4 decompresses several times faster than the default pglz, it is used if the server was built with it.
+# Existing rows are compressed the next time they are written.
+# Column compression needs PostgreSQL 14, older servers keep pglz. The statements are run with EXECUTE,
+# PL/pgSQL would otherwise fail to parse them on those servers even when they are skipped.
+ASSIGNMENT_DESCRIPTION_COMPRESSION_SQL = """
+ALTER TABLE assignment_assignment SET (toast_tuple_target = 256);
+
+DO $$
+BEGIN
+    IF current_setting('server_version_num')::int >= 140000 THEN
+        EXECUTE 'ALTER TABLE assignment_assignment ALTER COLUMN description SET COMPRESSION lz4';
+    END IF;
+EXCEPTION WHEN feature_not_supported THEN
+    RAISE NOTICE 'lz4 is not available, assignment descriptions are compressed with pglz';
+END
+$$;
+"""
+
+ASSIGNMENT_DESCRIPTION_COMPRESSION_REVERSE_SQL = """
+ALTER TABLE assignment_assignment RESET (toast_tuple_target);
+
+DO $$
+BEGIN
+    IF current_setting('server_version_num')::int >= 140000 THEN
+        EXECUTE 'ALTER TABLE assignment_assignment ALTER COLUMN description SET COMPRESSION DEFAULT';
+    END IF;
+END
+$$;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assignment", "0007_assignment_publish_at"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            ASSIGNMENT_DESCRIPTION_COMPRESSION_SQL,
+            ASSIGNMENT_DESCRIPTION_COMPRESSION_REVERSE_SQL,
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 # Create your models here.
 
@@ -15,13 +17,45 @@ class Assignment(models.Model):
     due_date = models.DateField(blank=True, null=True)
     score = models.IntegerField(blank=True, null=True)
     status = models.CharField(max_length=10, choices=status_choices, default='draft')
+    # Drafts are published at this time by `manage.py publish_scheduled_assignments`, see trex.assignment.scheduler.
+    publish_at = models.DateTimeField(blank=True, null=True)
     classroom = models.ForeignKey('classroom.Classroom', on_delete=models.CASCADE, related_name='assignments')
     created_on = models.DateTimeField(auto_now_add=True)
+    # Validates conditional GETs, see core.conditional.ConditionalGetMixin.
+    updated_at = models.DateTimeField(auto_now=True)
+    # Weighted tsvector of assignment_name and description, maintained by a database trigger.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return self.assignment_name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # the status in the database, publishing is told apart from other updates by it, see trex.sync.signals
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
     class Meta:
         ordering = ('created_on',)
         verbose_name_plural = 'Assignments'
         verbose_name = 'Assignment'
+        indexes = [
+            # keyset pagination of a classroom's assignments
+            models.Index(fields=['classroom', 'created_on'], name='assignment_classroom_created'),
+            # the same for students, who only see published assignments
+            models.Index(
+                fields=['classroom', 'created_on'],
+                condition=models.Q(status='published'),
+                name='assignment_published_created',
+            ),
+            # the upcoming assignments of a student's classrooms, see UpcomingAssignmentListView
+            models.Index(fields=['classroom', 'status', 'due_date'], name='assignment_classroom_due'),
+            # the drafts waiting to be published, see trex.assignment.scheduler
+            models.Index(
+                fields=['publish_at'],
+                condition=models.Q(status='draft', publish_at__isnull=False),
+                name='assignment_publish_at',
+            ),
+            GinIndex(fields=['search_vector'], name='assignment_search_vector'),
+        ]
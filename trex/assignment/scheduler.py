@@ -0,0 +1,130 @@
+import logging
+import select
+import time
+
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from trex.classroom.cache import invalidate_classroom_cache
+from trex.sync.events import assignment_changed
+from .models import Assignment
+
+logger = logging.getLogger(__name__)
+
+# Notified by a trigger whenever a draft is scheduled, see migration 0007_assignment_publish_at.
+PUBLISH_AT_CHANNEL = 'assignment_publish_at'
+
+PUBLISH_DUE_SQL = """
+UPDATE {assignment_table}
+SET status = 'published', publish_at = NULL, updated_at = %(now)s
+WHERE status = 'draft' AND publish_at <= %(now)s
+RETURNING assignment_id, classroom_id
+"""
+
+
+def publish_due_assignments(using='default'):
+    """
+    Publish every draft whose publish_at has passed, in a single UPDATE ... RETURNING statement.
+    Returns the number of assignments published.
+
+    The UPDATE sends no signals, so the cached responses of the affected classrooms are invalidated
+    and the assignment events published here instead.
+    """
+    sql = PUBLISH_DUE_SQL.format(assignment_table=Assignment._meta.db_table)
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(sql, {'now': timezone.now()})
+            rows = cursor.fetchall()
+        if rows:
+            invalidate_classroom_cache(*{classroom_id for _, classroom_id in rows})
+            for assignment_id, classroom_id in rows:
+                assignment = Assignment.from_db(
+                    using, ['assignment_id', 'classroom_id', 'status'], [assignment_id, classroom_id, 'published'],
+                )
+                assignment_changed(assignment, was_published=False)
+    return len(rows)
+
+
+def next_publish_at(using='default'):
+    """
+    The earliest publish_at of the scheduled drafts, or None. Read from the partial index assignment_publish_at.
+    """
+    return Assignment.objects.using(using).filter(
+        status='draft', publish_at__isnull=False,
+    ).aggregate(next_publish_at=Min('publish_at'))['next_publish_at']
+
+
+class PublishScheduler:
+    """
+    Publish scheduled drafts as they come due, sleeping until the next publish_at in between.
+
+    The scheduler LISTENs on PUBLISH_AT_CHANNEL, so a draft scheduled earlier than the one it waits for
+    wakes it up. It never sleeps longer than max_sleep seconds, which bounds the delay should a notification
+    be missed, e.g. while the connection was re-established.
+    When the database goes away (a restart, a failover, an idle connection dropped), the connection is
+    closed and re-established after a delay that doubles up to max_reconnect_delay seconds.
+    Several schedulers can run at once: the UPDATE only publishes each draft once.
+    """
+
+    def __init__(self, max_sleep=300, using='default', max_reconnect_delay=60):
+        self.max_sleep = max_sleep
+        self.using = using
+        self.max_reconnect_delay = max_reconnect_delay
+
+    def listen(self):
+        """
+        LISTEN on the scheduler's connection, again after every reconnection, and return the psycopg connection.
+        """
+        connection = connections[self.using]
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {PUBLISH_AT_CHANNEL}")
+        return connection.connection
+
+    def wait(self, listener, timeout):
+        """
+        Sleep until a draft is scheduled or timeout seconds pass.
+        """
+        # raise a DatabaseError like the cursors do, should the connection have been lost
+        with connections[self.using].wrap_database_errors:
+            readable, _, _ = select.select([listener], [], [], timeout)
+            if readable:
+                listener.poll()
+                listener.notifies.clear()
+
+    def reconnect(self, delay):
+        """
+        Close the broken connection and wait `delay` seconds, the next query opens a new one.
+        """
+        try:
+            connections[self.using].close()
+        except DatabaseError:
+            pass
+        time.sleep(delay)
+
+    def run_once(self):
+        """
+        Publish the due drafts. Returns (number published, seconds to sleep until the next one is due).
+        """
+        published = publish_due_assignments(self.using)
+        publish_at = next_publish_at(self.using)
+        timeout = self.max_sleep
+        if publish_at is not None:
+            timeout = min(max((publish_at - timezone.now()).total_seconds(), 0), self.max_sleep)
+        return published, timeout
+
+    def run(self, published_callback=None):
+        delay = 1
+        while True:
+            try:
+                # listening before looking up the next publish_at, so drafts scheduled in between are not missed
+                listener = self.listen()
+                published, timeout = self.run_once()
+                delay = 1
+                if published and published_callback is not None:
+                    published_callback(published)
+                self.wait(listener, timeout)
+            except DatabaseError:
+                logger.warning("Lost the database connection, reconnecting in %s s", delay, exc_info=True)
+                self.reconnect(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
@@ -1,10 +1,13 @@
 from datetime import date
 
+from django.utils import timezone
 from rest_framework import serializers
+
+from core.serializers import ModelSerializer, ValuesListSerializer
 from .models import Assignment
 
 
-class AssignmentSerializer(serializers.ModelSerializer):
+class AssignmentSerializer(ModelSerializer):
     class Meta:
         model = Assignment
         fields = (
@@ -15,6 +18,7 @@ class AssignmentSerializer(serializers.ModelSerializer):
             ,
             "score",
             "status",
+            "publish_at",
             "created_on",
         )
         read_only_fields = (
@@ -32,30 +36,81 @@ class AssignmentSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Due date cannot be earlier than today.")
         return value
 
+    def validate_publish_at(self, value):
+        if value is not None and value < timezone.now():
+            raise serializers.ValidationError("Publish time cannot be in the past.")
+        return value
+
+    def validate(self, attrs):
+        """
+        Only drafts can be scheduled, and no later than their due date.
+        Publishing a scheduled draft by hand cancels its schedule.
+        """
+        def current(field, default=None):
+            if field in attrs:
+                return attrs[field]
+            return getattr(self.instance, field) if self.instance is not None else default
+
+        status = current('status', 'draft')
+        if status != 'draft' and 'publish_at' not in attrs:
+            attrs['publish_at'] = None
+        publish_at = current('publish_at')
+        if publish_at is not None:
+            if status != 'draft':
+                raise serializers.ValidationError({"publish_at": "Only drafts can be scheduled for publishing."})
+            due_date = current('due_date')
+            if due_date is not None and timezone.localdate(publish_at) > due_date:
+                raise serializers.ValidationError({"publish_at": "Publish time cannot be after the due date."})
+        return attrs
+
+
+class StudentAssignmentListSerializer(ModelSerializer):
+    class Meta:
+        model = Assignment
+        list_serializer_class = ValuesListSerializer
+        fields = (
+            "assignment_id",
+            "assignment_name",
+            "due_date",
+        )
+        read_only_fields = (
+            "assignment_id",
+            "assignment_name",
+            "due_date",
+        )
+
+
+class UpcomingAssignmentListSerializer(ModelSerializer):
+    classroom_name = serializers.CharField(source="classroom.classroom_name", read_only=True)
 
-class StudentAssignmentListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Assignment
+        list_serializer_class = ValuesListSerializer
         fields = (
             "assignment_id",
             "assignment_name",
             "due_date",
+            "classroom_id",
+            "classroom_name",
         )
         read_only_fields = (
             "assignment_id",
             "assignment_name",
             "due_date",
+            "classroom_id",
         )
 
 
-class TeacherAssignmentListSerializer(serializers.ModelSerializer):
+class TeacherAssignmentListSerializer(ModelSerializer):
     class Meta:
         model = Assignment
+        list_serializer_class = ValuesListSerializer
         fields = (
             "assignment_id",
             "assignment_name",
             "due_date",
             "status",
+            "publish_at",
             "created_on",
         )
         read_only_fields = (
@@ -63,11 +118,12 @@ class TeacherAssignmentListSerializer(serializers.ModelSerializer):
             "assignment_name",
             "due_date",
             "status",
+            "publish_at",
             "created_on",
         )
 
 
-class StudentAssignmentDetailSerializer(serializers.ModelSerializer):
+class StudentAssignmentDetailSerializer(ModelSerializer):
     assigned_date = serializers.SerializerMethodField()
 
     def get_assigned_date(self, assignment):
@@ -93,7 +149,7 @@ class StudentAssignmentDetailSerializer(serializers.ModelSerializer):
         )
 
 
-class TeacherAssignmentDetailSerializer(serializers.ModelSerializer):
+class TeacherAssignmentDetailSerializer(ModelSerializer):
     # Note: add submission count in the future
     assigned_date = serializers.SerializerMethodField()
 
@@ -109,6 +165,7 @@ class TeacherAssignmentDetailSerializer(serializers.ModelSerializer):
             "due_date",
             "score",
             "status",
+            "publish_at",
             "assigned_date",
         )
         read_only_fields = (
@@ -118,5 +175,6 @@ class TeacherAssignmentDetailSerializer(serializers.ModelSerializer):
             "due_date",
             "score",
             "status",
+            "publish_at",
             "assigned_date",
         )
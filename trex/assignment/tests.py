@@ -1,3 +1,424 @@
-from django.test import TestCase
+import json
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import OperationalError, connections
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.fields import DateTimeField
+from rest_framework.test import APIClient
+
+from trex.classroom.cache import get_classroom_generation
+from trex.classroom.models import Classroom
+from trex.enrollment.models import Enrollment
+from trex.user.models import User
+from .bulk import ASSIGNMENT_BULK_MAX_ITEMS, AssignmentBulkWrite
+from .models import Assignment
+from .scheduler import PublishScheduler, publish_due_assignments
+from .serializers import AssignmentSerializer
+
+ONLY_DRAFTS = ["Only drafts can be scheduled for publishing."]
+AFTER_DUE_DATE = ["Publish time cannot be after the due date."]
+
+
+class PublishDueAssignmentsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        teacher = User.objects.create_user(username="teacher", password="password", role="teacher")
+        cls.classroom = Classroom.objects.create_with_code(teacher=teacher, classroom_name="Algebra")
+
+    def create(self, **kwargs):
+        return Assignment.objects.create(classroom=self.classroom, assignment_name="Homework", **kwargs)
+
+    def test_publishes_only_due_drafts(self):
+        now = timezone.now()
+        due = self.create(publish_at=now - timedelta(minutes=1))
+        scheduled = self.create(publish_at=now + timedelta(hours=1))
+        unscheduled = self.create()
+        generation = get_classroom_generation(self.classroom.classroom_id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(publish_due_assignments(), 1)
+
+        due.refresh_from_db()
+        self.assertEqual((due.status, due.publish_at), ("published", None))
+        scheduled.refresh_from_db()
+        self.assertEqual((scheduled.status, scheduled.publish_at), ("draft", now + timedelta(hours=1)))
+        unscheduled.refresh_from_db()
+        self.assertEqual(unscheduled.status, "draft")
+        self.assertNotEqual(get_classroom_generation(self.classroom.classroom_id), generation)
+
+    def test_nothing_due(self):
+        self.create(publish_at=timezone.now() + timedelta(hours=1))
+        generation = get_classroom_generation(self.classroom.classroom_id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(publish_due_assignments(), 0)
+        self.assertEqual(get_classroom_generation(self.classroom.classroom_id), generation)
+
+
+class PublishSchedulerTests(SimpleTestCase):
+    def test_reconnects_after_losing_the_database(self):
+        class Stop(Exception):
+            pass
+
+        scheduler = PublishScheduler()
+        published = mock.Mock()
+        run_once = [OperationalError("server closed the connection unexpectedly"), (2, 0)]
+        with mock.patch.object(scheduler, "listen") as listen, \
+                mock.patch.object(scheduler, "run_once", side_effect=run_once), \
+                mock.patch.object(scheduler, "wait", side_effect=Stop), \
+                mock.patch.object(connections["default"], "close") as close, \
+                mock.patch("trex.assignment.scheduler.time.sleep") as sleep, \
+                self.assertLogs("trex.assignment.scheduler", "WARNING"):
+            with self.assertRaises(Stop):
+                scheduler.run(published)
+
+        close.assert_called_once_with()
+        sleep.assert_called_once_with(1)
+        self.assertEqual(listen.call_count, 2)
+        published.assert_called_once_with(2)
+
+
+class AssignmentSerializerPublishAtTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        teacher = User.objects.create_user(username="teacher", password="password", role="teacher")
+        cls.classroom = Classroom.objects.create_with_code(teacher=teacher, classroom_name="Algebra")
+
+    def errors(self, data, instance=None):
+        serializer = AssignmentSerializer(instance, data=data, partial=instance is not None)
+        serializer.is_valid()
+        return serializer.errors.get("publish_at")
+
+    def test_schedules_a_draft(self):
+        tomorrow = timezone.now() + timedelta(days=1)
+        self.assertIsNone(self.errors({"assignment_name": "Homework", "publish_at": tomorrow}))
+        self.assertIsNone(self.errors({
+            "assignment_name": "Homework",
+            "publish_at": tomorrow,
+            "due_date": timezone.localdate(tomorrow),
+        }))
+
+    def test_rejects_past_publish_at(self):
+        self.assertEqual(
+            self.errors({"assignment_name": "Homework", "publish_at": timezone.now() - timedelta(minutes=1)}),
+            ["Publish time cannot be in the past."],
+        )
+
+    def test_rejects_scheduling_a_published_assignment(self):
+        tomorrow = timezone.now() + timedelta(days=1)
+        self.assertEqual(
+            self.errors({"assignment_name": "Homework", "status": "published", "publish_at": tomorrow}),
+            ONLY_DRAFTS,
+        )
+        assignment = Assignment.objects.create(
+            classroom=self.classroom, assignment_name="Homework", status="published",
+        )
+        self.assertEqual(self.errors({"publish_at": tomorrow}, assignment), ONLY_DRAFTS)
+
+    def test_rejects_publish_at_after_due_date(self):
+        in_two_days = timezone.now() + timedelta(days=2)
+        due_date = timezone.localdate() + timedelta(days=1)
+        self.assertEqual(
+            self.errors({"assignment_name": "Homework", "publish_at": in_two_days, "due_date": due_date}),
+            AFTER_DUE_DATE,
+        )
+        # the due date of the assignment counts when only publish_at is updated, and the other way round
+        assignment = Assignment.objects.create(classroom=self.classroom, assignment_name="Homework", due_date=due_date)
+        self.assertEqual(self.errors({"publish_at": in_two_days}, assignment), AFTER_DUE_DATE)
+        assignment = Assignment.objects.create(
+            classroom=self.classroom, assignment_name="Homework", publish_at=in_two_days,
+        )
+        self.assertEqual(self.errors({"due_date": due_date}, assignment), AFTER_DUE_DATE)
+
+    def test_publishing_by_hand_clears_the_schedule(self):
+        assignment = Assignment.objects.create(
+            classroom=self.classroom, assignment_name="Homework", publish_at=timezone.now() + timedelta(days=1),
+        )
+        serializer = AssignmentSerializer(assignment, data={"status": "published"}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertIsNone(serializer.validated_data["publish_at"])
+
+
+class AssignmentBulkTests(TestCase):
+    databases = {"default", "replica"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username="teacher", password="password", role="teacher")
+        cls.classroom = Classroom.objects.create_with_code(teacher=cls.teacher, classroom_name="Algebra")
+        other_classroom = Classroom.objects.create_with_code(teacher=cls.teacher, classroom_name="Geometry")
+        cls.other_assignment = Assignment.objects.create(classroom=other_classroom, assignment_name="Proofs")
+        cls.draft = Assignment.objects.create(classroom=cls.classroom, assignment_name="Homework")
+        cls.published = Assignment.objects.create(
+            classroom=cls.classroom, assignment_name="Quiz", status="published",
+        )
+        cls.student = User.objects.create_user(username="student", password="password", role="student")
+        Enrollment.objects.create(classroom=cls.classroom, student=cls.student)
+        cls.url = f"/api/classrooms/{cls.classroom.classroom_id}/assignments/bulk/"
+
+    def setUp(self):
+        # cached responses outlive the rolled back changes of the previous test
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def bulk(self, items):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, items, format="json")
+
+    def student_assignment_names(self):
+        client = APIClient()
+        client.force_authenticate(self.student)
+        response = client.get(f"/api/classrooms/{self.classroom.classroom_id}/assignments/")
+        self.assertEqual(response.status_code, 200)
+        return [assignment["assignment_name"] for assignment in response.json().get("data", [])]
+
+    def test_create_update_and_publish(self):
+        self.assertEqual(self.student_assignment_names(), ["Quiz"])
+
+        response = self.bulk([
+            {"assignment_name": "Essay", "score": 10},
+            {"assignment_id": self.draft.assignment_id, "status": "published"},
+            {"assignment_id": self.published.assignment_id, "assignment_name": "Final quiz"},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        created = Assignment.objects.get(classroom=self.classroom, assignment_name="Essay")
+        self.assertEqual(
+            [(item["assignment_id"], item["assignment_name"], item["status"]) for item in data],
+            [
+                (created.assignment_id, "Essay", "draft"),
+                (self.draft.assignment_id, "Homework", "published"),
+                (self.published.assignment_id, "Final quiz", "published"),
+            ],
+        )
+        self.assertEqual(created.score, 10)
+        self.draft.refresh_from_db()
+        self.assertEqual(self.draft.status, "published")
+        self.assertGreater(self.draft.updated_at, self.draft.created_on)
+        self.published.refresh_from_db()
+        self.assertEqual(self.published.assignment_name, "Final quiz")
+        # the cached list of the students was dropped
+        self.assertEqual(self.student_assignment_names(), ["Homework", "Final quiz"])
+
+    def test_errors_per_item(self):
+        generation = get_classroom_generation(self.classroom.classroom_id)
+        response = self.bulk([
+            {"assignment_name": "Essay"},
+            {"assignment_id": 0, "status": "published"},
+            {"assignment_id": self.other_assignment.assignment_id, "status": "published"},
+            {"assignment_id": self.draft.assignment_id, "score": 101},
+            {"assignment_name": ""},
+            "Homework",
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()["errors"]
+        self.assertEqual(errors[:4], [
+            {},
+            {"assignment_id": ["Assignment not found."]},
+            {"assignment_id": ["Assignment not found."]},
+            {"score": ["Score cannot be negative or greater than 100."]},
+        ])
+        self.assertIn("assignment_name", errors[4])
+        self.assertEqual(errors[5], {"non_field_errors": ["Expected an object."]})
+
+        # nothing is saved when any item is invalid
+        self.assertFalse(Assignment.objects.filter(assignment_name="Essay").exists())
+        self.other_assignment.refresh_from_db()
+        self.assertEqual(self.other_assignment.status, "draft")
+        self.assertEqual(get_classroom_generation(self.classroom.classroom_id), generation)
+
+    def test_updating_an_assignment_twice(self):
+        response = self.bulk([
+            {"assignment_id": self.draft.assignment_id, "status": "published"},
+            {"assignment_id": self.draft.assignment_id, "assignment_name": "Renamed"},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"], [
+            {},
+            {"assignment_id": ["Assignment is updated more than once."]},
+        ])
+        self.draft.refresh_from_db()
+        self.assertEqual((self.draft.assignment_name, self.draft.status), ("Homework", "draft"))
+
+    def test_failed_write_saves_nothing(self):
+        items = [
+            {"assignment_name": "Essay"},
+            {"assignment_id": self.draft.assignment_id, "status": "published"},
+        ]
+        with mock.patch.object(Assignment.objects, "bulk_update", side_effect=OperationalError("lost")), \
+                self.assertRaises(OperationalError):
+            AssignmentBulkWrite(self.classroom.classroom_id, items).run()
+        self.assertFalse(Assignment.objects.filter(assignment_name="Essay").exists())
+        self.draft.refresh_from_db()
+        self.assertEqual(self.draft.status, "draft")
+
+    def test_item_count(self):
+        item = {"assignment_name": "Essay"}
+        for items in (item, [], [item] * (ASSIGNMENT_BULK_MAX_ITEMS + 1)):
+            self.assertEqual(self.bulk(items).status_code, 400)
+        self.assertFalse(Assignment.objects.filter(assignment_name="Essay").exists())
+
+    def test_only_the_teacher_of_the_classroom(self):
+        self.client.force_authenticate(self.student)
+        self.assertEqual(self.bulk([{"assignment_name": "Essay"}]).status_code, 403)
+
+
+class AssignmentExportTests(TestCase):
+    databases = {"default", "replica"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username="teacher", password="password", role="teacher")
+        cls.classroom = Classroom.objects.create_with_code(teacher=cls.teacher, classroom_name="Algebra")
+        cls.homework = Assignment.objects.create(
+            classroom=cls.classroom, assignment_name="Homework, part 1", due_date=date(2030, 1, 31), score=10,
+        )
+        cls.quiz = Assignment.objects.create(classroom=cls.classroom, assignment_name="Quiz", status="published")
+        cls.url = f"/api/classrooms/{cls.classroom.classroom_id}/assignments/export/"
+
+    def export(self, user=None, params=None):
+        client = APIClient()
+        client.force_authenticate(user or self.teacher)
+        return client.get(self.url, params)
+
+    @staticmethod
+    def created_on(assignment):
+        return DateTimeField().to_representation(assignment.created_on)
+
+    def test_csv(self):
+        response = self.export()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertEqual(
+            response["Content-Disposition"],
+            f'attachment; filename="classroom-{self.classroom.classroom_id}-assignments.csv"',
+        )
+        self.assertEqual(b"".join(response.streaming_content).decode(), (
+            "assignment_id,assignment_name,status,due_date,score,created_on\r\n"
+            f'{self.homework.pk},"Homework, part 1",draft,2030-01-31,10,{self.created_on(self.homework)}\r\n'
+            f"{self.quiz.pk},Quiz,published,,,{self.created_on(self.quiz)}\r\n"
+        ))
+
+    def test_ndjson(self):
+        response = self.export(params={"format": "ndjson"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [
+            {
+                "assignment_id": self.homework.pk, "assignment_name": "Homework, part 1", "status": "draft",
+                "due_date": "2030-01-31", "score": 10, "created_on": self.created_on(self.homework),
+            },
+            {
+                "assignment_id": self.quiz.pk, "assignment_name": "Quiz", "status": "published",
+                "due_date": None, "score": None, "created_on": self.created_on(self.quiz),
+            },
+        ])
+
+    def test_unknown_format(self):
+        self.assertEqual(self.export(params={"format": "xlsx"}).status_code, 404)
+
+    def test_students_can_not_export(self):
+        student = User.objects.create_user(username="student", password="password", role="student")
+        Enrollment.objects.create(classroom=self.classroom, student=student)
+        response = self.export(student)
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(response.json()["success"])
+
+
+class UpcomingAssignmentListTests(TestCase):
+    databases = {"default", "replica"}
+    url = "/api/assignments/upcoming/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username="teacher", password="password", role="teacher")
+        cls.student = User.objects.create_user(username="student", password="password", role="student")
+        cls.algebra, cls.biology, cls.chemistry = (
+            Classroom.objects.create_with_code(teacher=cls.teacher, classroom_name=name)
+            for name in ("Algebra", "Biology", "Chemistry")
+        )
+        for classroom in (cls.algebra, cls.biology):
+            Enrollment.objects.enroll(cls.student, classroom.classroom_code)
+
+        today = timezone.localdate()
+        cls.upcoming = [
+            cls.create(cls.biology, "Lab report", today + timedelta(days=2)),
+            cls.create(cls.algebra, "Homework", today),
+            cls.create(cls.algebra, "Quiz", today + timedelta(days=2)),
+            cls.create(cls.biology, "Essay", today + timedelta(days=1)),
+            cls.create(cls.algebra, "Exam", today + timedelta(days=2)),
+        ]
+        cls.create(cls.algebra, "Draft", today + timedelta(days=1), status="draft")
+        cls.create(cls.algebra, "Past due", today - timedelta(days=1))
+        cls.create(cls.algebra, "No due date", None)
+        cls.create(cls.chemistry, "Not enrolled", today + timedelta(days=1))
+
+    @staticmethod
+    def create(classroom, assignment_name, due_date, status="published"):
+        return Assignment.objects.create(
+            classroom=classroom, assignment_name=assignment_name, due_date=due_date, status=status,
+        )
+
+    def setUp(self):
+        # cached responses outlive the rolled back changes of the previous test
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def feed(self, **params):
+        """
+        Follow the next links and return the assignments of every page.
+        """
+        pages = []
+        response = self.client.get(self.url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            payload = response.json()
+            pages.append(payload["data"])
+            if not payload["next"]:
+                return pages
+            response = self.client.get(payload["next"])
+
+    def test_published_assignments_due_soonest_first(self):
+        expected = sorted(self.upcoming, key=lambda assignment: (assignment.due_date, assignment.assignment_id))
+        for page_size in (2, 50):
+            with self.subTest(page_size=page_size):
+                pages = self.feed(page_size=page_size)
+                self.assertTrue(all(len(page) == page_size for page in pages[:-1]))
+                self.assertEqual(
+                    [assignment["assignment_id"] for page in pages for assignment in page],
+                    [assignment.assignment_id for assignment in expected],
+                )
+        self.assertEqual(pages[0][0], {
+            "assignment_id": self.upcoming[1].assignment_id,
+            "assignment_name": "Homework",
+            "due_date": timezone.localdate().isoformat(),
+            "classroom_id": self.algebra.classroom_id,
+            "classroom_name": "Algebra",
+        })
+
+    def test_only_students(self):
+        self.client.force_authenticate(self.teacher)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_enrolling_refreshes_the_feed(self):
+        names = [assignment["assignment_name"] for assignment in self.feed()[0]]
+        self.assertNotIn("Not enrolled", names)
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.enroll(self.student, self.chemistry.classroom_code)
+        names = [assignment["assignment_name"] for assignment in self.feed()[0]]
+        self.assertIn("Not enrolled", names)
+
+    def test_publishing_refreshes_the_feed(self):
+        self.assertEqual(len(self.feed()[0]), len(self.upcoming))
+        draft = Assignment.objects.get(assignment_name="Draft")
+        draft.status = "published"
+        with self.captureOnCommitCallbacks(execute=True):
+            draft.save()
+        self.assertEqual(len(self.feed()[0]), len(self.upcoming) + 1)
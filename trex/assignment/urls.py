@@ -2,9 +2,11 @@ from django.urls import path, include
 from .views import (
     AssignmentListView,
     AssignmentCreateView,
+    AssignmentBulkView,
     AssignmentDetailView,
     AssignmentUpdateView,
     AssignmentDeleteView,
+    AssignmentExportView,
 )
 
 app_name = "assignment"
@@ -12,6 +14,8 @@ app_name = "assignment"
 urlpatterns = [
     path('', AssignmentListView.as_view(), name='list'),
     path('create/', AssignmentCreateView.as_view(), name='create'),
+    path('bulk/', AssignmentBulkView.as_view(), name='bulk'),
+    path('export/', AssignmentExportView.as_view(), name='export'),
     path('<int:assignment_id>/', AssignmentDetailView.as_view(), name='detail'),
     path('<int:assignment_id>/update/', AssignmentUpdateView.as_view(), name='update'),
     path('<int:assignment_id>/delete/', AssignmentDeleteView.as_view(), name='delete'),
@@ -1,6 +1,9 @@
+import hashlib
+
 from django.http import Http404
+from django.utils import timezone
 
-from rest_framework import status
+from rest_framework import serializers, status
 from rest_framework.response import Response
 from rest_framework.generics import (
     ListAPIView,
@@ -10,21 +13,21 @@ from rest_framework.generics import (
     DestroyAPIView,
 )
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.filters import (
-    SearchFilter,
-    OrderingFilter,
-)
 
 from drf_spectacular.utils import extend_schema
 
+from .bulk import ASSIGNMENT_BULK_MAX_ITEMS, AssignmentBulkWrite
 from .models import Assignment
 from .serializers import (
     AssignmentSerializer,
     StudentAssignmentListSerializer,
     TeacherAssignmentListSerializer,
+    UpcomingAssignmentListSerializer,
     StudentAssignmentDetailSerializer,
     TeacherAssignmentDetailSerializer,
 )
+from trex.classroom.cache import ClassroomResponseCacheMixin, get_classroom_generations
+from trex.user.membership import get_membership
 from trex.user.permissions import (
     IsTeacher,
     IsAdmin,
@@ -32,11 +35,31 @@ from trex.user.permissions import (
     IsStudent,
     IsStudentOfThisClassroom,
 )
+from core.conditional import ConditionalGetMixin
+from core.deferred import DeferUnusedFieldsMixin
+from core.export import EXPORT_CHUNK_SIZE, ExportAPIView
+from core.filters import FullTextSearchFilter, SearchRankOrderingFilter
+from core.pagination import CursorPagination
 from core.utils import response_payload
 
 
+class AssignmentResponseCacheMixin(ClassroomResponseCacheMixin):
+    """
+    Cache an assignment view's responses in one variant for the classroom's teacher and admins,
+    who see every assignment, and one for its students, who only see the published ones.
+    """
+
+    def get_cache_variant(self):
+        user = self.request.user
+        if user.role == "teacher" or user.is_superuser:
+            return "teacher"
+        elif user.role == "student":
+            return "student"
+        return None
+
+
 @extend_schema(tags=["Assignments"])
-class AssignmentListView(ListAPIView):
+class AssignmentListView(AssignmentResponseCacheMixin, ConditionalGetMixin, ListAPIView):
     """
     List all assignments of a classroom.
     User must be authenticated.
@@ -46,13 +69,18 @@ class AssignmentListView(ListAPIView):
 
     Searching is allowed on ...
     Ordering is allowed on ...
+    Search results are ordered by relevance unless an ordering is requested.
+    Results are cursor paginated on created_on, use the `next` and `previous` links to fetch other pages.
+    Responses are cached, see trex.classroom.cache.ClassroomResponseCacheMixin.
+    Supports conditional requests (ETag / Last-Modified), see core.conditional.ConditionalGetMixin.
     """
 
     permission_classes = [IsAuthenticated & (IsTeacherOfThisClassroom | IsStudentOfThisClassroom | IsAdmin), ]
+    pagination_class = CursorPagination
 
     filter_backends = [
-        SearchFilter,
-        OrderingFilter,
+        FullTextSearchFilter,
+        SearchRankOrderingFilter,
     ]
 
     search_fields = [
@@ -60,6 +88,10 @@ class AssignmentListView(ListAPIView):
         "description",
     ]
 
+    # see core.filters.FullTextSearchFilter, set to False to fall back to icontains search on search_fields
+    full_text_search = True
+    search_vector_field = "search_vector"
+
     ordering_fields = [
         "assignment_name",
         "due_date",
@@ -68,6 +100,11 @@ class AssignmentListView(ListAPIView):
         "created_on",
     ]
 
+    ordering = "created_on"
+
+    # every student of the classroom opens it when class starts
+    response_cache_single_flight = True
+
     def get_queryset(self):
         classroom_id = self.kwargs.get("classroom_id")
         user = self.request.user
@@ -90,27 +127,97 @@ class AssignmentListView(ListAPIView):
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
+        # fetch only the serialized columns as dicts, see core.serializers.ValuesListSerializer
+        queryset = self.get_serializer(many=True).get_values_queryset(queryset)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
 
         if len(serializer.data) == 0:
-            return Response(
+            return self.get_paginated_response(
                 response_payload(
                     success=True,
                     message="No assignments found",
-                ),
-                status=status.HTTP_200_OK,
+                )
             )
         else:
-            return Response(
+            return self.get_paginated_response(
                 response_payload(
                     success=True,
                     message="Assignments fetched successfully",
                     data=serializer.data,
-                ),
-                status=status.HTTP_200_OK,
+                )
             )
 
 
+class UpcomingAssignmentPagination(CursorPagination):
+    # assignment_id breaks ties between assignments due the same day
+    ordering = ("due_date", "assignment_id")
+
+
+@extend_schema(tags=["Assignments"])
+class UpcomingAssignmentListView(ClassroomResponseCacheMixin, ListAPIView):
+    """
+    List the published assignments due today or later in all classrooms the student has joined,
+    soonest first, with the classroom they belong to.
+    User must be authenticated and a student.
+
+    Results are cursor paginated on due_date, use the `next` and `previous` links to fetch other pages.
+    Responses are cached per student for a few minutes, and are rebuilt as soon as
+    one of the student's classrooms changes, see get_response_cache_key.
+    """
+
+    permission_classes = [IsAuthenticated & IsStudent, ]
+    pagination_class = UpcomingAssignmentPagination
+    serializer_class = UpcomingAssignmentListSerializer
+    # one entry per student, only reused while they page through or reload their home screen
+    response_cache_timeout = 5 * 60
+
+    def get_cache_variant(self):
+        return f"student:{self.request.user.pk}"
+
+    def get_response_cache_key(self):
+        """
+        Keyed by the generations of all of the student's classrooms and by today's date,
+        which decides what is upcoming.
+        """
+        generations = get_classroom_generations(get_membership(self.request).student_ids)
+        query_params = sorted(self.request.query_params.lists())
+        request_hash = hashlib.sha256(
+            f"{sorted(generations.items())}:{timezone.localdate()}:"
+            f"{self.request.get_host()}{self.request.path}?{query_params}".encode()
+        ).hexdigest()
+        return f"upcoming-assignments:v2:{self.get_cache_variant()}:{request_hash}"
+
+    def get_queryset(self):
+        # the membership ids stand in for a join with the student's enrollments
+        return Assignment.objects.filter(
+            classroom_id__in=get_membership(self.request).student_ids,
+            status="published",
+            due_date__gte=timezone.localdate(),
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_serializer(many=True).get_values_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+
+        if len(serializer.data) == 0:
+            return self.get_paginated_response(
+                response_payload(
+                    success=True,
+                    message="No upcoming assignments",
+                    data=serializer.data,
+                )
+            )
+        return self.get_paginated_response(
+            response_payload(
+                success=True,
+                message="Upcoming assignments fetched successfully",
+                data=serializer.data,
+            )
+        )
+
+
 @extend_schema(tags=["Assignments"])
 class AssignmentCreateView(CreateAPIView):
     """
@@ -145,12 +252,58 @@ class AssignmentCreateView(CreateAPIView):
             )
 
 
+@extend_schema(tags=["Assignments"], request=AssignmentSerializer(many=True))
+class AssignmentBulkView(CreateAPIView):
+    """
+    Create, update and publish many assignments of a classroom in one request.
+    User must be authenticated and teacher of the classroom or admin.
+
+    Send a list of up to 200 assignments. Items without an assignment_id create an assignment,
+    items with one update the given fields of that assignment, e.g. `{"assignment_id": 3, "status": "published"}`.
+    Either every item is saved, or none is and `errors` lists the errors of each item, in the order of the items.
+    """
+    permission_classes = [IsAuthenticated & (IsTeacherOfThisClassroom | IsAdmin), ]
+    serializer_class = AssignmentSerializer
+
+    def create(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list) or not 0 < len(items) <= ASSIGNMENT_BULK_MAX_ITEMS:
+            return Response(
+                response_payload(
+                    success=False,
+                    message=f"Expected a list of 1 to {ASSIGNMENT_BULK_MAX_ITEMS} assignments",
+                ),
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        assignments, errors = AssignmentBulkWrite(self.kwargs.get("classroom_id"), items).run()
+        if errors is not None:
+            return Response(
+                response_payload(
+                    success=False,
+                    message="Assignments could not be saved",
+                    data=errors,
+                ),
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(
+            response_payload(
+                success=True,
+                message="Assignments saved successfully",
+                data=AssignmentSerializer(assignments, many=True).data,
+            ),
+            status=status.HTTP_200_OK,
+        )
+
+
 @extend_schema(tags=["Assignments"])
-class AssignmentDetailView(RetrieveAPIView):
+class AssignmentDetailView(AssignmentResponseCacheMixin, ConditionalGetMixin, DeferUnusedFieldsMixin, RetrieveAPIView):
     """
     Retrieve an assignment.
     User must be authenticated to view the assignment.
     Only teachers or students of the classroom can view the assignment.
+    Responses are cached, see trex.classroom.cache.ClassroomResponseCacheMixin.
+    Supports conditional requests (ETag / Last-Modified), see core.conditional.ConditionalGetMixin.
     """
 
     permission_classes = [IsAuthenticated & (IsTeacherOfThisClassroom | IsStudentOfThisClassroom | IsAdmin), ]
@@ -199,7 +352,7 @@ class AssignmentDetailView(RetrieveAPIView):
             )
 
 @extend_schema(tags=["Assignments"])
-class AssignmentUpdateView(UpdateAPIView):
+class AssignmentUpdateView(DeferUnusedFieldsMixin, UpdateAPIView):
     """
     Update an assignment.
     User must be authenticated and teacher of the classroom or admin.
@@ -215,10 +368,8 @@ class AssignmentUpdateView(UpdateAPIView):
         return queryset
 
     def update(self, request, *args, **kwargs):
-        classroom_id = self.kwargs.get("classroom_id")
-        assignment_id = self.kwargs.get("assignment_id")
         try:
-            instance = Assignment.objects.get(classroom_id=classroom_id, assignment_id=assignment_id)
+            instance = self.get_object()
             serializer = self.get_serializer(instance, data=request.data, partial=True)
             if serializer.is_valid():
                 serializer.save()
@@ -284,3 +435,42 @@ class AssignmentDeleteView(DestroyAPIView):
             ),
             status=status.HTTP_200_OK,
         )
+
+
+@extend_schema(tags=["Assignments"])
+class AssignmentExportView(ExportAPIView):
+    """
+    Export all assignments of a classroom.
+    User must be authenticated and teacher of the classroom or admin.
+    Returns CSV by default, or NDJSON with ?format=ndjson. The rows are streamed.
+    """
+
+    permission_classes = [IsAuthenticated & (IsTeacherOfThisClassroom | IsAdmin), ]
+    export_header = ("assignment_id", "assignment_name", "status", "due_date", "score", "created_on")
+
+    def get_export_filename(self):
+        return f"classroom-{self.kwargs['classroom_id']}-assignments"
+
+    def get_export_rows(self):
+        assignments = Assignment.objects.filter(
+            classroom_id=self.kwargs.get("classroom_id"),
+        ).order_by("created_on").values_list(
+            "assignment_id",
+            "assignment_name",
+            "status",
+            "due_date",
+            "score",
+            "created_on",
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+        due_date_field = serializers.DateField()
+        created_on_field = serializers.DateTimeField()
+        for assignment_id, assignment_name, status_, due_date, score, created_on in assignments:
+            yield (
+                assignment_id,
+                assignment_name,
+                status_,
+                due_date_field.to_representation(due_date) if due_date else None,
+                score,
+                created_on_field.to_representation(created_on),
+            )
@@ -1,16 +1,19 @@
 from django.contrib import admin
+
+from core.deferred import DeferUnusedFieldsAdminMixin
 from .models import Classroom
 
 # Register your models here.
 
 
 @admin.register(Classroom)
-class ClassroomAdmin(admin.ModelAdmin):
+class ClassroomAdmin(DeferUnusedFieldsAdminMixin, admin.ModelAdmin):
     list_display = (
         "classroom_id",
         "classroom_name",
         "description",
         "classroom_code",
         "teacher_id",
+        "student_count",
         "created_on",
     )
@@ -0,0 +1,194 @@
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from core.db_router import read_from_primary
+
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+# how long concurrent requests wait for the one computing a response, and how often other processes check
+RESPONSE_LOCK_TIMEOUT = 10
+RESPONSE_LOCK_POLL_INTERVAL = 0.05
+
+# key -> [lock, number of threads using it], the entries are removed once no thread uses them
+_process_locks = {}
+_process_locks_guard = threading.Lock()
+
+
+def _generation_key(classroom_id):
+    return f"classroom-generation:{classroom_id}"
+
+
+def get_classroom_generation(classroom_id):
+    """
+    Return the current generation of a classroom, which is part of the key of every response cached for it.
+    """
+    key = _generation_key(classroom_id)
+    generation = cache.get(key)
+    if generation is None:
+        # a fresh generation, so responses cached before an invalidation can never be picked up again
+        cache.add(key, time.time_ns(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def get_classroom_generations(classroom_ids):
+    """
+    Return {classroom id: generation} for several classrooms, with one cache round trip once they are all set.
+    """
+    keys = {_generation_key(classroom_id): classroom_id for classroom_id in classroom_ids}
+    generations = cache.get_many(keys)
+    return {
+        classroom_id: generations[key] if key in generations else get_classroom_generation(classroom_id)
+        for key, classroom_id in keys.items()
+    }
+
+
+def invalidate_classroom_cache(*classroom_ids):
+    """
+    Drop the generation of the given classrooms, so all their cached responses are unreachable.
+    Deferred until the current transaction commits, so a concurrent request
+    cannot cache the old data under the new generation.
+    """
+    keys = [_generation_key(classroom_id) for classroom_id in classroom_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+@contextmanager
+def _process_lock(key):
+    """
+    Hold the lock for key within this process, or give up after RESPONSE_LOCK_TIMEOUT seconds.
+    """
+    with _process_locks_guard:
+        entry = _process_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    lock = entry[0]
+    acquired = lock.acquire(timeout=RESPONSE_LOCK_TIMEOUT)
+    try:
+        yield
+    finally:
+        if acquired:
+            lock.release()
+        with _process_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _process_locks[key]
+
+
+@contextmanager
+def single_flight(key):
+    """
+    Coalesce concurrent computations of the cache entry key.
+
+    Yields the entry if another request stored it in the meantime. Otherwise yields None and holds the lock
+    until the block exits, and the caller computes and stores the entry.
+    Threads of one process wait on a lock, one of them at a time also waits for the lock key in the cache,
+    which coalesces the processes sharing the cache. The lock key expires after RESPONSE_LOCK_TIMEOUT seconds
+    in case its holder died, and waiters compute the entry themselves after waiting that long.
+    """
+    with _process_lock(key):
+        cached = cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        lock_key = f"{key}:lock"
+        deadline = time.monotonic() + RESPONSE_LOCK_TIMEOUT
+        acquired = cache.add(lock_key, True, timeout=RESPONSE_LOCK_TIMEOUT)
+        while not acquired and time.monotonic() < deadline:
+            time.sleep(RESPONSE_LOCK_POLL_INTERVAL)
+            cached = cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+            acquired = cache.add(lock_key, True, timeout=RESPONSE_LOCK_TIMEOUT)
+
+        try:
+            yield None
+        finally:
+            if acquired:
+                cache.delete(lock_key)
+
+
+class ClassroomResponseCacheMixin:
+    """
+    Cache the successful GET responses of a view below /api/classrooms/<classroom_id>/.
+
+    Responses are keyed by the classroom's generation, the view's cache variant, the host and the full path
+    with its query parameters. Changes to the classroom, its enrollments or its assignments drop the generation
+    (see trex.classroom.signals), so a cached response is never served after the data it was built from changed.
+
+    The response data is cached, not the rendered bytes, so content negotiation keeps working.
+    Entries are built from the primary database, see core.db_router.read_from_primary.
+    The cache is read after the permission checks, and views implement get_cache_variant to return
+    a string that identifies everyone who gets the same data, or None to not use the cache for a request.
+    Views can share one entry between users whose responses only differ in a few fields,
+    and fill those in per request with personalize_response_data.
+
+    Views with response_cache_single_flight set compute a missing entry once, concurrent requests
+    for the same entry wait for it instead of running the same queries, see single_flight.
+
+    Put before core.conditional.ConditionalGetMixin in the view's bases, the aggregate its validators
+    are built from is then cached with the response, and cache hits answer conditional requests without a query.
+    """
+
+    response_cache_timeout = RESPONSE_CACHE_TIMEOUT
+    response_cache_single_flight = False
+
+    def get_cache_variant(self):
+        raise NotImplementedError
+
+    def personalize_response_data(self, data):
+        """
+        Return the data of a cached response with the requesting user's fields filled in.
+        Must not modify data, which is shared with other requests.
+        """
+        return data
+
+    def get_response_cache_key(self):
+        variant = self.get_cache_variant()
+        if variant is None:
+            return None
+        classroom_id = self.kwargs['classroom_id']
+        generation = get_classroom_generation(classroom_id)
+        query_params = sorted(self.request.query_params.lists())
+        request_hash = hashlib.sha256(
+            f"{self.request.get_host()}{self.request.path}?{query_params}".encode()
+        ).hexdigest()
+        return f"classroom-response:v2:{classroom_id}:{generation}:{variant}:{request_hash}"
+
+    def get(self, request, *args, **kwargs):
+        key = self.get_response_cache_key()
+        if key is None:
+            return super().get(request, *args, **kwargs)
+
+        cached = cache.get(key)
+        if cached is None and self.response_cache_single_flight:
+            with single_flight(key) as cached:
+                if cached is None:
+                    return self.get_and_cache_response(key, request, *args, **kwargs)
+        elif cached is None:
+            return self.get_and_cache_response(key, request, *args, **kwargs)
+
+        data, status, modification = cached
+
+        def get_response():
+            return Response(self.personalize_response_data(data), status=status)
+
+        # the validators of core.conditional.ConditionalGetMixin, from when the entry was built
+        if modification is not None:
+            return self.conditional_get(modification, get_response)
+        return get_response()
+
+    def get_and_cache_response(self, key, request, *args, **kwargs):
+        # built from the primary, a lagging replica's rows would be cached under the new generation
+        with read_from_primary():
+            response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            entry = (response.data, response.status_code, getattr(self, 'modification', None))
+            cache.set(key, entry, timeout=self.response_cache_timeout)
+        return response
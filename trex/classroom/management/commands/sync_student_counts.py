@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from trex.classroom.cache import invalidate_classroom_cache
+from trex.classroom.models import Classroom
+from trex.enrollment.models import Enrollment
+
+
+class Command(BaseCommand):
+    help = "Find classrooms whose student_count has drifted from their enrollments and fix them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drifted classrooms, do not update them.",
+        )
+
+    def handle(self, *args, **options):
+        enrollment_count = (
+            Enrollment.objects.filter(classroom_id=OuterRef("classroom_id"))
+            .order_by()
+            .values("classroom_id")
+            .annotate(count=Count("enrollment_id"))
+            .values("count")
+        )
+        actual_count = Coalesce(Subquery(enrollment_count), 0)
+
+        with transaction.atomic():
+            drifted = (
+                Classroom.objects.select_for_update()
+                .annotate(actual_count=actual_count)
+                .exclude(student_count=F("actual_count"))
+                .values_list("classroom_id", "student_count", "actual_count")
+            )
+            drifted = list(drifted)
+            for classroom_id, stored, actual in drifted:
+                self.stdout.write(f"Classroom {classroom_id}: student_count={stored}, enrollments={actual}")
+
+            if drifted and not options["dry_run"]:
+                Classroom.objects.filter(
+                    classroom_id__in=[classroom_id for classroom_id, _, _ in drifted]
+                ).update(student_count=actual_count, updated_at=timezone.now())
+                # update() sends no post_save signals
+                invalidate_classroom_cache(*[classroom_id for classroom_id, _, _ in drifted])
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All student counts are in sync"))
+        elif options["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"{len(drifted)} classroom(s) out of sync"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Fixed {len(drifted)} classroom(s)"))
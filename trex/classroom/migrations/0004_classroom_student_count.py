@@ -0,0 +1,34 @@
+# Generated by Django 4.2.6 on 2026-10-18 16:38
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_student_count(apps, schema_editor):
+    Classroom = apps.get_model("classroom", "Classroom")
+    Enrollment = apps.get_model("enrollment", "Enrollment")
+    enrollment_count = (
+        Enrollment.objects.filter(classroom_id=OuterRef("classroom_id"))
+        .order_by()
+        .values("classroom_id")
+        .annotate(count=Count("enrollment_id"))
+        .values("count")
+    )
+    Classroom.objects.update(student_count=Coalesce(Subquery(enrollment_count), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("classroom", "0003_alter_classroom_description"),
+        ("enrollment", "0002_alter_enrollment_unique_together"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="classroom",
+            name="student_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_student_count, migrations.RunPython.noop),
+    ]
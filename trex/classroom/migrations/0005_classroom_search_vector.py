@@ -0,0 +1,54 @@
+# Generated by Django 4.2.6 on 2026-10-18 16:41
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+CLASSROOM_SEARCH_VECTOR_SQL = """
+CREATE FUNCTION classroom_classroom_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.classroom_name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER classroom_classroom_search_vector_trigger
+BEFORE INSERT OR UPDATE OF classroom_name, description ON classroom_classroom
+FOR EACH ROW EXECUTE FUNCTION classroom_classroom_search_vector_update();
+
+UPDATE classroom_classroom SET search_vector =
+    setweight(to_tsvector('english', coalesce(classroom_name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'B');
+"""
+
+CLASSROOM_SEARCH_VECTOR_REVERSE_SQL = """
+DROP TRIGGER IF EXISTS classroom_classroom_search_vector_trigger ON classroom_classroom;
+DROP FUNCTION IF EXISTS classroom_classroom_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("classroom", "0004_classroom_student_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="classroom",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="classroom",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="classroom_search_vector"
+            ),
+        ),
+        migrations.RunSQL(
+            CLASSROOM_SEARCH_VECTOR_SQL, CLASSROOM_SEARCH_VECTOR_REVERSE_SQL
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.6 on 2026-10-18 16:45
+
+import string
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils.crypto import get_random_string
+
+
+def regenerate_duplicate_codes(apps, schema_editor):
+    """
+    Give every classroom but the oldest a new code where codes are duplicated,
+    so the unique constraint can be added.
+    """
+    Classroom = apps.get_model("classroom", "Classroom")
+    duplicates = (
+        Classroom.objects.order_by()
+        .values("classroom_code")
+        .annotate(count=Count("classroom_id"))
+        .filter(count__gt=1)
+        .values_list("classroom_code", flat=True)
+    )
+    used_codes = set(Classroom.objects.values_list("classroom_code", flat=True))
+    for classroom_code in list(duplicates):
+        classrooms = Classroom.objects.filter(classroom_code=classroom_code).order_by(
+            "classroom_id"
+        )
+        for classroom in classrooms[1:]:
+            new_code = classroom_code
+            while new_code in used_codes:
+                new_code = get_random_string(
+                    length=6, allowed_chars=string.ascii_letters + string.digits
+                )
+            used_codes.add(new_code)
+            classroom.classroom_code = new_code
+            classroom.save(update_fields=["classroom_code"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("classroom", "0005_classroom_search_vector"),
+    ]
+
+    operations = [
+        migrations.RunPython(regenerate_duplicate_codes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="classroom",
+            name="classroom_code",
+            field=models.CharField(max_length=20, unique=True),
+        ),
+    ]
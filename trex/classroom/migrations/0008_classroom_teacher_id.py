@@ -0,0 +1,31 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("classroom", "0007_classroom_updated_at"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="classroom",
+            name="teacher",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="classrooms",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="classroom",
+            index=models.Index(
+                fields=["teacher", "classroom_id"], name="classroom_teacher_id"
+            ),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.6 on 2026-10-18 18:26
+
+from django.db import migrations, models
+
+
+def unique_constraint_names(schema_editor):
+    """
+    The names Django gave the unique constraint of classroom_code and its LIKE index, see 0006.
+    """
+    table = "classroom_classroom"
+    return (
+        schema_editor._create_index_name(table, ["classroom_code"], suffix="_uniq"),
+        schema_editor._create_index_name(table, ["classroom_code"], suffix="_like"),
+    )
+
+
+def rename_unique_constraint(apps, schema_editor):
+    # renaming keeps the index, instead of dropping it and building it again
+    unique_name, like_name = unique_constraint_names(schema_editor)
+    quote_name = schema_editor.quote_name
+    schema_editor.execute(
+        "ALTER TABLE classroom_classroom RENAME CONSTRAINT %s TO %s"
+        % (quote_name(unique_name), quote_name("classroom_code_unique"))
+    )
+    # codes are only looked up by equality
+    schema_editor.execute("DROP INDEX IF EXISTS %s" % quote_name(like_name))
+
+
+def restore_unique_constraint(apps, schema_editor):
+    unique_name, like_name = unique_constraint_names(schema_editor)
+    quote_name = schema_editor.quote_name
+    schema_editor.execute(
+        "ALTER TABLE classroom_classroom RENAME CONSTRAINT %s TO %s"
+        % (quote_name("classroom_code_unique"), quote_name(unique_name))
+    )
+    schema_editor.execute(
+        "CREATE INDEX %s ON classroom_classroom (classroom_code varchar_pattern_ops)" % quote_name(like_name)
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("classroom", "0008_classroom_teacher_id"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(rename_unique_constraint, restore_unique_constraint),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="classroom",
+                    name="classroom_code",
+                    field=models.CharField(max_length=20),
+                ),
+                migrations.AddConstraint(
+                    model_name="classroom",
+                    constraint=models.UniqueConstraint(
+                        fields=("classroom_code",), name="classroom_code_unique"
+                    ),
+                ),
+            ],
+        ),
+    ]
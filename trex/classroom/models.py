@@ -1,20 +1,89 @@
-from django.db import models
+import string
+
+from django.db import IntegrityError, models, transaction
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.utils.crypto import get_random_string
 
 # Create your models here.
 
+CLASSROOM_CODE_LENGTH = 6
+CLASSROOM_CODE_CHARS = string.ascii_letters + string.digits
+# With 62^6 possible codes a collision is rare even with millions of classrooms,
+# this only bounds the retries in the pathological case.
+CLASSROOM_CODE_MAX_ATTEMPTS = 10
+# Named, so create_with_code can tell a code collision from other integrity errors.
+CLASSROOM_CODE_CONSTRAINT = 'classroom_code_unique'
+
+
+def generate_classroom_code():
+    return get_random_string(length=CLASSROOM_CODE_LENGTH, allowed_chars=CLASSROOM_CODE_CHARS)
+
+
+class ClassroomManager(models.Manager):
+    def create_with_code(self, **kwargs):
+        """
+        Create a classroom with a random, unique classroom_code.
+
+        The insert is attempted optimistically and retried with a new code if it
+        collides with the unique index, so the common case is a single INSERT
+        instead of an exists() query per attempt, and concurrent creates can never
+        end up with the same code.
+        """
+        for attempt in range(CLASSROOM_CODE_MAX_ATTEMPTS):
+            kwargs['classroom_code'] = generate_classroom_code()
+            try:
+                if transaction.get_connection(self.db).in_atomic_block:
+                    # a failed INSERT would break the surrounding transaction, so isolate it in a savepoint
+                    with transaction.atomic(using=self.db):
+                        return self.create(**kwargs)
+                return self.create(**kwargs)
+            except IntegrityError as e:
+                constraint_name = getattr(getattr(e.__cause__, 'diag', None), 'constraint_name', None)
+                if constraint_name != CLASSROOM_CODE_CONSTRAINT or attempt == CLASSROOM_CODE_MAX_ATTEMPTS - 1:
+                    raise
+
 
 class Classroom(models.Model):
     classroom_id = models.AutoField(primary_key=True)
     classroom_name = models.CharField(max_length=100, null=False)
     description = models.TextField(blank=True)
     classroom_code = models.CharField(max_length=20, null=False)
-    teacher = models.ForeignKey('user.User', on_delete=models.CASCADE, related_name='classrooms')
+    # indexed by classroom_teacher_id
+    teacher = models.ForeignKey('user.User', on_delete=models.CASCADE, related_name='classrooms', db_index=False)
+    # Denormalized enrollment count, kept in sync by Enrollment.objects.enroll, roster imports and
+    # the enrollment signals in trex.classroom.signals. Bulk and raw SQL writes bypass those,
+    # run `manage.py sync_student_counts` to repair any drift.
+    student_count = models.PositiveIntegerField(default=0, editable=False)
     created_on = models.DateTimeField(auto_now_add=True)
+    # Set on every save, and by the updates of student_count and the teacher's name that bypass save().
+    # Validates conditional GETs, see core.conditional.ConditionalGetMixin.
+    updated_at = models.DateTimeField(auto_now=True)
+    # Weighted tsvector of classroom_name and description, maintained by a database trigger.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ClassroomManager()
 
     def __str__(self):
         return self.classroom_name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # the teacher in the database, whose membership changes too when the classroom is reassigned,
+        # see trex.user.signals
+        instance._loaded_teacher_id = instance.__dict__.get('teacher_id')
+        return instance
+
     class Meta:
         ordering = ('classroom_id',)
         verbose_name_plural = 'Classrooms'
         verbose_name = 'Classroom'
+        indexes = [
+            # keyset pagination of a teacher's classrooms
+            models.Index(fields=['teacher', 'classroom_id'], name='classroom_teacher_id'),
+            GinIndex(fields=['search_vector'], name='classroom_search_vector'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['classroom_code'], name=CLASSROOM_CODE_CONSTRAINT),
+        ]
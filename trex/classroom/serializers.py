@@ -1,12 +1,11 @@
-import string
-from django.utils.crypto import get_random_string
-from django.db.models import Q
-
 from rest_framework import serializers
+
+from core.serializers import ModelSerializer, ValuesListSerializer
+from trex.user.membership import get_membership
 from .models import Classroom
 
 
-class ClassroomSerializer(serializers.ModelSerializer):
+class ClassroomSerializer(ModelSerializer):
     teacher_name = serializers.CharField(source='teacher.get_full_name', read_only=True)
     teacher = serializers.HiddenField(default=serializers.CurrentUserDefault())
     classroom_code = serializers.CharField(read_only=True)
@@ -28,25 +27,18 @@ class ClassroomSerializer(serializers.ModelSerializer):
         """
         Create a classroom object, but add the unique classroom_code to the data
         """
-        while True:
-            classroom_code = get_random_string(length=6, allowed_chars=string.ascii_letters + string.digits)
-            if not Classroom.objects.filter(Q(classroom_code=classroom_code)).exists():
-                break
-
-        validated_data['classroom_code'] = classroom_code
-        return Classroom.objects.create(**validated_data)
+        return Classroom.objects.create_with_code(**validated_data)
 
 
-class StudentClassroomDetailSerializer(serializers.ModelSerializer):
+class StudentClassroomDetailSerializer(ModelSerializer):
     teacher_name = serializers.CharField(source='teacher.get_full_name', read_only=True)
     date_joined = serializers.SerializerMethodField()
 
     def get_date_joined(self, classroom):
-        user = None
         request = self.context.get('request')
         if request and hasattr(request, "user"):
-            user = request.user
-            return classroom.enrollments.get(student=user).date_joined
+            # read from the cached membership instead of querying the enrollment
+            return get_membership(request).date_joined(classroom.classroom_id)
         return None
 
     class Meta:
@@ -63,17 +55,13 @@ class StudentClassroomDetailSerializer(serializers.ModelSerializer):
         # we can add other fields such as assignment count, etc in the future
 
 
-class TeacherClassroomDetailSerializer(serializers.ModelSerializer):
-    student_count = serializers.SerializerMethodField()
+class TeacherClassroomDetailSerializer(ModelSerializer):
     student_ids = serializers.SerializerMethodField()
 
     def get_student_ids(self, classroom):
         student_ids = classroom.enrollments.values_list('student_id', flat=True)
         return student_ids
 
-    def get_student_count(self, classroom):
-        return classroom.enrollments.count()
-
     class Meta:
         model = Classroom
         fields = (
@@ -89,11 +77,12 @@ class TeacherClassroomDetailSerializer(serializers.ModelSerializer):
 
 
 # NOTE: Kept for compatibility with old code for now
-class ClassroomListSerializer(serializers.ModelSerializer):
+class ClassroomListSerializer(ModelSerializer):
     teacher_name = serializers.CharField(source='teacher.get_full_name', read_only=True)
 
     class Meta:
         model = Classroom
+        list_serializer_class = ValuesListSerializer
         fields = (
             "classroom_id",
             "classroom_name",
@@ -102,11 +91,12 @@ class ClassroomListSerializer(serializers.ModelSerializer):
         )
 
 
-class StudentClassroomListSerializer(serializers.ModelSerializer):
+class StudentClassroomListSerializer(ModelSerializer):
     teacher_name = serializers.CharField(source='teacher.get_full_name', read_only=True)
 
     class Meta:
         model = Classroom
+        list_serializer_class = ValuesListSerializer
         fields = (
             "classroom_id",
             "classroom_name",
@@ -115,14 +105,10 @@ class StudentClassroomListSerializer(serializers.ModelSerializer):
         )
 
 
-class TeacherClassroomListSerializer(serializers.ModelSerializer):
-    student_count = serializers.SerializerMethodField()
-
-    def get_student_count(self, classroom):
-        return classroom.enrollments.count()
-
+class TeacherClassroomListSerializer(ModelSerializer):
     class Meta:
         model = Classroom
+        list_serializer_class = ValuesListSerializer
         fields = (
             "classroom_id",
             "classroom_name",
@@ -0,0 +1,66 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate_classroom_cache
+from .models import Classroom
+
+
+@receiver(post_save, sender="classroom.Classroom")
+@receiver(post_delete, sender="classroom.Classroom")
+def classroom_changed(sender, instance, **kwargs):
+    invalidate_classroom_cache(instance.classroom_id)
+
+
+@receiver(post_save, sender="enrollment.Enrollment")
+@receiver(post_delete, sender="enrollment.Enrollment")
+def enrollment_changed(sender, instance, **kwargs):
+    invalidate_classroom_cache(instance.classroom_id)
+
+
+@receiver(post_save, sender="assignment.Assignment")
+@receiver(post_delete, sender="assignment.Assignment")
+def assignment_changed(sender, instance, **kwargs):
+    invalidate_classroom_cache(instance.classroom_id)
+
+
+@receiver(post_save, sender="enrollment.Enrollment")
+def enrollment_created(sender, instance, created, raw=False, **kwargs):
+    # Enrollment.objects.enroll and roster imports insert with raw SQL and count in the same statement,
+    # this covers enrollments saved through the ORM, e.g. in the admin
+    if not created or raw:
+        return
+    Classroom.objects.filter(classroom_id=instance.classroom_id).update(
+        student_count=F("student_count") + 1,
+        updated_at=timezone.now(),
+    )
+
+
+@receiver(post_delete, sender="enrollment.Enrollment")
+@receiver(post_delete, sender="assignment.Assignment")
+def classroom_content_deleted(sender, instance, origin=None, **kwargs):
+    # Conditional GETs of the classroom are validated by its updated_at, see core.conditional.
+    # Nothing else moves it when the row goes away in a cascade, e.g. a deleted student's enrollments.
+    if isinstance(origin, Classroom) or getattr(origin, "model", None) is Classroom:
+        # the classroom itself is being deleted
+        return
+    changes = {"updated_at": timezone.now()}
+    if sender._meta.label == "enrollment.Enrollment":
+        # every way an enrollment is deleted (un-enrolling, the admin, a cascade) counts
+        changes["student_count"] = F("student_count") - 1
+    Classroom.objects.filter(classroom_id=instance.classroom_id).update(**changes)
+
+
+@receiver(post_save, sender="user.User")
+def teacher_changed(sender, instance, update_fields=None, **kwargs):
+    # the teacher's name is part of the classroom responses
+    if instance.role != "teacher":
+        return
+    if update_fields is not None and not {"first_name", "last_name"} & set(update_fields):
+        return
+    classroom_ids = list(Classroom.objects.filter(teacher_id=instance.pk).values_list("classroom_id", flat=True))
+    if classroom_ids:
+        # update() sends no post_save signals
+        Classroom.objects.filter(classroom_id__in=classroom_ids).update(updated_at=timezone.now())
+        invalidate_classroom_cache(*classroom_ids)
@@ -1,3 +1,233 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connections
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from trex.assignment.models import Assignment
+from trex.enrollment.models import Enrollment
+from trex.user.models import User
+from .cache import get_classroom_generation
+from .models import CLASSROOM_CODE_MAX_ATTEMPTS, Classroom
+
+
+class ClassroomCacheTestCase(TestCase):
+    databases = {"default", "replica"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username="teacher", password="password", role="teacher")
+        cls.classroom = Classroom.objects.create_with_code(teacher=cls.teacher, classroom_name="Algebra")
+        cls.assignment = Assignment.objects.create(classroom=cls.classroom, assignment_name="Homework")
+        cls.url = f"/api/classrooms/{cls.classroom.classroom_id}/"
+
+    def setUp(self):
+        # cached responses outlive the rolled back changes of the previous test
+        cache.clear()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def get(self, user, url, queries=None):
+        """
+        GET url as user and return the response data, asserting the number of queries when given.
+        """
+        with CaptureQueriesContext(connections["default"]) as default, \
+                CaptureQueriesContext(connections["replica"]) as replica:
+            response = self.client_for(user).get(url)
+        self.assertEqual(response.status_code, 200)
+        if queries is not None:
+            self.assertEqual(len(default) + len(replica), queries)
+        # empty lists have no data
+        return response.json().get("data", [])
+
+
+class ClassroomResponseCacheTests(ClassroomCacheTestCase):
+    def assignment_names(self, **kwargs):
+        data = self.get(self.teacher, f"{self.url}assignments/", **kwargs)
+        return [assignment["assignment_name"] for assignment in data]
+
+    def change(self, method, url, data=None, user=None, status_code=200):
+        """
+        Send the change as user (the teacher by default), and assert that it bumped the classroom's generation.
+        """
+        generation = get_classroom_generation(self.classroom.classroom_id)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client_for(user or self.teacher), method)(url, data, format="json")
+        self.assertEqual(response.status_code, status_code, response.content)
+        self.assertNotEqual(get_classroom_generation(self.classroom.classroom_id), generation)
+
+    def test_cached_responses_are_served_without_queries(self):
+        self.assertEqual(self.assignment_names(), ["Homework"])
+        self.assertEqual(self.assignment_names(queries=0), ["Homework"])
+        self.assertEqual(self.get(self.teacher, self.url)["classroom_name"], "Algebra")
+        self.assertEqual(self.get(self.teacher, self.url, queries=0)["classroom_name"], "Algebra")
+
+    def test_assignment_create(self):
+        self.assertEqual(self.assignment_names(), ["Homework"])
+        self.change("post", f"{self.url}assignments/create/", {"assignment_name": "Essay"}, status_code=201)
+        self.assertEqual(self.assignment_names(), ["Homework", "Essay"])
+
+    def test_assignment_update(self):
+        self.assertEqual(self.assignment_names(), ["Homework"])
+        url = f"{self.url}assignments/{self.assignment.assignment_id}/update/"
+        self.change("patch", url, {"assignment_name": "Essay"})
+        self.assertEqual(self.assignment_names(), ["Essay"])
+
+    def test_assignment_delete(self):
+        self.assertEqual(self.assignment_names(), ["Homework"])
+        self.change("delete", f"{self.url}assignments/{self.assignment.assignment_id}/delete/")
+        self.assertEqual(self.assignment_names(), [])
+
+    def test_enrollment(self):
+        student = User.objects.create_user(username="student", password="password", role="student")
+        self.assertEqual(self.get(self.teacher, self.url)["student_ids"], [])
+        self.change(
+            "post", "/api/classrooms/enroll/", {"classroom_code": self.classroom.classroom_code},
+            user=student, status_code=201,
+        )
+        data = self.get(self.teacher, self.url)
+        self.assertEqual((data["student_ids"], data["student_count"]), ([student.pk], 1))
+
+    def test_rename(self):
+        self.assertEqual(self.get(self.teacher, self.url)["classroom_name"], "Algebra")
+        self.change("patch", f"{self.url}update/", {"classroom_name": "Geometry"})
+        self.assertEqual(self.get(self.teacher, self.url)["classroom_name"], "Geometry")
+
+
+class StudentClassroomOverlayTests(ClassroomCacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.ada, cls.bob, cls.cy = (
+            User.objects.create_user(username=name, password="password", role="student")
+            for name in ("ada", "bob", "cy")
+        )
+        cls.ada_enrollment = Enrollment.objects.create(classroom=cls.classroom, student=cls.ada)
+        cls.bob_enrollment = Enrollment.objects.create(classroom=cls.classroom, student=cls.bob)
+
+    @staticmethod
+    def date_joined(enrollment):
+        return enrollment.date_joined.isoformat().replace("+00:00", "Z")
+
+    def test_students_share_the_cached_response(self):
+        ada = self.get(self.ada, self.url)
+        self.assertEqual(ada["date_joined"], self.date_joined(self.ada_enrollment))
+
+        # bob's membership is loaded, the response comes from the entry cached for ada
+        bob = self.get(self.bob, self.url, queries=1)
+        self.assertEqual(bob["date_joined"], self.date_joined(self.bob_enrollment))
+        self.assertEqual({**bob, "date_joined": None}, {**ada, "date_joined": None})
+
+        # filling in bob's date_joined left the shared entry alone
+        self.assertEqual(self.get(self.ada, self.url, queries=0)["date_joined"], self.date_joined(self.ada_enrollment))
+
+    def test_students_who_are_not_enrolled_are_not_served_the_shared_entry(self):
+        self.get(self.ada, self.url)
+        response = self.client_for(self.cy).get(self.url)
+        self.assertEqual(response.status_code, 404)
+
+
+class StudentCountTests(TestCase):
+    databases = {"default", "replica"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username="teacher", password="password", role="teacher")
+        cls.classroom = Classroom.objects.create_with_code(teacher=cls.teacher, classroom_name="Algebra")
+        cls.student = User.objects.create_user(username="student", password="password", role="student")
+
+    def assert_student_count(self, expected):
+        self.classroom.refresh_from_db()
+        self.assertEqual(self.classroom.student_count, expected)
+
+    def test_enroll_and_unenroll(self):
+        client = APIClient()
+        client.force_authenticate(self.student)
+        response = client.post("/api/classrooms/enroll/", {"classroom_code": self.classroom.classroom_code})
+        self.assertEqual(response.status_code, 201)
+        self.assert_student_count(1)
+
+        unenroll_url = f"/api/classrooms/{self.classroom.classroom_id}/unenroll/"
+        self.assertEqual(client.delete(unenroll_url).status_code, 200)
+        self.assert_student_count(0)
+        self.assertEqual(client.delete(unenroll_url).status_code, 404)
+        self.assert_student_count(0)
+
+    def test_orm_create_and_delete(self):
+        enrollment = Enrollment.objects.create(classroom=self.classroom, student=self.student)
+        self.assert_student_count(1)
+        enrollment.delete()
+        self.assert_student_count(0)
+
+    def test_deleted_student(self):
+        Enrollment.objects.enroll(self.student, self.classroom.classroom_code)
+        other = User.objects.create_user(username="other", password="password", role="student")
+        Enrollment.objects.enroll(other, self.classroom.classroom_code)
+        self.assert_student_count(2)
+
+        self.student.delete()
+        self.assert_student_count(1)
+
+    def test_admin_delete(self):
+        enrollment = Enrollment.objects.enroll(self.student, self.classroom.classroom_code)
+        self.client.force_login(User.objects.create_superuser(username="admin", password="password"))
+        response = self.client.post(f"/admin/enrollment/enrollment/{enrollment.enrollment_id}/delete/", {"post": "yes"})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Enrollment.objects.filter(pk=enrollment.pk).exists())
+        self.assert_student_count(0)
+
+    def test_sync_student_counts(self):
+        Enrollment.objects.enroll(self.student, self.classroom.classroom_code)
+        # e.g. after a bulk_create
+        Classroom.objects.filter(pk=self.classroom.pk).update(student_count=5)
+
+        output = StringIO()
+        call_command("sync_student_counts", "--dry-run", stdout=output)
+        self.assertIn(f"Classroom {self.classroom.classroom_id}: student_count=5, enrollments=1", output.getvalue())
+        self.assert_student_count(5)
+
+        generation = get_classroom_generation(self.classroom.classroom_id)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("sync_student_counts", stdout=output)
+        self.assert_student_count(1)
+        self.assertNotEqual(get_classroom_generation(self.classroom.classroom_id), generation)
+
+        output = StringIO()
+        call_command("sync_student_counts", stdout=output)
+        self.assertIn("All student counts are in sync", output.getvalue())
+
+
+class ClassroomCodeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username="teacher", password="password", role="teacher")
+        cls.classroom = Classroom.objects.create_with_code(teacher=cls.teacher, classroom_name="Algebra")
+
+    def generate(self, *codes):
+        return mock.patch("trex.classroom.models.generate_classroom_code", side_effect=codes)
+
+    def test_collision_is_retried_with_a_new_code(self):
+        with self.generate(self.classroom.classroom_code, "b2C3d4") as generate:
+            classroom = Classroom.objects.create_with_code(teacher=self.teacher, classroom_name="Geometry")
+        self.assertEqual(generate.call_count, 2)
+        self.assertEqual(classroom.classroom_code, "b2C3d4")
+        # the failed insert was rolled back to its savepoint, the transaction goes on
+        self.assertEqual(Classroom.objects.filter(teacher=self.teacher).count(), 2)
+
+    def test_gives_up_after_max_attempts(self):
+        codes = [self.classroom.classroom_code] * CLASSROOM_CODE_MAX_ATTEMPTS
+        with self.generate(*codes) as generate, self.assertRaises(IntegrityError):
+            Classroom.objects.create_with_code(teacher=self.teacher, classroom_name="Geometry")
+        self.assertEqual(generate.call_count, CLASSROOM_CODE_MAX_ATTEMPTS)
 
-# Create your tests here.
+    def test_other_integrity_errors_are_not_retried(self):
+        with self.generate("b2C3d4", "c3D4e5") as generate, self.assertRaises(IntegrityError):
+            Classroom.objects.create_with_code(teacher=self.teacher, classroom_name=None)
+        self.assertEqual(generate.call_count, 1)
@@ -10,11 +10,8 @@ from rest_framework.generics import (
     DestroyAPIView,
 )
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.filters import (
-    SearchFilter,
-    OrderingFilter,
-)
 
+from .cache import ClassroomResponseCacheMixin
 from .models import Classroom
 from .serializers import (
     ClassroomSerializer,
@@ -23,15 +20,20 @@ from .serializers import (
     StudentClassroomListSerializer,
     TeacherClassroomListSerializer,
 )
+from trex.user.membership import get_membership
 from trex.user.permissions import (
     IsTeacher,
     IsAdmin,
     IsTeacherOfThisClassroom,
 )
+from core.conditional import ConditionalGetMixin
+from core.deferred import DeferUnusedFieldsMixin
+from core.filters import FullTextSearchFilter, SearchRankOrderingFilter
+from core.pagination import CursorPagination
 from core.utils import response_payload
 
 
-class ClassroomListView(ListAPIView):
+class ClassroomListView(ConditionalGetMixin, ListAPIView):
     """
     List all classrooms of the user.
     User must be authenticated to access this view.
@@ -42,14 +44,17 @@ class ClassroomListView(ListAPIView):
 
     Searching is allowed on classroom_name, description, teacher__first_name, teacher__last_name
     Ordering is allowed on classroom_name, teacher__first_name, created_on
-    Pagination is not supported yet.
+    Search results are ordered by relevance unless an ordering is requested.
+    Results are cursor paginated on classroom_id, use the `next` and `previous` links to fetch other pages.
+    Supports conditional requests (ETag / Last-Modified), see core.conditional.ConditionalGetMixin.
     """
 
     permission_classes = [IsAuthenticated, ]
+    pagination_class = CursorPagination
 
     filter_backends = [
-        SearchFilter,
-        OrderingFilter
+        FullTextSearchFilter,
+        SearchRankOrderingFilter
     ]
 
     search_fields = [
@@ -59,12 +64,22 @@ class ClassroomListView(ListAPIView):
         'teacher__last_name'
     ]
 
+    # see core.filters.FullTextSearchFilter, set to False to fall back to icontains search on search_fields
+    full_text_search = True
+    search_vector_field = 'search_vector'
+    trigram_search_fields = [
+        'teacher__first_name',
+        'teacher__last_name',
+    ]
+
     ordering_fields = [
         'classroom_name',
         'teacher__first_name',
         'created_on'
     ]
 
+    ordering = 'classroom_id'
+
     def get_queryset(self):
         user = self.request.user
         if user.role == 'teacher':
@@ -92,25 +107,26 @@ class ClassroomListView(ListAPIView):
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
+        # fetch only the serialized columns as dicts, see core.serializers.ValuesListSerializer
+        queryset = self.get_serializer(many=True).get_values_queryset(queryset)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
         # return different response if no classrooms found
         if len(serializer.data) == 0:
-            return Response(
+            return self.get_paginated_response(
                 response_payload(
                     success=True,
                     message="No classrooms found",
                     data=serializer.data,
-                ),
-                status=status.HTTP_200_OK,
+                )
             )
         else:
-            return Response(
+            return self.get_paginated_response(
                 response_payload(
                     success=True,
                     message="Classroom list fetched successfully",
                     data=serializer.data,
-                ),
-                status=status.HTTP_200_OK,
+                )
             )
 
 
@@ -148,21 +164,48 @@ class ClassroomCreateView(CreateAPIView):
             )
 
 
-class ClassroomDetailView(RetrieveAPIView):
+class ClassroomDetailView(ClassroomResponseCacheMixin, ConditionalGetMixin, DeferUnusedFieldsMixin, RetrieveAPIView):
     """
     Retrieve a classroom
     User must be authenticated to access this view.
     Only teachers who created the classroom or students enrolled in the classroom can retrieve.
+    Responses are cached, see trex.classroom.cache.ClassroomResponseCacheMixin.
+    Supports conditional requests (ETag / Last-Modified), see core.conditional.ConditionalGetMixin.
     """
     permission_classes = [IsAuthenticated, ]
     lookup_field = "classroom_id"
+    # every student of the classroom opens it when class starts
+    response_cache_single_flight = True
+
+    def get_cache_variant(self):
+        """
+        Mirrors get_queryset. A classroom has a single teacher, so teachers each have their own variant.
+        All students of the classroom share one variant, their date_joined is filled in by
+        personalize_response_data. Requests that end in a 404 are not cached.
+        """
+        user = self.request.user
+        if user.role == 'teacher':
+            return f'teacher:{user.pk}'
+        elif user.role == 'student':
+            # the shared entry must not be served to students who are not enrolled
+            return 'student' if get_membership(self.request).is_student_of(self.kwargs['classroom_id']) else None
+        elif user.is_superuser:
+            return 'admin'
+        return None
+
+    def personalize_response_data(self, data):
+        if self.request.user.role != 'student':
+            return data
+        date_joined = get_membership(self.request).date_joined(self.kwargs['classroom_id'])
+        return {**data, 'data': {**data['data'], 'date_joined': date_joined}}
 
     def get_queryset(self):
         user = self.request.user
         if user.role == 'teacher':
             queryset = Classroom.objects.filter(teacher=user)
         elif user.role == 'student':
-            queryset = Classroom.objects.filter(enrollments__student=user)
+            # teacher_name is part of the student response
+            queryset = Classroom.objects.filter(enrollments__student=user).select_related('teacher')
         elif user.is_superuser:
             queryset = Classroom.objects.all()
         else:
@@ -204,7 +247,7 @@ class ClassroomDetailView(RetrieveAPIView):
             )
 
 
-class ClassroomUpdateView(UpdateAPIView):
+class ClassroomUpdateView(DeferUnusedFieldsMixin, UpdateAPIView):
     """
     Update a classroom.
     User must be authenticated to access this view.
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.6 on 2026-10-18 16:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("enrollment", "0002_alter_enrollment_unique_together"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="enrollment",
+            index=models.Index(
+                fields=["classroom", "enrollment_id"], name="enrollment_classroom_id"
+            ),
+        ),
+    ]
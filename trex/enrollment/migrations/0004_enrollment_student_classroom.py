@@ -0,0 +1,31 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("enrollment", "0003_enrollment_enrollment_classroom_id"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="enrollment",
+            name="student",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="enrollments",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="enrollment",
+            index=models.Index(
+                fields=["student", "classroom"], name="enrollment_student_classroom"
+            ),
+        ),
+    ]
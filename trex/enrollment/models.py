@@ -1,13 +1,80 @@
-from django.db import models
+from django.db import connections, models
+from django.utils import timezone
 
 # Create your models here.
 
+ENROLL_SQL = """
+WITH classroom AS (
+    SELECT classroom_id, classroom_name FROM {classroom_table} WHERE classroom_code = %(classroom_code)s
+), enrollment AS (
+    INSERT INTO {enrollment_table} (classroom_id, student_id, date_joined)
+    SELECT classroom_id, %(student_id)s, %(date_joined)s FROM classroom
+    ON CONFLICT (classroom_id, student_id) DO NOTHING
+    RETURNING enrollment_id, classroom_id, date_joined
+), student_count AS (
+    UPDATE {classroom_table} SET student_count = student_count + 1, updated_at = %(date_joined)s
+    WHERE classroom_id IN (SELECT classroom_id FROM enrollment)
+)
+SELECT classroom.classroom_id, classroom.classroom_name, enrollment.enrollment_id, enrollment.date_joined
+FROM classroom LEFT JOIN enrollment ON true
+"""
+
+
+class EnrollmentManager(models.Manager):
+    def enroll(self, student, classroom_code):
+        """
+        Enroll the student in the classroom with the given code.
+
+        Resolving the code, inserting the enrollment and incrementing the classroom's
+        student_count happen in a single statement.
+        Returns the new enrollment, or None if the student is already enrolled.
+        Raises Classroom.DoesNotExist if the code is invalid.
+        """
+        Classroom = self.model._meta.get_field('classroom').related_model
+        sql = ENROLL_SQL.format(
+            classroom_table=Classroom._meta.db_table,
+            enrollment_table=self.model._meta.db_table,
+        )
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql, {
+                'classroom_code': classroom_code,
+                'student_id': student.pk,
+                'date_joined': timezone.now(),
+            })
+            row = cursor.fetchone()
+
+        if row is None:
+            raise Classroom.DoesNotExist("Invalid classroom code")
+        classroom_id, classroom_name, enrollment_id, date_joined = row
+        if enrollment_id is None:
+            return None
+
+        # raw SQL sends no post_save signal
+        from trex.classroom.cache import invalidate_classroom_cache
+        from trex.sync.events import roster_changed
+        from trex.user.membership import invalidate_membership
+        invalidate_membership(student.pk)
+        invalidate_classroom_cache(classroom_id)
+        roster_changed(classroom_id, enrolled=[student.pk])
+
+        enrollment = self.model.from_db(
+            self.db,
+            ['enrollment_id', 'date_joined', 'classroom_id', 'student_id'],
+            [enrollment_id, date_joined, classroom_id, student.pk],
+        )
+        enrollment.classroom = Classroom.from_db(self.db, ['classroom_id', 'classroom_name'], [classroom_id, classroom_name])
+        enrollment.student = student
+        return enrollment
+
 
 class Enrollment(models.Model):
     enrollment_id = models.AutoField(primary_key=True)
     date_joined = models.DateTimeField(auto_now_add=True)
     classroom = models.ForeignKey('classroom.Classroom', on_delete=models.CASCADE, related_name='enrollments')
-    student = models.ForeignKey('user.User', on_delete=models.CASCADE, related_name='enrollments')
+    # indexed by enrollment_student_classroom
+    student = models.ForeignKey('user.User', on_delete=models.CASCADE, related_name='enrollments', db_index=False)
+
+    objects = EnrollmentManager()
 
     def __str__(self):
         return f"{self.student} - {self.classroom}"
@@ -17,4 +84,10 @@ class Enrollment(models.Model):
         verbose_name_plural = 'Enrollments'
         verbose_name = 'Enrollment'
         unique_together = ('classroom', 'student')
+        indexes = [
+            # keyset pagination of a classroom's roster
+            models.Index(fields=['classroom', 'enrollment_id'], name='enrollment_classroom_id'),
+            # a student's classrooms (membership, the student classroom list) without reading the table
+            models.Index(fields=['student', 'classroom'], name='enrollment_student_classroom'),
+        ]
 
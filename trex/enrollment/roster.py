@@ -0,0 +1,188 @@
+import codecs
+import csv
+import json
+import logging
+from itertools import islice
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+
+from trex.classroom.cache import invalidate_classroom_cache
+from trex.classroom.models import Classroom
+from trex.sync.events import roster_changed
+from trex.user.membership import invalidate_membership
+from trex.user.models import User
+from .models import Enrollment
+
+logger = logging.getLogger(__name__)
+
+ROSTER_BATCH_SIZE = 1000
+ROSTER_CSV_HEADERS = ('username', 'email', 'student')
+
+# Only the rows actually inserted are counted and returned, students who enrolled themselves
+# since the batch checked the existing enrollments are skipped by ON CONFLICT.
+ROSTER_ENROLL_SQL = """
+WITH enrollment AS (
+    INSERT INTO {enrollment_table} (classroom_id, student_id, date_joined)
+    SELECT %(classroom_id)s, student_id, %(date_joined)s FROM UNNEST(%(student_ids)s::bigint[]) AS student_id
+    ON CONFLICT (classroom_id, student_id) DO NOTHING
+    RETURNING student_id
+), student_count AS (
+    UPDATE {classroom_table}
+    SET student_count = student_count + (SELECT COUNT(*) FROM enrollment), updated_at = %(date_joined)s
+    WHERE classroom_id = %(classroom_id)s AND EXISTS (SELECT 1 FROM enrollment)
+)
+SELECT student_id FROM enrollment
+"""
+
+
+def read_csv_students(file):
+    """
+    Lazily yield (row number, username or email) from an uploaded CSV file.
+    The first non-empty cell of each row is used, an optional header row is skipped.
+    """
+    reader = csv.reader(codecs.iterdecode(file, 'utf-8-sig'))
+    for row_number, row in enumerate(reader, start=1):
+        student = next((cell.strip() for cell in row if cell.strip()), None)
+        if student is None:
+            continue
+        if row_number == 1 and student.lower() in ROSTER_CSV_HEADERS:
+            continue
+        yield row_number, student
+
+
+def read_json_students(students):
+    """
+    Yield (row number, username or email) from a parsed JSON list, or the values of an NDJSON body
+    as core.parsers.NDJSONParser reads them.
+    """
+    for row_number, student in enumerate(students, start=1):
+        yield row_number, str(student).strip()
+
+
+class RosterImport:
+    """
+    Enroll students into a classroom in batches.
+
+    Students are resolved by username, or by email if the value contains an '@'.
+    Each batch resolves its users in one query, checks existing enrollments in one query
+    and inserts the new ones and increments the classroom's student_count in a single statement,
+    so memory stays bounded by the batch size.
+    """
+
+    def __init__(self, classroom, students, batch_size=ROSTER_BATCH_SIZE):
+        self.classroom = classroom
+        self.students = students
+        self.batch_size = batch_size
+        self.summary = {
+            'enrolled': 0,
+            'already_enrolled': 0,
+            'not_found': 0,
+        }
+
+    def results(self):
+        students = iter(self.students)
+        while True:
+            batch = list(islice(students, self.batch_size))
+            if not batch:
+                return
+            yield from self.import_batch(batch)
+
+    def import_batch(self, batch):
+        identifiers = {student for _, student in batch}
+        usernames = {student for student in identifiers if '@' not in student}
+        emails = identifiers - usernames
+
+        student_ids = {}
+        users = User.objects.filter(role='student').filter(
+            Q(username__in=usernames) | Q(email__in=emails)
+        ).values_list('id', 'username', 'email')
+        for user_id, username, email in users:
+            student_ids[username] = user_id
+            student_ids.setdefault(email, user_id)
+
+        enrolled_ids = set(
+            Enrollment.objects.filter(
+                classroom=self.classroom,
+                student_id__in=student_ids.values(),
+            ).values_list('student_id', flat=True)
+        )
+
+        new_ids = [
+            student_id for student_id in dict.fromkeys(student_ids.get(student) for _, student in batch)
+            if student_id is not None and student_id not in enrolled_ids
+        ]
+        inserted_ids = self.enroll(new_ids) if new_ids else set()
+
+        results = []
+        for row_number, student in batch:
+            student_id = student_ids.get(student)
+            if student_id is None:
+                status = 'not_found'
+            elif student_id in inserted_ids:
+                status = 'enrolled'
+                # a student listed twice is enrolled by the first row
+                inserted_ids.remove(student_id)
+            else:
+                status = 'already_enrolled'
+            self.summary[status] += 1
+            results.append({
+                'row': row_number,
+                'student': student,
+                'student_id': student_id,
+                'status': status,
+            })
+        return results
+
+    def enroll(self, student_ids):
+        """
+        Enroll the students in one statement and return the ids of those who were not enrolled yet.
+        """
+        classroom_id = self.classroom.classroom_id
+        sql = ROSTER_ENROLL_SQL.format(
+            enrollment_table=Enrollment._meta.db_table,
+            classroom_table=Classroom._meta.db_table,
+        )
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(sql, {
+                    'classroom_id': classroom_id,
+                    'student_ids': student_ids,
+                    'date_joined': timezone.now(),
+                })
+                inserted_ids = [student_id for student_id, in cursor.fetchall()]
+            if inserted_ids:
+                # raw SQL sends no post_save signals
+                invalidate_membership(*inserted_ids)
+                invalidate_classroom_cache(classroom_id)
+                roster_changed(classroom_id, enrolled=inserted_ids)
+        return set(inserted_ids)
+
+    def stream_payload(self):
+        """
+        Stream the response_payload envelope as JSON while the import runs,
+        with one entry per row in data.results and the totals in data.summary.
+
+        Batches are committed one at a time. Should one fail, the rows before it stay imported, the import
+        stops, and data.error says so, so the body is still valid JSON after the 200 status was sent.
+        """
+        yield '{"success": true, "message": "Roster import processed", "data": {"results": ['
+        separator = ''
+        error = None
+        try:
+            for result in self.results():
+                yield separator + json.dumps(result)
+                separator = ', '
+        except ParseError as exc:
+            error = f"The import stopped at an invalid row, the rows before it were imported: {exc.detail}"
+        except DatabaseError:
+            logger.exception("Roster import into classroom %s failed", self.classroom.classroom_id)
+            error = "The import stopped on a database error, the rows before it were imported"
+        summary = json.dumps(self.summary)
+        if error is not None:
+            yield '], "summary": ' + summary + ', "error": ' + json.dumps(error) + '}}'
+        else:
+            yield '], "summary": ' + summary + '}}'
+
@@ -1,15 +1,17 @@
-from django.db.models import Q
 from rest_framework import serializers
+
+from core.serializers import ModelSerializer, ValuesListSerializer
 from .models import Enrollment
-from trex.classroom.models import Classroom
+from .roster import ROSTER_BATCH_SIZE
 
 
-class EnrollmentDetailSerializer(serializers.ModelSerializer):
+class EnrollmentDetailSerializer(ModelSerializer):
     student_name = serializers.CharField(source='student.get_full_name', read_only=True)
     classroom_name = serializers.CharField(source='classroom.classroom_name', read_only=True)
 
     class Meta:
         model = Enrollment
+        list_serializer_class = ValuesListSerializer
         fields = (
             "enrollment_id",
             "student",
@@ -22,7 +24,11 @@ class EnrollmentDetailSerializer(serializers.ModelSerializer):
         # fields = '__all__'
 
 
-class EnrollmentCreateSerializer(serializers.ModelSerializer):
+class EnrollmentCreateSerializer(ModelSerializer):
+    """
+    Validates the classroom_code and renders the new enrollment.
+    The enrollment itself is written by Enrollment.objects.enroll, see EnrollmentCreateView.
+    """
     classroom_code = serializers.CharField(write_only=True)
     classroom_name = serializers.CharField(source='classroom.classroom_name', read_only=True)
 
@@ -44,21 +50,20 @@ class EnrollmentCreateSerializer(serializers.ModelSerializer):
 
         # fields = '__all__'
 
+
+class EnrollmentImportSerializer(serializers.Serializer):
+    file = serializers.FileField(required=False)
+    # larger rosters are uploaded as CSV or NDJSON, which are read as they are imported
+    students = serializers.ListField(
+        child=serializers.CharField(),
+        required=False,
+        allow_empty=False,
+        max_length=ROSTER_BATCH_SIZE,
+    )
+
     def validate(self, attrs):
-        classroom_code = attrs.get('classroom_code')
-        # check if classroom_code is valid
-        if not Classroom.objects.filter(Q(classroom_code=classroom_code)).exists():
+        if not attrs.get('file') and not attrs.get('students'):
             raise serializers.ValidationError(
-                detail="Invalid classroom code",
+                detail="Either a CSV file or a list of students is required",
             )
         return attrs
-
-    def create(self, validated_data):
-        classroom_code = validated_data.get('classroom_code')
-        classroom = Classroom.objects.get(classroom_code=classroom_code)
-        student = self.context.get('request').user
-        enrollment = Enrollment.objects.create(
-            student=student,
-            classroom=classroom,
-        )
-        return enrollment
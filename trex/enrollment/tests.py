@@ -1,3 +1,222 @@
+import json
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, connections
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.fields import DateTimeField
+from rest_framework.test import APIClient
+
+from trex.classroom.models import Classroom
+from trex.user.models import User
+from .models import Enrollment
+from .roster import RosterImport, read_json_students
+
+
+class EnrollTests(TestCase):
+    databases = {"default", "replica"}
+
+    @classmethod
+    def setUpTestData(cls):
+        teacher = User.objects.create_user(username="teacher", password="password", role="teacher")
+        cls.classroom = Classroom.objects.create_with_code(teacher=teacher, classroom_name="Algebra")
+        cls.student = User.objects.create_user(username="student", password="password", role="student")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def enroll(self, classroom_code):
+        return self.client.post("/api/classrooms/enroll/", {"classroom_code": classroom_code}, format="json")
+
+    def test_enroll(self):
+        with CaptureQueriesContext(connections["default"]) as default, \
+                CaptureQueriesContext(connections["replica"]) as replica:
+            response = self.enroll(self.classroom.classroom_code)
+        # the code lookup, the insert and the student_count update
+        self.assertEqual(len(default) + len(replica), 1)
+
+        self.assertEqual(response.status_code, 201)
+        enrollment = Enrollment.objects.get(classroom=self.classroom, student=self.student)
+        self.assertEqual(response.json(), {
+            "success": True,
+            "message": "User enrolled successfully",
+            "data": {
+                "enrollment_id": enrollment.enrollment_id,
+                "classroom_id": self.classroom.classroom_id,
+                "classroom_name": "Algebra",
+                "date_joined": enrollment.date_joined.isoformat().replace("+00:00", "Z"),
+            },
+        })
+        self.classroom.refresh_from_db()
+        self.assertEqual(self.classroom.student_count, 1)
+
+    def test_invalid_code(self):
+        response = self.enroll("nope")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {
+            "success": False,
+            "message": "User enrollment failed",
+            "errors": {"non_field_errors": ["Invalid classroom code"]},
+        })
+        self.assertFalse(Enrollment.objects.filter(student=self.student).exists())
+
+    def test_missing_code(self):
+        response = self.client.post("/api/classrooms/enroll/", {}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("classroom_code", response.json()["errors"])
+
+    def test_enroll_twice(self):
+        self.assertEqual(self.enroll(self.classroom.classroom_code).status_code, 201)
+        response = self.enroll(self.classroom.classroom_code)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {
+            "success": False,
+            "message": "You are already enrolled in this classroom",
+        })
+        self.assertEqual(Enrollment.objects.filter(classroom=self.classroom, student=self.student).count(), 1)
+        self.classroom.refresh_from_db()
+        self.assertEqual(self.classroom.student_count, 1)
+
+    def test_only_students_enroll(self):
+        self.client.force_authenticate(self.classroom.teacher)
+        self.assertEqual(self.enroll(self.classroom.classroom_code).status_code, 403)
+
+
+class RosterImportTests(TestCase):
+    databases = {"default", "replica"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username="teacher", password="password", role="teacher")
+        cls.classroom = Classroom.objects.create_with_code(teacher=cls.teacher, classroom_name="Algebra")
+        cls.ada, cls.bob, cls.cy = (
+            User.objects.create_user(username=name, email=f"{name}@example.com", password="password", role="student")
+            for name in ("ada", "bob", "cy")
+        )
+        Enrollment.objects.enroll(cls.ada, cls.classroom.classroom_code)
+        cls.url = f"/api/classrooms/{cls.classroom.classroom_id}/enrollments/import/"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def import_roster(self, *args, **kwargs):
+        response = self.client.post(self.url, *args, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b"".join(response.streaming_content))["data"]
+
+    def assert_imported(self, data, first_row=1):
+        # bob, cy by email, a student who does not exist, ada who was enrolled and bob again
+        self.assertEqual(
+            [(result["row"], result["student"], result["student_id"], result["status"]) for result in data["results"]],
+            [
+                (first_row, "bob", self.bob.pk, "enrolled"),
+                (first_row + 1, "cy@example.com", self.cy.pk, "enrolled"),
+                (first_row + 2, "ghost", None, "not_found"),
+                (first_row + 3, "ada", self.ada.pk, "already_enrolled"),
+                (first_row + 4, "bob", self.bob.pk, "already_enrolled"),
+            ],
+        )
+        self.assertEqual(data["summary"], {"enrolled": 2, "already_enrolled": 2, "not_found": 1})
+        self.assertNotIn("error", data)
+        self.classroom.refresh_from_db()
+        self.assertEqual(self.classroom.student_count, 3)
+        self.assertEqual(
+            set(Enrollment.objects.filter(classroom=self.classroom).values_list("student_id", flat=True)),
+            {self.ada.pk, self.bob.pk, self.cy.pk},
+        )
+
+    def test_csv_upload(self):
+        upload = SimpleUploadedFile("roster.csv", b"username\nbob\ncy@example.com\nghost\nada\nbob\n", "text/csv")
+        self.assert_imported(self.import_roster({"file": upload}, format="multipart"), first_row=2)
+
+    def test_json_upload(self):
+        self.assert_imported(self.import_roster(["bob", "cy@example.com", "ghost", "ada", "bob"], format="json"))
+
+    def test_ndjson_upload(self):
+        body = '"bob"\n"cy@example.com"\n\n"ghost"\n"ada"\n"bob"\n'
+        self.assert_imported(self.import_roster(body, content_type="application/x-ndjson"))
+
+    def test_large_json_lists_are_rejected(self):
+        response = self.client.post(self.url, {"students": ["bob"] * 1001}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_ndjson_stops_the_import(self):
+        data = self.import_roster('"bob"\n{"cy\n', content_type="application/x-ndjson")
+        self.assertEqual(data["results"], [])
+        self.assertIn("invalid row", data["error"])
+
+    def test_database_error_stops_the_import(self):
+        roster_import = RosterImport(self.classroom, read_json_students(["bob", "cy", "ghost"]), batch_size=1)
+        with mock.patch.object(RosterImport, "enroll", side_effect=[{self.bob.pk}, DatabaseError("lost")]), \
+                self.assertLogs("trex.enrollment.roster", "ERROR"):
+            data = json.loads("".join(roster_import.stream_payload()))["data"]
+        self.assertEqual([result["status"] for result in data["results"]], ["enrolled"])
+        self.assertEqual(data["summary"], {"enrolled": 1, "already_enrolled": 0, "not_found": 0})
+        self.assertIn("database error", data["error"])
+
+
+class EnrollmentExportTests(TestCase):
+    databases = {"default", "replica"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username="teacher", password="password", role="teacher")
+        cls.classroom = Classroom.objects.create_with_code(teacher=cls.teacher, classroom_name="Algebra")
+        cls.ada = User.objects.create_user(
+            username="ada", password="password", role="student", first_name="Ada", last_name="Lovelace",
+        )
+        cls.bob = User.objects.create_user(username="bob", password="password", role="student", first_name="Bob")
+        cls.enrollments = [
+            Enrollment.objects.enroll(student, cls.classroom.classroom_code) for student in (cls.ada, cls.bob)
+        ]
+        cls.url = f"/api/classrooms/{cls.classroom.classroom_id}/enrollments/export/"
+
+    def export(self, user=None, params=None, **headers):
+        client = APIClient()
+        client.force_authenticate(user or self.teacher)
+        return client.get(self.url, params, headers=headers)
+
+    def date_joined(self, student):
+        enrollment = next(enrollment for enrollment in self.enrollments if enrollment.student_id == student.pk)
+        return DateTimeField().to_representation(enrollment.date_joined)
+
+    def test_csv(self):
+        response = self.export()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertEqual(
+            response["Content-Disposition"],
+            f'attachment; filename="classroom-{self.classroom.classroom_id}-roster.csv"',
+        )
+        self.assertEqual(b"".join(response.streaming_content).decode(), (
+            "student_id,student_name,date_joined\r\n"
+            f"{self.ada.pk},Ada Lovelace,{self.date_joined(self.ada)}\r\n"
+            f"{self.bob.pk},Bob,{self.date_joined(self.bob)}\r\n"
+        ))
+
+    def test_ndjson(self):
+        expected = [
+            {"student_id": self.ada.pk, "student_name": "Ada Lovelace", "date_joined": self.date_joined(self.ada)},
+            {"student_id": self.bob.pk, "student_name": "Bob", "date_joined": self.date_joined(self.bob)},
+        ]
+        for response in (self.export(params={"format": "ndjson"}), self.export(accept="application/x-ndjson")):
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+            self.assertTrue(response["Content-Disposition"].endswith('-roster.ndjson"'))
+            lines = b"".join(response.streaming_content).decode().splitlines()
+            self.assertEqual([json.loads(line) for line in lines], expected)
 
-# Create your tests here.
+    def test_only_the_teacher_of_the_classroom_or_admins(self):
+        other_teacher = User.objects.create_user(username="other", password="password", role="teacher")
+        for user in (self.ada, other_teacher):
+            response = self.export(user)
+            self.assertEqual(response.status_code, 403)
+            # errors are not rendered as csv
+            self.assertEqual(response["Content-Type"], "application/json")
+            self.assertFalse(response.json()["success"])
+        admin = User.objects.create_superuser(username="admin", password="password")
+        self.assertEqual(self.export(admin).status_code, 200)
+        self.assertEqual(APIClient().get(self.url).status_code, 401)
@@ -2,11 +2,15 @@ from django.urls import path, include
 
 from .views import (
     EnrollmentListView,
+    EnrollmentImportView,
+    EnrollmentExportView,
 )
 
 app_name = "enrollment"
 
 urlpatterns = [
     path('', EnrollmentListView.as_view(), name='list'),
+    path('import/', EnrollmentImportView.as_view(), name='import'),
+    path('export/', EnrollmentExportView.as_view(), name='export'),
     # path('create/', EnrollmentCreateView.as_view(), name='create'),
 ]
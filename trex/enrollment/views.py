@@ -1,6 +1,9 @@
-from django.http import Http404
+from collections.abc import Iterator
 
-from rest_framework import status
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
+
+from rest_framework import serializers, status
 from rest_framework.response import Response
 from rest_framework.generics import (
     ListAPIView,
@@ -9,13 +12,15 @@ from rest_framework.generics import (
     UpdateAPIView,
     DestroyAPIView,
 )
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
+from core.export import EXPORT_CHUNK_SIZE, ExportAPIView
+from core.filters import FullTextSearchFilter, SearchRankOrderingFilter
+from core.parsers import NDJSONParser, ORJSONParser
+from core.pagination import CursorPagination
 from core.utils import response_payload
-from rest_framework.filters import (
-    SearchFilter,
-    OrderingFilter,
-)
 from trex.user.permissions import (
     IsTeacher,
     IsAdmin,
@@ -23,9 +28,12 @@ from trex.user.permissions import (
     IsStudent,
 )
 from .models import Enrollment
+from .roster import RosterImport, read_csv_students, read_json_students
+from trex.classroom.models import Classroom
 from .serializers import (
     EnrollmentDetailSerializer,
     EnrollmentCreateSerializer,
+    EnrollmentImportSerializer,
 )
 
 
@@ -36,14 +44,17 @@ class EnrollmentListView(ListAPIView):
     Only teacher of current classroom can access this view.
     Searching is allowed on student__first_name, student__last_name, student__id, classroom__classroom_name, classroom__classroom_id
     Ordering is allowed on student__first_name, student__last_name, student__id, classroom__classroom_name, classroom__classroom_id, date_joined
+    Search results are ordered by relevance unless an ordering is requested.
+    Results are cursor paginated on enrollment_id, use the `next` and `previous` links to fetch other pages.
     """
 
     permission_classes = [IsAuthenticated & (IsTeacherOfThisClassroom | IsAdmin), ]
     serializer_class = EnrollmentDetailSerializer
+    pagination_class = CursorPagination
     # lookup_field = "classroom_id"
     filter_backends = [
-        SearchFilter,
-        OrderingFilter
+        FullTextSearchFilter,
+        SearchRankOrderingFilter
     ]
 
     search_fields = [
@@ -54,6 +65,16 @@ class EnrollmentListView(ListAPIView):
         'classroom__classroom_id',
     ]
 
+    # see core.filters.FullTextSearchFilter, set to False to fall back to icontains search on search_fields
+    full_text_search = True
+    trigram_search_fields = [
+        'student__first_name',
+        'student__last_name',
+    ]
+    search_exact_fields = [
+        'student__id',
+    ]
+
     ordering_fields = [
         'student__first_name',
         'student__last_name',
@@ -63,30 +84,33 @@ class EnrollmentListView(ListAPIView):
         'date_joined',
     ]
 
+    ordering = 'enrollment_id'
+
     def get_queryset(self):
         classroom_id = self.kwargs['classroom_id']
         return Enrollment.objects.filter(classroom_id=classroom_id)
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
+        # fetch only the serialized columns as dicts, see core.serializers.ValuesListSerializer
+        queryset = self.get_serializer(many=True).get_values_queryset(queryset)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
         # handle empty results
         if len(serializer.data) == 0:
-            return Response(
+            return self.get_paginated_response(
                 response_payload(
                     success=True,
                     message="No enrollments found",
                     data=serializer.data,
-                ),
-                status=status.HTTP_200_OK,
+                )
             )
-        return Response(
+        return self.get_paginated_response(
             response_payload(
                 success=True,
                 message="Enrollments fetched successfully",
                 data=serializer.data,
-            ),
-            status=status.HTTP_200_OK,
+            )
         )
 
 
@@ -95,6 +119,8 @@ class EnrollmentCreateView(CreateAPIView):
     Create a new enrollment.
 
     Only student can enroll in a classroom, using the classroom_code.
+    The code lookup, the insert and the student_count update run as a single statement,
+    see Enrollment.objects.enroll.
     """
 
     permission_classes = [IsAuthenticated & IsStudent, ]
@@ -104,9 +130,20 @@ class EnrollmentCreateView(CreateAPIView):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            # check if student is already enrolled in this classroom
             classroom_code = serializer.validated_data.get('classroom_code')
-            if Enrollment.objects.filter(classroom__classroom_code=classroom_code, student=request.user).exists():
+            try:
+                enrollment = Enrollment.objects.enroll(student=request.user, classroom_code=classroom_code)
+            except Classroom.DoesNotExist:
+                return Response(
+                    response_payload(
+                        success=False,
+                        message="User enrollment failed",
+                        data={api_settings.NON_FIELD_ERRORS_KEY: ["Invalid classroom code"]},
+                    ),
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            # nothing was inserted, student is already enrolled in this classroom
+            if enrollment is None:
                 return Response(
                     response_payload(
                         success=False,
@@ -114,12 +151,11 @@ class EnrollmentCreateView(CreateAPIView):
                     ),
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            serializer.save()
             return Response(
                 response_payload(
                     success=True,
                     message="User enrolled successfully",
-                    data=serializer.data,
+                    data=self.get_serializer(enrollment).data,
                 ),
                 status=status.HTTP_201_CREATED,
             )
@@ -145,12 +181,15 @@ class EnrollmentDeleteView(DestroyAPIView):
     lookup_field = "classroom_id"
 
     def get_queryset(self):
-        return Enrollment.objects.filter(student=self.request.user)
+        # locked, so a concurrent un-enroll waits and then finds nothing to delete,
+        # student_count is decremented once per deleted row, see trex.classroom.signals
+        return Enrollment.objects.filter(student=self.request.user).select_for_update()
 
     def destroy(self, request, *args, **kwargs):
         try:
-            instance = self.get_object()
-            instance.delete()
+            with transaction.atomic():
+                instance = self.get_object()
+                instance.delete()
             return Response(
                 response_payload(
                     success=True,
@@ -166,3 +205,96 @@ class EnrollmentDeleteView(DestroyAPIView):
                 ),
                 status=status.HTTP_404_NOT_FOUND,
             )
+
+
+class EnrollmentImportView(CreateAPIView):
+    """
+    Bulk enroll students into the current classroom.
+    User must be authenticated and teacher of the classroom or admin.
+
+    Accepts a multipart upload with a CSV `file` (one username or email per row),
+    an `application/x-ndjson` body with one username or email per line,
+    or a JSON list of up to 1000 usernames/emails (optionally as {"students": [...]}).
+    CSV and NDJSON are read as the students are imported, use them for larger rosters.
+    Students are enrolled in batches and the per-row results are streamed back
+    in data.results, with the totals in data.summary. If a batch fails, the import stops
+    there and data.error says so.
+    """
+
+    permission_classes = [IsAuthenticated & (IsTeacherOfThisClassroom | IsAdmin), ]
+    serializer_class = EnrollmentImportSerializer
+    parser_classes = [ORJSONParser, NDJSONParser, MultiPartParser]
+
+    def create(self, request, *args, **kwargs):
+        try:
+            classroom = Classroom.objects.get(classroom_id=self.kwargs['classroom_id'])
+        except Classroom.DoesNotExist:
+            return Response(
+                response_payload(
+                    success=False,
+                    message="Classroom not found",
+                ),
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        data = request.data
+        if isinstance(data, Iterator):
+            # NDJSON, read as the import consumes it, see core.parsers.NDJSONParser
+            return self.stream_import(classroom, read_json_students(data))
+        if isinstance(data, list):
+            data = {'students': data}
+        serializer = self.get_serializer(data=data)
+        if not serializer.is_valid():
+            return Response(
+                response_payload(
+                    success=False,
+                    message="Roster import failed",
+                    data=serializer.errors,
+                ),
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if serializer.validated_data.get('file'):
+            students = read_csv_students(serializer.validated_data['file'])
+        else:
+            students = read_json_students(serializer.validated_data['students'])
+        return self.stream_import(classroom, students)
+
+    @staticmethod
+    def stream_import(classroom, students):
+        roster_import = RosterImport(classroom, students)
+        return StreamingHttpResponse(
+            roster_import.stream_payload(),
+            content_type='application/json',
+            status=status.HTTP_200_OK,
+        )
+
+
+class EnrollmentExportView(ExportAPIView):
+    """
+    Export the roster of the current classroom (student_id, student_name, date_joined).
+    User must be authenticated and teacher of the classroom or admin.
+    Returns CSV by default, or NDJSON with ?format=ndjson. The rows are streamed.
+    """
+
+    permission_classes = [IsAuthenticated & (IsTeacherOfThisClassroom | IsAdmin), ]
+    export_header = ('student_id', 'student_name', 'date_joined')
+
+    def get_export_filename(self):
+        return f"classroom-{self.kwargs['classroom_id']}-roster"
+
+    def get_export_rows(self):
+        enrollments = Enrollment.objects.filter(
+            classroom_id=self.kwargs['classroom_id'],
+        ).order_by('enrollment_id').values_list(
+            'student_id',
+            'student__first_name',
+            'student__last_name',
+            'date_joined',
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+        date_joined_field = serializers.DateTimeField()
+        for student_id, first_name, last_name, date_joined in enrollments:
+            # same as User.get_full_name
+            student_name = f"{first_name} {last_name}".strip()
+            yield student_id, student_name, date_joined_field.to_representation(date_joined)
@@ -0,0 +1,17 @@
+from django.contrib import admin
+from .models import Change
+
+# Register your models here.
+
+
+@admin.register(Change)
+class ChangeAdmin(admin.ModelAdmin):
+    list_display = (
+        "change_id",
+        "model",
+        "object_id",
+        "classroom_id",
+        "user_id",
+        "deleted",
+        "changed_at",
+    )
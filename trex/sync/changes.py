@@ -0,0 +1,207 @@
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Q
+
+from trex.assignment.models import Assignment
+from trex.classroom.models import Classroom
+from trex.enrollment.models import Enrollment
+from trex.enrollment.serializers import EnrollmentDetailSerializer
+from trex.user.membership import get_membership
+from .models import Change
+from .serializers import (
+    StudentAssignmentSyncSerializer,
+    StudentClassroomSyncSerializer,
+    TeacherAssignmentSyncSerializer,
+    TeacherClassroomSyncSerializer,
+)
+
+MODELS = {
+    'classroom': ('classrooms', Classroom),
+    'assignment': ('assignments', Assignment),
+    'enrollment': ('enrollments', Enrollment),
+}
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+@contextmanager
+def sync_snapshot():
+    """
+    Run the block in a single REPEATABLE READ transaction on the primary,
+    so the cursor and all the rows read in it come from the same snapshot.
+    """
+    connection = connections[DEFAULT_DB_ALIAS]
+    outermost = not connection.in_atomic_block
+    with transaction.atomic():
+        if outermost:
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        yield
+
+
+def current_cursor():
+    """
+    The cursor of the current snapshot, its xmin and the time it was issued.
+
+    Every transaction older than xmin has finished, so the snapshot saw all of their changes,
+    and the next sync only needs the changes of transactions from xmin on.
+    """
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+        xmin = cursor.fetchone()[0]
+    return f"{xmin}.{int(time.time())}"
+
+
+def parse_cursor(cursor):
+    """
+    Return the transaction id of a cursor, or None if it is too old, its changes may have been pruned.
+    Raises InvalidCursor for anything that is not a cursor.
+    """
+    try:
+        xmin, issued_at = (int(part) for part in cursor.split('.'))
+    except ValueError:
+        raise InvalidCursor(cursor)
+    if issued_at < time.time() - getattr(settings, 'SYNC_RETENTION_DAYS', 30) * 24 * 60 * 60:
+        return None
+    return xmin
+
+
+class Sync:
+    """
+    The classrooms, assignments and enrollments a user can see, as full data or as the changes since a cursor.
+
+    Teachers (and admins without a role, who see everything) get the teacher representation,
+    students the student one, like the list endpoints.
+    A deleted id means the record was deleted or is no longer visible to the user,
+    a deleted classroom takes its assignments and enrollments with it.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.user = request.user
+        self.membership = get_membership(request)
+        if self.user.role in ('teacher', 'student'):
+            self.role = self.user.role
+        else:
+            self.role = 'admin' if self.user.is_superuser else None
+
+    def get_queryset(self, model):
+        """
+        The visible records of a model, mirroring the list endpoints.
+        """
+        model_class = MODELS[model][1]
+        if self.role == 'admin':
+            return model_class.objects.order_by()
+        elif self.role == 'teacher':
+            return model_class.objects.filter(classroom_id__in=self.membership.teacher_ids).order_by()
+        elif self.role == 'student':
+            if model == 'enrollment':
+                return Enrollment.objects.filter(student=self.user).order_by()
+            queryset = model_class.objects.filter(classroom_id__in=self.membership.student_ids)
+            if model == 'assignment':
+                queryset = queryset.filter(status='published')
+            return queryset.order_by()
+        return model_class.objects.none()
+
+    def get_serializer_class(self, model):
+        if model == 'classroom':
+            return StudentClassroomSyncSerializer if self.role == 'student' else TeacherClassroomSyncSerializer
+        elif model == 'assignment':
+            return StudentAssignmentSyncSerializer if self.role == 'student' else TeacherAssignmentSyncSerializer
+        return EnrollmentDetailSerializer
+
+    def serialize(self, model, queryset):
+        return self.get_serializer_class(model)(queryset, many=True).data
+
+    def get_changes(self, since):
+        """
+        The changes of transactions from `since` on that are visible to the user, or None if there are
+        more than settings.SYNC_MAX_CHANGES, a full resync is cheaper then.
+        """
+        changes = Change.objects.filter(transaction_id__gte=since)
+        if self.role == 'teacher':
+            # user_id catches the deletion of the teacher's own classrooms, which are no longer in membership
+            changes = changes.filter(
+                Q(classroom_id__in=self.membership.teacher_ids) | Q(model='classroom', user_id=self.user.pk)
+            )
+        elif self.role == 'student':
+            # user_id catches the student's own enrollments in classrooms they left
+            changes = changes.filter(
+                Q(model__in=('classroom', 'assignment'), classroom_id__in=self.membership.student_ids)
+                | Q(model='enrollment', user_id=self.user.pk)
+            )
+        elif self.role is None:
+            changes = changes.none()
+
+        max_changes = getattr(settings, 'SYNC_MAX_CHANGES', 5000)
+        changes = list(changes.order_by().values_list('model', 'object_id', 'classroom_id', 'deleted')[:max_changes + 1])
+        if len(changes) > max_changes:
+            return None
+        return changes
+
+    def full(self):
+        return {
+            key: {'updated': self.serialize(model, self.get_queryset(model)), 'deleted': []}
+            for model, (key, _) in MODELS.items()
+        }
+
+    def delta(self, changes):
+        """
+        Collapse the changes to one entry per record: the record's current data if it is visible, else its id.
+
+        A student's new enrollment also sends the classroom and all of its visible assignments,
+        which changed before the cursor and so are not in the changes.
+        A classroom reassigned to another teacher is deleted for the previous one together with
+        its assignments and enrollments, which did not change themselves.
+        """
+        changed_ids = {model: set() for model in MODELS}
+        joined_classroom_ids = set()
+        for model, object_id, classroom_id, deleted in changes:
+            changed_ids[model].add(object_id)
+            if model == 'enrollment' and self.role == 'student':
+                # the student left or joined the classroom, unless they enrolled again or left since
+                changed_ids['classroom'].add(classroom_id)
+                if not deleted:
+                    joined_classroom_ids.add(classroom_id)
+
+        data = {}
+        lost_classroom_ids = []
+        for model, (key, model_class) in MODELS.items():
+            ids = changed_ids[model]
+            if model != 'classroom' and lost_classroom_ids:
+                # rows of deleted classrooms are gone, those of reassigned ones are not
+                lost = model_class.objects.filter(classroom_id__in=lost_classroom_ids)
+                ids |= set(lost.values_list('pk', flat=True))
+            if model == 'assignment' and joined_classroom_ids:
+                queryset = self.get_queryset(model).filter(Q(pk__in=ids) | Q(classroom_id__in=joined_classroom_ids))
+            elif ids:
+                queryset = self.get_queryset(model).filter(pk__in=ids)
+            else:
+                data[key] = {'updated': [], 'deleted': []}
+                continue
+            updated = self.serialize(model, queryset)
+            visible_ids = {row[model_class._meta.pk.name] for row in updated}
+            data[key] = {'updated': updated, 'deleted': sorted(ids - visible_ids)}
+            if model == 'classroom' and self.role == 'teacher':
+                lost_classroom_ids = data[key]['deleted']
+        return data
+
+    def get_payload(self, cursor=None):
+        """
+        Everything visible if cursor is None, else the changes since the cursor.
+        Falls back to everything, with reset set, for cursors that are too old or too far behind.
+        """
+        with sync_snapshot():
+            new_cursor = current_cursor()
+            since = parse_cursor(cursor) if cursor else None
+            changes = self.get_changes(since) if since is not None else None
+            if changes is None:
+                data = self.full()
+            else:
+                data = self.delta(changes)
+        return {'cursor': new_cursor, 'reset': cursor is not None and changes is None, **data}
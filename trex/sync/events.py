@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+from django.conf import settings
+from django.db import transaction
+
+from core.events import get_broker
+
+# Events are notifications that carry ids only, clients fetch the data with a delta sync (see trex.sync.changes).
+# Every classroom has a channel per audience, so nobody receives an event twice or sees events meant for teachers.
+
+
+def teachers_channel(classroom_id):
+    return f"classroom:{classroom_id}:teachers"
+
+
+def students_channel(classroom_id):
+    return f"classroom:{classroom_id}:students"
+
+
+def encode_event(event_type, data):
+    """
+    A server-sent event, encoded once for all subscribers.
+    """
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+def publish(channel, event_type, data):
+    """
+    Publish an event once the current transaction commits, so subscribers never hear of rolled back changes
+    and can fetch the changed data right away.
+    """
+    message = encode_event(event_type, data)
+    transaction.on_commit(lambda: get_broker().publish(channel, message))
+
+
+def assignment_changed(assignment, was_published, deleted=False):
+    """
+    Teachers hear of every change, students see assignments appear when they are published
+    and disappear when they are deleted or moved back to draft.
+    """
+    data = {"classroom_id": assignment.classroom_id, "assignment_id": assignment.assignment_id}
+    is_published = not deleted and assignment.status == "published"
+
+    if deleted:
+        event_type = "assignment.deleted"
+    elif was_published is None:
+        event_type = "assignment.created"
+    else:
+        event_type = "assignment.updated"
+    publish(teachers_channel(assignment.classroom_id), event_type, data)
+
+    if is_published and not was_published:
+        publish(students_channel(assignment.classroom_id), "assignment.published", data)
+    elif is_published:
+        publish(students_channel(assignment.classroom_id), "assignment.updated", data)
+    elif was_published:
+        publish(students_channel(assignment.classroom_id), "assignment.deleted", data)
+
+
+# Roster imports enroll up to a thousand students at once, events are split so they fit a NOTIFY payload.
+ROSTER_EVENT_MAX_STUDENTS = 500
+
+
+def roster_changed(classroom_id, enrolled=(), unenrolled=()):
+    """
+    Tell the classroom's teachers which students joined or left.
+    """
+    enrolled, unenrolled = list(enrolled), list(unenrolled)
+    for start in range(0, max(len(enrolled), len(unenrolled), 1), ROSTER_EVENT_MAX_STUDENTS):
+        publish(teachers_channel(classroom_id), "roster.changed", {
+            "classroom_id": classroom_id,
+            "enrolled": enrolled[start:start + ROSTER_EVENT_MAX_STUDENTS],
+            "unenrolled": unenrolled[start:start + ROSTER_EVENT_MAX_STUDENTS],
+        })
+
+
+async def event_stream(channels, classroom_ids):
+    """
+    The server-sent events of a set of channels, until settings.EVENTS_MAX_CONNECTION_SECONDS pass
+    or the client falls too far behind. Either way the client reconnects after the retry delay.
+    Idle streams get a comment every settings.EVENTS_KEEPALIVE_SECONDS.
+    """
+    loop = asyncio.get_running_loop()
+    keepalive = getattr(settings, 'EVENTS_KEEPALIVE_SECONDS', 15)
+    deadline = loop.time() + getattr(settings, 'EVENTS_MAX_CONNECTION_SECONDS', 60)
+    subscription = get_broker().subscribe(channels, maxsize=getattr(settings, 'EVENTS_QUEUE_SIZE', 100))
+    try:
+        # events published between the client's last sync and now were missed, it should sync on `ready`
+        yield b"retry: 3000\n" + encode_event("ready", {"classroom_ids": sorted(classroom_ids)})
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                message = await subscription.get(timeout=min(keepalive, remaining))
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if message is None:
+                return
+            yield message
+    finally:
+        subscription.close()
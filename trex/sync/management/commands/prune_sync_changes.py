@@ -0,0 +1,31 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from trex.sync.models import Change
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete sync changes older than settings.SYNC_RETENTION_DAYS. "
+        "Clients with older cursors get a full resync, see trex.sync.changes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the changes that would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        retention = datetime.timedelta(days=getattr(settings, "SYNC_RETENTION_DAYS", 30))
+        # a day of margin over the cursors' age check, for clock differences between the servers
+        expired = Change.objects.filter(changed_at__lt=timezone.now() - retention - datetime.timedelta(days=1))
+        if options["dry_run"]:
+            self.stdout.write(f"{expired.count()} change(s) would be deleted")
+            return
+        deleted, _ = expired.delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} change(s)"))
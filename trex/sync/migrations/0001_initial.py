@@ -0,0 +1,115 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+SYNC_CHANGE_TRIGGERS_SQL = """
+CREATE FUNCTION sync_change_record() RETURNS trigger AS $$
+DECLARE
+    record_data jsonb;
+BEGIN
+    -- TG_ARGV: model name, primary key column, user column (empty if none)
+    IF TG_OP = 'DELETE' THEN
+        record_data := to_jsonb(OLD);
+    ELSE
+        record_data := to_jsonb(NEW);
+    END IF;
+    INSERT INTO sync_change (model, object_id, classroom_id, user_id, deleted, transaction_id, changed_at)
+    VALUES (
+        TG_ARGV[0],
+        (record_data ->> TG_ARGV[1])::integer,
+        (record_data ->> 'classroom_id')::integer,
+        (record_data ->> TG_ARGV[2])::bigint,
+        TG_OP = 'DELETE',
+        pg_current_xact_id()::text::bigint,
+        now()
+    );
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER classroom_classroom_sync_change_trigger
+AFTER INSERT OR UPDATE OR DELETE ON classroom_classroom
+FOR EACH ROW EXECUTE FUNCTION sync_change_record('classroom', 'classroom_id', 'teacher_id');
+
+CREATE TRIGGER assignment_assignment_sync_change_trigger
+AFTER INSERT OR UPDATE OR DELETE ON assignment_assignment
+FOR EACH ROW EXECUTE FUNCTION sync_change_record('assignment', 'assignment_id', '');
+
+CREATE TRIGGER enrollment_enrollment_sync_change_trigger
+AFTER INSERT OR UPDATE OR DELETE ON enrollment_enrollment
+FOR EACH ROW EXECUTE FUNCTION sync_change_record('enrollment', 'enrollment_id', 'student_id');
+
+-- enrollments carry the student's name
+CREATE FUNCTION sync_change_record_student_name() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO sync_change (model, object_id, classroom_id, user_id, deleted, transaction_id, changed_at)
+    SELECT 'enrollment', enrollment_id, classroom_id, student_id, false, pg_current_xact_id()::text::bigint, now()
+    FROM enrollment_enrollment WHERE student_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER user_user_sync_change_trigger
+AFTER UPDATE OF first_name, last_name ON user_user
+FOR EACH ROW
+WHEN (OLD.first_name IS DISTINCT FROM NEW.first_name OR OLD.last_name IS DISTINCT FROM NEW.last_name)
+EXECUTE FUNCTION sync_change_record_student_name();
+"""
+
+SYNC_CHANGE_TRIGGERS_REVERSE_SQL = """
+DROP TRIGGER IF EXISTS user_user_sync_change_trigger ON user_user;
+DROP TRIGGER IF EXISTS enrollment_enrollment_sync_change_trigger ON enrollment_enrollment;
+DROP TRIGGER IF EXISTS assignment_assignment_sync_change_trigger ON assignment_assignment;
+DROP TRIGGER IF EXISTS classroom_classroom_sync_change_trigger ON classroom_classroom;
+DROP FUNCTION IF EXISTS sync_change_record_student_name();
+DROP FUNCTION IF EXISTS sync_change_record();
+"""
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ("assignment", "0004_assignment_updated_at"),
+        ("classroom", "0007_classroom_updated_at"),
+        ("enrollment", "0003_enrollment_enrollment_classroom_id"),
+        ("user", "0004_user_token_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Change",
+            fields=[
+                ("change_id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "model",
+                    models.CharField(
+                        choices=[
+                            ("classroom", "Classroom"),
+                            ("assignment", "Assignment"),
+                            ("enrollment", "Enrollment"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("object_id", models.IntegerField()),
+                ("classroom_id", models.IntegerField()),
+                ("user_id", models.BigIntegerField(null=True)),
+                ("deleted", models.BooleanField(default=False)),
+                ("transaction_id", models.BigIntegerField()),
+                ("changed_at", models.DateTimeField()),
+            ],
+            options={
+                "verbose_name": "Change",
+                "verbose_name_plural": "Changes",
+                "ordering": ("change_id",),
+                "indexes": [
+                    models.Index(
+                        fields=["transaction_id"], name="sync_change_transaction"
+                    ),
+                    models.Index(fields=["changed_at"], name="sync_change_changed_at"),
+                ],
+            },
+        ),
+        migrations.RunSQL(SYNC_CHANGE_TRIGGERS_SQL, SYNC_CHANGE_TRIGGERS_REVERSE_SQL),
+    ]
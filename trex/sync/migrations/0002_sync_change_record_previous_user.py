@@ -0,0 +1,84 @@
+# Generated by Django 4.2.6 on 2026-10-18 18:20
+
+from django.db import migrations
+
+# An update that moves the record away from a user (a classroom reassigned to another teacher) also records
+# a change for the previous user, so their next sync drops the record. The record is no longer visible to them,
+# the change is sent to them as a deletion, see trex.sync.changes.Sync.delta.
+SYNC_CHANGE_RECORD_SQL = """
+CREATE OR REPLACE FUNCTION sync_change_record() RETURNS trigger AS $$
+DECLARE
+    record_data jsonb;
+    previous_user_id text;
+BEGIN
+    -- TG_ARGV: model name, primary key column, user column (empty if none)
+    IF TG_OP = 'DELETE' THEN
+        record_data := to_jsonb(OLD);
+    ELSE
+        record_data := to_jsonb(NEW);
+    END IF;
+    INSERT INTO sync_change (model, object_id, classroom_id, user_id, deleted, transaction_id, changed_at)
+    VALUES (
+        TG_ARGV[0],
+        (record_data ->> TG_ARGV[1])::integer,
+        (record_data ->> 'classroom_id')::integer,
+        (record_data ->> TG_ARGV[2])::bigint,
+        TG_OP = 'DELETE',
+        pg_current_xact_id()::text::bigint,
+        now()
+    );
+    IF TG_OP = 'UPDATE' AND TG_ARGV[2] <> '' THEN
+        previous_user_id := to_jsonb(OLD) ->> TG_ARGV[2];
+        IF previous_user_id IS DISTINCT FROM record_data ->> TG_ARGV[2] THEN
+            INSERT INTO sync_change (model, object_id, classroom_id, user_id, deleted, transaction_id, changed_at)
+            VALUES (
+                TG_ARGV[0],
+                (record_data ->> TG_ARGV[1])::integer,
+                (record_data ->> 'classroom_id')::integer,
+                previous_user_id::bigint,
+                false,
+                pg_current_xact_id()::text::bigint,
+                now()
+            );
+        END IF;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+SYNC_CHANGE_RECORD_REVERSE_SQL = """
+CREATE OR REPLACE FUNCTION sync_change_record() RETURNS trigger AS $$
+DECLARE
+    record_data jsonb;
+BEGIN
+    -- TG_ARGV: model name, primary key column, user column (empty if none)
+    IF TG_OP = 'DELETE' THEN
+        record_data := to_jsonb(OLD);
+    ELSE
+        record_data := to_jsonb(NEW);
+    END IF;
+    INSERT INTO sync_change (model, object_id, classroom_id, user_id, deleted, transaction_id, changed_at)
+    VALUES (
+        TG_ARGV[0],
+        (record_data ->> TG_ARGV[1])::integer,
+        (record_data ->> 'classroom_id')::integer,
+        (record_data ->> TG_ARGV[2])::bigint,
+        TG_OP = 'DELETE',
+        pg_current_xact_id()::text::bigint,
+        now()
+    );
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sync", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunSQL(SYNC_CHANGE_RECORD_SQL, SYNC_CHANGE_RECORD_REVERSE_SQL),
+    ]
@@ -0,0 +1,43 @@
+from django.db import models
+
+# Create your models here.
+
+
+class Change(models.Model):
+    """
+    One row per insert, update or delete of a classroom, assignment or enrollment.
+
+    Written by database triggers (see migration 0001), so raw SQL, bulk_create and queryset updates
+    are recorded like any save(). Renaming a student records a change of each of their enrollments,
+    which carry the student's name. Read by the sync endpoint, see trex.sync.changes.
+    """
+    model_choices = (
+        ('classroom', 'Classroom'),
+        ('assignment', 'Assignment'),
+        ('enrollment', 'Enrollment'),
+    )
+
+    change_id = models.BigAutoField(primary_key=True)
+    model = models.CharField(max_length=20, choices=model_choices)
+    object_id = models.IntegerField()
+    # plain columns rather than foreign keys, tombstones outlive the rows they describe
+    classroom_id = models.IntegerField()
+    # the teacher of a classroom, the student of an enrollment, null for assignments
+    user_id = models.BigIntegerField(null=True)
+    deleted = models.BooleanField(default=False)
+    # pg_current_xact_id() of the writing transaction, sync cursors are transaction snapshots
+    transaction_id = models.BigIntegerField()
+    changed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} {'deleted' if self.deleted else 'changed'}"
+
+    class Meta:
+        ordering = ('change_id',)
+        verbose_name_plural = 'Changes'
+        verbose_name = 'Change'
+        indexes = [
+            models.Index(fields=['transaction_id'], name='sync_change_transaction'),
+            # pruning, see manage.py prune_sync_changes
+            models.Index(fields=['changed_at'], name='sync_change_changed_at'),
+        ]
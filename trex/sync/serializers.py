@@ -0,0 +1,24 @@
+from trex.assignment.serializers import StudentAssignmentListSerializer, TeacherAssignmentListSerializer
+from trex.classroom.serializers import StudentClassroomListSerializer, TeacherClassroomListSerializer
+
+# The list endpoints' representations of classrooms and assignments, with what an offline client needs to place and update each record.
+
+
+class TeacherClassroomSyncSerializer(TeacherClassroomListSerializer):
+    class Meta(TeacherClassroomListSerializer.Meta):
+        fields = TeacherClassroomListSerializer.Meta.fields + ("updated_at",)
+
+
+class StudentClassroomSyncSerializer(StudentClassroomListSerializer):
+    class Meta(StudentClassroomListSerializer.Meta):
+        fields = StudentClassroomListSerializer.Meta.fields + ("updated_at",)
+
+
+class TeacherAssignmentSyncSerializer(TeacherAssignmentListSerializer):
+    class Meta(TeacherAssignmentListSerializer.Meta):
+        fields = TeacherAssignmentListSerializer.Meta.fields + ("classroom_id", "updated_at")
+
+
+class StudentAssignmentSyncSerializer(StudentAssignmentListSerializer):
+    class Meta(StudentAssignmentListSerializer.Meta):
+        fields = StudentAssignmentListSerializer.Meta.fields + ("classroom_id", "updated_at")
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import events
+
+
+@receiver(post_save, sender="assignment.Assignment")
+def assignment_saved(sender, instance, created, **kwargs):
+    # the status the row had before this save, see Assignment.from_db
+    was_published = None if created else getattr(instance, "_loaded_status", None) == "published"
+    events.assignment_changed(instance, was_published)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender="assignment.Assignment")
+def assignment_deleted(sender, instance, **kwargs):
+    events.assignment_changed(instance, getattr(instance, "_loaded_status", None) == "published", deleted=True)
+
+
+@receiver(post_save, sender="enrollment.Enrollment")
+def enrollment_saved(sender, instance, created, **kwargs):
+    if created:
+        events.roster_changed(instance.classroom_id, enrolled=[instance.student_id])
+
+
+@receiver(post_delete, sender="enrollment.Enrollment")
+def enrollment_deleted(sender, instance, **kwargs):
+    events.roster_changed(instance.classroom_id, unenrolled=[instance.student_id])
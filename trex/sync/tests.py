@@ -0,0 +1,43 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from trex.assignment.models import Assignment
+from trex.classroom.models import Classroom
+from trex.enrollment.models import Enrollment
+from trex.user.models import User
+
+
+class ClassroomReassignmentSyncTests(TestCase):
+    databases = {"default", "replica"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username="teacher", password="password", role="teacher")
+        cls.admin = User.objects.create_superuser(username="admin", password="password")
+        student = User.objects.create_user(username="student", password="password", role="student")
+        cls.classroom = Classroom.objects.create_with_code(teacher=cls.teacher, classroom_name="Algebra")
+        cls.assignment = Assignment.objects.create(classroom=cls.classroom, assignment_name="Homework")
+        cls.enrollment = Enrollment.objects.create(classroom=cls.classroom, student=student)
+
+    def sync(self, user, cursor=None):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get("/api/sync/", {"cursor": cursor} if cursor else {})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["data"]
+
+    def test_previous_teacher_drops_a_reassigned_classroom(self):
+        data = self.sync(self.teacher)
+        self.assertEqual([row["classroom_id"] for row in data["classrooms"]["updated"]], [self.classroom.classroom_id])
+
+        # e.g. from the admin site
+        classroom = Classroom.objects.get(pk=self.classroom.pk)
+        classroom.teacher = self.admin
+        with self.captureOnCommitCallbacks(execute=True):
+            classroom.save()
+
+        delta = self.sync(self.teacher, data["cursor"])
+        self.assertFalse(delta["reset"])
+        self.assertEqual(delta["classrooms"], {"updated": [], "deleted": [self.classroom.classroom_id]})
+        self.assertEqual(delta["assignments"], {"updated": [], "deleted": [self.assignment.assignment_id]})
+        self.assertEqual(delta["enrollments"], {"updated": [], "deleted": [self.enrollment.enrollment_id]})
@@ -0,0 +1,130 @@
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+
+from .changes import InvalidCursor, Sync
+from .events import event_stream, students_channel, teachers_channel
+from core.renderers import EventStreamRenderer, ORJSONRenderer
+from core.utils import response_payload
+from trex.user.membership import get_membership
+
+
+@extend_schema(
+    tags=["Sync"],
+    parameters=[
+        OpenApiParameter("cursor", OpenApiTypes.STR, description="The cursor returned by the previous sync."),
+    ],
+    responses=OpenApiTypes.OBJECT,
+)
+class SyncView(APIView):
+    """
+    Delta sync of the classrooms, assignments and enrollments visible to the user.
+    User must be authenticated.
+
+    Without a cursor, returns all of them. With the cursor returned by the previous sync,
+    returns only the records created, updated or deleted since then:
+    `updated` has their current data, `deleted` the ids of records that were deleted or are no longer visible.
+    A deleted classroom takes its assignments and enrollments with it.
+    Records can be repeated across syncs, apply them as upserts.
+    When `reset` is true the cursor was too old or too far behind, and everything is returned instead:
+    replace the local data.
+    """
+
+    permission_classes = [IsAuthenticated, ]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            data = Sync(request).get_payload(request.query_params.get("cursor"))
+        except InvalidCursor:
+            return Response(
+                response_payload(
+                    success=False,
+                    message="Invalid cursor",
+                ),
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(
+            response_payload(
+                success=True,
+                message="Changes fetched successfully",
+                data=data,
+            ),
+            status=status.HTTP_200_OK,
+        )
+
+
+@extend_schema(
+    tags=["Sync"],
+    parameters=[
+        OpenApiParameter(
+            "classroom_id", OpenApiTypes.INT, many=True,
+            description="Only the events of these classrooms. Required for admins.",
+        ),
+    ],
+    responses={(200, "text/event-stream"): OpenApiTypes.STR},
+)
+class SyncEventsView(APIView):
+    """
+    Server-sent events about the classrooms visible to the user, served by the ASGI application only.
+    User must be authenticated.
+
+    Teachers receive `assignment.created`, `assignment.updated` and `assignment.deleted` for every assignment
+    of their classrooms, and `roster.changed` when students join or leave.
+    Students receive `assignment.published`, `assignment.updated` and `assignment.deleted`
+    for the published assignments of the classrooms they are enrolled in.
+    Events only carry ids, fetch the data with a delta sync, including right after the `ready` event
+    of every (re)connection. Streams end after a few minutes, reconnect when they do.
+    """
+
+    permission_classes = [IsAuthenticated, ]
+    renderer_classes = [ORJSONRenderer, EventStreamRenderer]
+
+    def get_channels(self):
+        """
+        The channels the user may subscribe to, and the classroom ids they belong to.
+        """
+        user = self.request.user
+        membership = get_membership(self.request)
+        requested = {int(classroom_id) for classroom_id in self.request.query_params.getlist("classroom_id")}
+        if user.role == "teacher":
+            classroom_ids, channel = membership.teacher_ids, teachers_channel
+        elif user.role == "student":
+            classroom_ids, channel = membership.student_ids, students_channel
+        elif user.is_superuser:
+            classroom_ids, channel = requested, teachers_channel
+        else:
+            classroom_ids, channel = frozenset(), teachers_channel
+        if requested:
+            classroom_ids = classroom_ids & requested
+        return {channel(classroom_id) for classroom_id in classroom_ids}, classroom_ids
+
+    def get(self, request, *args, **kwargs):
+        if not isinstance(request._request, ASGIRequest):
+            return Response(
+                response_payload(
+                    success=False,
+                    message="Events are only served by the ASGI application",
+                ),
+                status=status.HTTP_501_NOT_IMPLEMENTED,
+            )
+        try:
+            channels, classroom_ids = self.get_channels()
+        except ValueError:
+            return Response(
+                response_payload(
+                    success=False,
+                    message="Invalid classroom_id",
+                ),
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        response = StreamingHttpResponse(event_stream(channels, classroom_ids), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # nginx would buffer the events otherwise
+        response["X-Accel-Buffering"] = "no"
+        return response
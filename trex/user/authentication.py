@@ -0,0 +1,43 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+STATELESS_CLAIMS = ('role', 'is_superuser', 'token_version')
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that builds request.user from the token claims instead of loading the user row.
+
+    Tokens minted by User.tokens() carry the user's role, is_superuser and token_version.
+    The token_version is checked against User.get_token_version (cached), so tokens issued before
+    a role change or deactivation are rejected without a query per request.
+
+    request.user is a User instance with only id, role, is_superuser and is_active loaded,
+    any other field is loaded lazily on first access.
+    Tokens without these claims (minted before this class was introduced) fall back to a database lookup.
+    """
+
+    def get_user(self, validated_token):
+        if not all(claim in validated_token for claim in STATELESS_CLAIMS):
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        token_version = User.get_token_version(user_id)
+        if token_version is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if token_version != validated_token['token_version']:
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+        return User.from_db(
+            None,
+            ['id', 'is_superuser', 'is_active', 'role'],
+            [user_id, validated_token['is_superuser'], True, validated_token['role']],
+        )
@@ -0,0 +1,104 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import DateTimeField, F, IntegerField, Value
+
+from core.db_router import read_from_primary
+from trex.classroom.models import Classroom
+from trex.enrollment.models import Enrollment
+
+MEMBERSHIP_CACHE_TIMEOUT = 60 * 60
+TEACHER = 0
+STUDENT = 1
+
+
+class Membership:
+    """
+    Ids of the classrooms a user teaches and is enrolled in,
+    with the date the user joined each classroom they are enrolled in.
+    """
+
+    def __init__(self, teacher_ids, dates_joined):
+        self.teacher_ids = frozenset(teacher_ids)
+        self.student_ids = frozenset(dates_joined)
+        self.dates_joined = dict(dates_joined)
+
+    def is_teacher_of(self, classroom_id):
+        return int(classroom_id) in self.teacher_ids
+
+    def is_student_of(self, classroom_id):
+        return int(classroom_id) in self.student_ids
+
+    def date_joined(self, classroom_id):
+        return self.dates_joined.get(int(classroom_id))
+
+
+def _version_key(user_id):
+    return f"classroom-membership-version:{user_id}"
+
+
+def get_membership(request):
+    """
+    Return the Membership of the request's user.
+
+    It is resolved at most once per request, and otherwise shared between requests through the cache.
+    Cached entries are keyed by a per-user version, which invalidate_membership drops whenever
+    the user's classrooms or enrollments change, so a stale entry is never read again.
+    """
+    membership = getattr(request, "_classroom_membership", None)
+    if membership is not None:
+        return membership
+
+    user_id = request.user.pk
+    version_key = _version_key(user_id)
+    version = cache.get(version_key)
+    if version is None:
+        # a fresh version, so entries cached before an invalidation can never be picked up again
+        cache.add(version_key, time.time_ns(), timeout=None)
+        version = cache.get(version_key)
+
+    key = f"classroom-membership:v2:{user_id}:{version}"
+    membership = cache.get(key)
+    if membership is None:
+        # a replica may not have the enrollment that just dropped the cached entry yet
+        with read_from_primary():
+            membership = load_membership(user_id)
+        cache.set(key, membership, timeout=MEMBERSHIP_CACHE_TIMEOUT)
+
+    request._classroom_membership = membership
+    return membership
+
+
+def load_membership(user_id):
+    """
+    Load both id sets, and the enrollment dates, in a single query.
+    """
+    teacher_ids = Classroom.objects.filter(teacher_id=user_id).annotate(
+        kind=Value(TEACHER, output_field=IntegerField()),
+        joined=Value(None, output_field=DateTimeField()),
+    ).order_by().values_list("classroom_id", "kind", "joined")
+    student_ids = Enrollment.objects.filter(student_id=user_id).annotate(
+        kind=Value(STUDENT, output_field=IntegerField()),
+        # an annotation like on the teacher side, the combined queries select model fields before annotations
+        joined=F("date_joined"),
+    ).order_by().values_list("classroom_id", "kind", "joined")
+
+    teacher_classroom_ids = []
+    dates_joined = {}
+    for classroom_id, kind, date_joined in teacher_ids.union(student_ids, all=True):
+        if kind == TEACHER:
+            teacher_classroom_ids.append(classroom_id)
+        else:
+            dates_joined[classroom_id] = date_joined
+    return Membership(teacher_classroom_ids, dates_joined)
+
+
+def invalidate_membership(*user_ids):
+    """
+    Drop the cached membership version of the given users.
+    Deferred until the current transaction commits, so a concurrent request
+    cannot cache the old memberships under the new version.
+    """
+    keys = [_version_key(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
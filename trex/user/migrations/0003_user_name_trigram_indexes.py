@@ -0,0 +1,31 @@
+# Generated by Django 4.2.6 on 2026-10-18 16:41
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("user", "0002_alter_user_gender_alter_user_role"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="user",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["first_name"],
+                name="user_first_name_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["last_name"],
+                name="user_last_name_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
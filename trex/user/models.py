@@ -1,9 +1,17 @@
-from django.db import models
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+from django.contrib.postgres.indexes import GinIndex
 from django.contrib.auth.models import AbstractUser
 from rest_framework_simplejwt.tokens import RefreshToken
 
 # Create your models here.
 
+# Changing any of these, or the password, invalidates the user's outstanding tokens, see User.token_version.
+TOKEN_CLAIM_FIELDS = ('role', 'is_superuser', 'is_active')
+# Kept short, so a revocation that did not reach a process's cache (e.g. a per-process cache) still takes
+# effect within minutes rather than after the tokens expire.
+TOKEN_VERSION_CACHE_TIMEOUT = 5 * 60
+
 
 class User(AbstractUser):
     role_choices = (
@@ -22,6 +30,9 @@ class User(AbstractUser):
     gender = models.CharField(max_length=20, choices=gender_choices, blank=True, default='not-specified')
     joining_date = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Embedded in the JWTs minted by tokens(), bumped whenever a TOKEN_CLAIM_FIELDS value or the password
+    # changes so that tokens carrying the old claims, or issued before, are rejected by StatelessJWTAuthentication.
+    token_version = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.username
@@ -30,9 +41,78 @@ class User(AbstractUser):
         ordering = ('-joining_date',)
         verbose_name_plural = 'Users'
         verbose_name = 'User'
+        indexes = [
+            # the uniqueness check of UserCreateSerializer.validate_email
+            models.Index(fields=['email'], name='user_email'),
+            # trigram indexes for name similarity search, see core.filters.FullTextSearchFilter
+            GinIndex(fields=['first_name'], opclasses=['gin_trgm_ops'], name='user_first_name_trgm'),
+            GinIndex(fields=['last_name'], opclasses=['gin_trgm_ops'], name='user_last_name_trgm'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_token_claims = {
+            field: getattr(instance, field) for field in TOKEN_CLAIM_FIELDS if field in instance.__dict__
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        loaded_claims = getattr(self, '_loaded_token_claims', {})
+        claims_changed = any(getattr(self, field) != value for field, value in loaded_claims.items())
+        # set_password() keeps the new password in _password until it is saved
+        if self._password is not None and not self._state.adding:
+            claims_changed = True
+        if claims_changed:
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self._loaded_token_claims = {
+            field: getattr(self, field) for field in TOKEN_CLAIM_FIELDS if field in self.__dict__
+        }
+        if claims_changed:
+            key, version = self.token_version_cache_key(self.pk), self.token_version
+            transaction.on_commit(lambda: cache.set(key, version, timeout=TOKEN_VERSION_CACHE_TIMEOUT))
+
+    @classmethod
+    def invalidate_token_version(cls, user_id):
+        """
+        Drop the cached token version of a user once the current transaction commits.
+        """
+        key = cls.token_version_cache_key(user_id)
+        transaction.on_commit(lambda: cache.delete(key))
+
+    @staticmethod
+    def token_version_cache_key(user_id):
+        return f"user-token-version:{user_id}"
+
+    @classmethod
+    def get_token_version(cls, user_id):
+        """
+        Current token version of a user, from the cache if possible.
+        Returns None if the user does not exist.
+
+        A missing entry is read from the primary, a lagging replica could still have the version
+        from before a revocation, which would then be cached.
+        """
+        key = cls.token_version_cache_key(user_id)
+        version = cache.get(key)
+        if version is None:
+            version = cls.objects.using(DEFAULT_DB_ALIAS).filter(
+                pk=user_id,
+            ).values_list('token_version', flat=True).first()
+            if version is not None:
+                cache.set(key, version, timeout=TOKEN_VERSION_CACHE_TIMEOUT)
+        return version
 
     def tokens(self):
         refresh = RefreshToken.for_user(self)
+        # claims read by StatelessJWTAuthentication instead of loading the user, copied to the access token
+        refresh['role'] = self.role
+        refresh['is_superuser'] = self.is_superuser
+        refresh['token_version'] = self.token_version
         return {
             'refresh': str(refresh),
             'access': str(refresh.access_token),
@@ -1,5 +1,6 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 from core.utils import response_payload
+from .membership import get_membership
 
 
 class IsAdmin(BasePermission):
@@ -30,9 +31,7 @@ class IsTeacherOfThisClassroom(BasePermission):
 
     def has_permission(self, request, view):
         classroom_id = view.kwargs['classroom_id']
-        # This works because of the related_name='classrooms' in Classroom model.
-        # Only teacher has 'classrooms' attribute, not the students.
-        return request.user.classrooms.filter(classroom_id=classroom_id).exists()
+        return get_membership(request).is_teacher_of(classroom_id)
 
 
 class IsStudent(BasePermission):
@@ -53,6 +52,4 @@ class IsStudentOfThisClassroom(BasePermission):
 
     def has_permission(self, request, view):
         classroom_id = view.kwargs['classroom_id']
-        # This works because of the related_name='enrollments' in Enrollment model.
-        # Only student has 'enrollments' attribute, not the teachers.
-        return request.user.enrollments.filter(classroom_id=classroom_id).exists()
+        return get_membership(request).is_student_of(classroom_id)
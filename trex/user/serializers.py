@@ -1,12 +1,18 @@
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
 
+from core.serializers import ModelSerializer, ValuesListSerializer
 from core.utils import response_payload
 from .models import User
 
 
-class UserListSerializer(serializers.ModelSerializer):
+class UserListSerializer(ModelSerializer):
     class Meta:
         model = User
+        list_serializer_class = ValuesListSerializer
         fields = (
             "id",
             "username",
@@ -17,7 +23,7 @@ class UserListSerializer(serializers.ModelSerializer):
         )
 
 
-class UserDetailSerializer(serializers.ModelSerializer):
+class UserDetailSerializer(ModelSerializer):
     class Meta:
         model = User
         fields = (
@@ -32,7 +38,7 @@ class UserDetailSerializer(serializers.ModelSerializer):
         )
 
 
-class UserUpdateSerializer(serializers.ModelSerializer):
+class UserUpdateSerializer(ModelSerializer):
     class Meta:
         model = User
         fields = (
@@ -53,7 +59,7 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         )
 
 
-class UserCreateSerializer(serializers.ModelSerializer):
+class UserCreateSerializer(ModelSerializer):
     password = serializers.CharField(style={"input_type": "password"}, write_only=True)
     password2 = serializers.CharField(style={"input_type": "password"}, write_only=True)
 
@@ -104,7 +110,7 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return UserDetailSerializer(instance).data
 
 
-class UserLoginSerializer(serializers.ModelSerializer):
+class UserLoginSerializer(ModelSerializer):
     username = serializers.CharField(max_length=255, min_length=3)
     password = serializers.CharField(max_length=68, min_length=6, write_only=True)
     tokens = serializers.SerializerMethodField()
@@ -172,3 +178,18 @@ class UserLoginSerializer(serializers.ModelSerializer):
             'avatar': user.avatar,
             'gender': user.gender,
         }
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    """
+    Refuses refresh tokens issued before the user's token_version was bumped (see User.token_version),
+    instead of minting access tokens that StatelessJWTAuthentication would reject.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if 'token_version' in refresh:
+            token_version = User.get_token_version(refresh[api_settings.USER_ID_CLAIM])
+            if token_version != refresh['token_version']:
+                raise InvalidToken(_("Token has been revoked"))
+        return super().validate(attrs)
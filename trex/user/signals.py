@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .membership import invalidate_membership
+
+
+@receiver(post_save, sender="classroom.Classroom")
+@receiver(post_delete, sender="classroom.Classroom")
+def classroom_changed(sender, instance, **kwargs):
+    # a reassigned classroom also leaves the membership of its previous teacher
+    previous_teacher_id = getattr(instance, "_loaded_teacher_id", None)
+    invalidate_membership(*{instance.teacher_id, previous_teacher_id} - {None})
+    instance._loaded_teacher_id = instance.teacher_id
+
+
+@receiver(post_save, sender="enrollment.Enrollment")
+@receiver(post_delete, sender="enrollment.Enrollment")
+def enrollment_changed(sender, instance, **kwargs):
+    invalidate_membership(instance.student_id)
+
+
+@receiver(post_delete, sender="user.User")
+def user_deleted(sender, instance, **kwargs):
+    # tokens of a deleted user must stop authenticating, see StatelessJWTAuthentication
+    sender.invalidate_token_version(instance.pk)
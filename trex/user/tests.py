@@ -1,3 +1,181 @@
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.db import connections
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from trex.classroom.models import Classroom
+from trex.enrollment.models import Enrollment
+from trex.enrollment.roster import RosterImport, read_json_students
+from .models import User
+from .permissions import IsStudentOfThisClassroom, IsTeacherOfThisClassroom
+
+
+class TokenRevocationTests(TestCase):
+    databases = {"default", "replica"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="student", password="password", role="student")
+
+    def setUp(self):
+        # cached token versions outlive the rolled back changes of the previous test
+        cache.clear()
+        self.tokens = User.objects.get(pk=self.user.pk).tokens()
+        self.assertEqual(self.get(self.tokens["access"]).status_code, 200)
+
+    @staticmethod
+    def get(access_token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+        return client.get("/api/classrooms/")
+
+    def refresh(self, refresh_token):
+        return APIClient().post("/api/users/login/refresh/", {"refresh": refresh_token}, format="json")
+
+    def update(self, **fields):
+        user = User.objects.get(pk=self.user.pk)
+        for field, value in fields.items():
+            setattr(user, field, value)
+        # the cached token version is replaced once the change commits
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        return user
+
+    def assert_revoked(self):
+        response = self.get(self.tokens["access"])
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["code"], "token_revoked")
+
+    def test_role_change_revokes_tokens(self):
+        self.update(role="teacher")
+        self.assert_revoked()
+
+    def test_deactivation_revokes_tokens(self):
+        self.update(is_active=False)
+        self.assert_revoked()
+
+    def test_password_change_revokes_tokens(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password("new password")
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assert_revoked()
+
+    def test_other_changes_keep_tokens(self):
+        self.update(first_name="Ada", last_name="Lovelace")
+        self.assertEqual(self.get(self.tokens["access"]).status_code, 200)
+
+    def test_new_tokens_work_after_revocation(self):
+        user = self.update(role="teacher")
+        self.assertEqual(self.get(user.tokens()["access"]).status_code, 200)
+
+    def test_deleted_user_is_rejected(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).delete()
+        self.assertEqual(self.get(self.tokens["access"]).status_code, 401)
+
+    def test_refresh(self):
+        response = self.refresh(self.tokens["refresh"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get(response.json()["access"]).status_code, 200)
+
+    def test_refresh_after_revocation(self):
+        self.update(role="teacher")
+        response = self.refresh(self.tokens["refresh"])
+        self.assertEqual(response.status_code, 401)
+        self.assertNotIn("access", response.json())
+
+    def test_authentication_does_not_query_users(self):
+        with CaptureQueriesContext(connections["default"]) as default, \
+                CaptureQueriesContext(connections["replica"]) as replica:
+            self.assertEqual(self.get(self.tokens["access"]).status_code, 200)
+        # the classroom list joins the teachers' names, only lookups of the user itself count
+        user_queries = [query["sql"] for query in [*default, *replica] if 'FROM "user_user"' in query["sql"]]
+        self.assertEqual(user_queries, [])
+
+
+class MembershipCacheTests(TestCase):
+    databases = {"default", "replica"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username="teacher", password="password", role="teacher")
+        cls.other_teacher = User.objects.create_user(username="other", password="password", role="teacher")
+        cls.student = User.objects.create_user(username="student", password="password", role="student")
+        cls.classroom = Classroom.objects.create_with_code(teacher=cls.teacher, classroom_name="Algebra")
+
+    def setUp(self):
+        # cached memberships outlive the rolled back changes of the previous test
+        cache.clear()
+
+    def has_permission(self, permission, user, classroom=None):
+        """
+        Check the permission for a new request, and return the result with the number of queries it took.
+        """
+        request = SimpleNamespace(user=user)
+        view = SimpleNamespace(kwargs={"classroom_id": str((classroom or self.classroom).classroom_id)})
+        with CaptureQueriesContext(connections["default"]) as default, \
+                CaptureQueriesContext(connections["replica"]) as replica:
+            allowed = permission().has_permission(request, view)
+            # resolved once per request
+            permission().has_permission(request, view)
+        return allowed, len(default) + len(replica)
+
+    def assert_student(self, expected, classroom=None):
+        self.assertEqual(self.has_permission(IsStudentOfThisClassroom, self.student, classroom), (expected, 1))
+        self.assertEqual(self.has_permission(IsStudentOfThisClassroom, self.student, classroom), (expected, 0))
+
+    def assert_teacher(self, user, expected, classroom=None):
+        self.assertEqual(self.has_permission(IsTeacherOfThisClassroom, user, classroom), (expected, 1))
+        self.assertEqual(self.has_permission(IsTeacherOfThisClassroom, user, classroom), (expected, 0))
+
+    def test_enrollment_create_and_delete(self):
+        self.assert_student(False)
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment = Enrollment.objects.create(classroom=self.classroom, student=self.student)
+        self.assert_student(True)
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment.delete()
+        self.assert_student(False)
+
+    def test_enroll_by_code(self):
+        self.assert_student(False)
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.enroll(self.student, self.classroom.classroom_code)
+        self.assert_student(True)
+
+    def test_roster_import(self):
+        self.assert_student(False)
+        roster_import = RosterImport(self.classroom, read_json_students([self.student.username]))
+        with self.captureOnCommitCallbacks(execute=True):
+            "".join(roster_import.stream_payload())
+        self.assert_student(True)
+
+    def test_classroom_create_and_delete(self):
+        self.assert_teacher(self.teacher, True)
+        with self.captureOnCommitCallbacks(execute=True):
+            classroom = Classroom.objects.create_with_code(teacher=self.teacher, classroom_name="Geometry")
+        self.assert_teacher(self.teacher, True, classroom)
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(classroom=classroom, student=self.student)
+        self.assert_student(True, classroom)
+
+        # the enrollments of a deleted classroom go with it
+        deleted = SimpleNamespace(classroom_id=classroom.classroom_id)
+        with self.captureOnCommitCallbacks(execute=True):
+            classroom.delete()
+        self.assert_teacher(self.teacher, False, deleted)
+        self.assert_student(False, deleted)
 
-# Create your tests here.
+    def test_teacher_reassignment(self):
+        self.assert_teacher(self.teacher, True)
+        self.assert_teacher(self.other_teacher, False)
+        classroom = Classroom.objects.get(pk=self.classroom.pk)
+        classroom.teacher = self.other_teacher
+        with self.captureOnCommitCallbacks(execute=True):
+            classroom.save()
+        self.assert_teacher(self.teacher, False)
+        self.assert_teacher(self.other_teacher, True)
@@ -22,16 +22,17 @@ from .serializers import (
     UserCreateSerializer,
     UserLoginSerializer,
 )
+from core.conditional import ConditionalGetMixin
 from core.utils import response_payload
 
 
-class UserListView(ListAPIView):
+class UserListView(ConditionalGetMixin, ListAPIView):
     # permission_classes = (IsAuthenticated,)
     queryset = User.objects.all()
     serializer_class = UserListSerializer
 
 
-class UserDetailView(RetrieveAPIView):
+class UserDetailView(ConditionalGetMixin, RetrieveAPIView):
     # permission_classes = (IsAuthenticated,)
     queryset = User.objects.all()
     serializer_class = UserDetailSerializer